@@ -1,6 +1,7 @@
 import asyncio
 from logging.config import fileConfig
 import os
+import re
 
 from sqlalchemy import pool
 from sqlalchemy.engine import Connection
@@ -33,6 +34,15 @@ from db.database import Base
 from db import models
 target_metadata = Base.metadata
 
+# Created by DDL events in db/models.py or by migrations rather than mapped, so autogenerate must not drop them
+UNMAPPED_OBJECTS = {"search_vector", "ix_post_search_vector", "post_fts", "post_partition_copy", "post_unpartitioned"}
+# Partitions of `post` (post_p00, post_p01, ...) and the shadow table of the repartitioning
+UNMAPPED_PATTERN = re.compile(r"post_p\d+|post_partitioned|ix_post_partitioned_\w+|ix_post_unpartitioned_\w+")
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    return name not in UNMAPPED_OBJECTS and not UNMAPPED_PATTERN.fullmatch(name or "")
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -57,6 +67,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -64,7 +75,7 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
     with context.begin_transaction():
         context.run_migrations()
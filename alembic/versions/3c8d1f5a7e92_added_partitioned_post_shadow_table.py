@@ -0,0 +1,92 @@
+"""added partitioned post shadow table
+
+Revision ID: 3c8d1f5a7e92
+Revises: f4b9e2d6a813
+Create Date: 2026-10-17 21:04:37.518220
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8d1f5a7e92'
+down_revision: Union[str, Sequence[str], None] = 'f4b9e2d6a813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POST_PARTITIONS = int(os.getenv("POST_PARTITIONS", "16"))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Step 1 of 3 of the online repartitioning, the next ones being `python -m db.repartition`
+    # and revision 6e2a9b4c0d57. Everything here is on empty tables, `post` is only locked
+    # for as long as creating the trigger takes.
+    op.execute("""
+        CREATE TABLE post_partitioned (
+            id INTEGER NOT NULL DEFAULT nextval('post_id_seq'),
+            text VARCHAR(256) NOT NULL,
+            user_id INTEGER NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            version INTEGER NOT NULL DEFAULT 1,
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            deleted_at TIMESTAMP WITH TIME ZONE,
+            search_vector tsvector GENERATED ALWAYS AS (to_tsvector('english', text)) STORED,
+            CONSTRAINT pk_post_partitioned PRIMARY KEY (id, user_id)
+        ) PARTITION BY HASH (user_id)
+    """)
+    for remainder in range(POST_PARTITIONS):
+        op.execute(
+            f"CREATE TABLE post_p{remainder:02d} PARTITION OF post_partitioned "
+            f"FOR VALUES WITH (MODULUS {POST_PARTITIONS}, REMAINDER {remainder})"
+        )
+    # Same indexes as `post`, renamed to theirs by the swap
+    op.create_index('ix_post_partitioned_id', 'post_partitioned', ['id'])
+    op.create_index('ix_post_partitioned_user_id', 'post_partitioned', ['user_id'])
+    op.execute("CREATE INDEX ix_post_partitioned_user_id_timestamp_id ON post_partitioned (user_id, timestamp DESC, id DESC)")
+    op.execute("CREATE INDEX ix_post_partitioned_timestamp_id ON post_partitioned (timestamp DESC, id DESC)")
+    op.execute("CREATE INDEX ix_post_partitioned_deleted_at ON post_partitioned (deleted_at) WHERE deleted_at IS NOT NULL")
+    op.execute("CREATE INDEX ix_post_partitioned_search_vector ON post_partitioned USING GIN (search_vector)")
+
+    # Every write to `post` from now on is mirrored, so the backfill only has to copy older rows
+    op.execute("""
+        CREATE FUNCTION post_partition_mirror() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM post_partitioned WHERE id = OLD.id AND user_id = OLD.user_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO post_partitioned (id, text, user_id, timestamp, version, updated_at, deleted_at)
+                VALUES (NEW.id, NEW.text, NEW.user_id, NEW.timestamp, NEW.version, NEW.updated_at, NEW.deleted_at);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER post_partition_mirror AFTER INSERT OR UPDATE OR DELETE ON post
+        FOR EACH ROW EXECUTE FUNCTION post_partition_mirror()
+    """)
+
+    # Backfill progress. The trigger's lock waited for in-flight inserts, so every id up to
+    # target_id is either committed already or was never used.
+    op.execute("""
+        CREATE TABLE post_partition_copy (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_id INTEGER NOT NULL,
+            target_id INTEGER NOT NULL
+        )
+    """)
+    op.execute("INSERT INTO post_partition_copy (id, last_id, target_id) SELECT 1, 0, COALESCE(max(id), 0) FROM post")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE post_partition_copy")
+    op.execute("DROP TRIGGER post_partition_mirror ON post")
+    op.execute("DROP FUNCTION post_partition_mirror()")
+    # Drops the partitions and their indexes with it
+    op.execute("DROP TABLE post_partitioned")
@@ -0,0 +1,37 @@
+"""added post_user_count table
+
+Revision ID: 5a8e2f6d1b47
+Revises: e7b3d50a9c21
+Create Date: 2026-10-17 17:02:41.554019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a8e2f6d1b47'
+down_revision: Union[str, Sequence[str], None] = 'e7b3d50a9c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('post_user_count',
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='Unique identifier for the post owner.'),
+    sa.Column('post_count', sa.Integer(), nullable=False, comment='Number of posts of the user, maintained in the same transaction as every write.'),
+    sa.PrimaryKeyConstraint('user_id', name=op.f('pk_post_user_count'))
+    )
+    # Backfill; writes made while this runs are caught by `python -m db.reconcile_counts --fix`
+    op.execute(
+        "INSERT INTO post_user_count (user_id, post_count) "
+        "SELECT user_id, count(*) FROM post GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('post_user_count')
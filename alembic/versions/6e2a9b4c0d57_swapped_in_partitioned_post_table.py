@@ -0,0 +1,99 @@
+"""swapped in partitioned post table
+
+Revision ID: 6e2a9b4c0d57
+Revises: 3c8d1f5a7e92
+Create Date: 2026-10-17 21:22:09.864102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2a9b4c0d57'
+down_revision: Union[str, Sequence[str], None] = '3c8d1f5a7e92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = ("id", "user_id", "user_id_timestamp_id", "timestamp_id", "deleted_at", "search_vector")
+COLUMNS = "id, text, user_id, timestamp, version, updated_at, deleted_at"
+
+
+def _rename(old: str, new: str) -> None:
+    op.execute(f"ALTER TABLE {old} RENAME TO {new}")
+    # Renaming the primary key constraint renames its index too
+    op.execute(f"ALTER TABLE {new} RENAME CONSTRAINT pk_{old} TO pk_{new}")
+    for index in INDEXES:
+        op.execute(f"ALTER INDEX ix_{old}_{index} RENAME TO ix_{new}_{index}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Step 3 of 3: catalog-only renames under a short ACCESS EXCLUSIVE lock, no data is moved
+    # Checked in SQL rather than Python so `alembic upgrade --sql` can render the script too
+    op.execute("""
+        DO $$
+        DECLARE progress post_partition_copy%ROWTYPE;
+        BEGIN
+            SELECT * INTO progress FROM post_partition_copy;
+            IF progress.last_id < progress.target_id THEN
+                RAISE EXCEPTION 'post_partitioned is only filled up to id % of %, run `python -m db.repartition` first.',
+                    progress.last_id, progress.target_id;
+            END IF;
+        END
+        $$
+    """)
+    op.execute("LOCK TABLE post IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER post_partition_mirror ON post")
+    op.execute("DROP FUNCTION post_partition_mirror()")
+    op.execute("DROP TABLE post_partition_copy")
+    # The old heap stays as post_unpartitioned until someone drops it by hand
+    _rename("post", "post_unpartitioned")
+    _rename("post_partitioned", "post")
+    op.execute("ALTER SEQUENCE post_id_seq OWNED BY post.id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Brings back the rows written since the swap: this one reads the whole table, plan a maintenance window
+    op.execute("LOCK TABLE post IN ACCESS EXCLUSIVE MODE")
+    op.execute(f"""
+        INSERT INTO post_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM post
+        ON CONFLICT (id) DO UPDATE SET
+            text = EXCLUDED.text, version = EXCLUDED.version,
+            updated_at = EXCLUDED.updated_at, deleted_at = EXCLUDED.deleted_at
+    """)
+    op.execute("DELETE FROM post_unpartitioned u WHERE NOT EXISTS (SELECT 1 FROM post p WHERE p.id = u.id AND p.user_id = u.user_id)")
+    _rename("post", "post_partitioned")
+    _rename("post_unpartitioned", "post")
+    op.execute("ALTER SEQUENCE post_id_seq OWNED BY post.id")
+
+    # Back to the state of revision 3c8d1f5a7e92, with the backfill already complete
+    op.execute("""
+        CREATE FUNCTION post_partition_mirror() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM post_partitioned WHERE id = OLD.id AND user_id = OLD.user_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO post_partitioned (id, text, user_id, timestamp, version, updated_at, deleted_at)
+                VALUES (NEW.id, NEW.text, NEW.user_id, NEW.timestamp, NEW.version, NEW.updated_at, NEW.deleted_at);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER post_partition_mirror AFTER INSERT OR UPDATE OR DELETE ON post
+        FOR EACH ROW EXECUTE FUNCTION post_partition_mirror()
+    """)
+    op.execute("""
+        CREATE TABLE post_partition_copy (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_id INTEGER NOT NULL,
+            target_id INTEGER NOT NULL
+        )
+    """)
+    op.execute("INSERT INTO post_partition_copy (id, last_id, target_id) SELECT 1, COALESCE(max(id), 0), COALESCE(max(id), 0) FROM post")
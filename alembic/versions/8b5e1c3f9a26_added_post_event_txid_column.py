@@ -0,0 +1,40 @@
+"""added post_event txid column
+
+Revision ID: 8b5e1c3f9a26
+Revises: 6e2a9b4c0d57
+Create Date: 2026-10-18 10:12:44.305718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b5e1c3f9a26'
+down_revision: Union[str, Sequence[str], None] = '6e2a9b4c0d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default does not rewrite the table; older events keep 0 and sort first.
+    # db.outbox.record fills in the writing transaction's id from now on.
+    op.add_column('post_event', sa.Column(
+        'txid', sa.BigInteger(), server_default='0', nullable=False,
+        comment='PostgreSQL: transaction that wrote the event (pg_current_xact_id), orders the change stream. 0 elsewhere.',
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_post_event_txid_id', 'post_event', ['txid', 'id'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_post_event_txid_id', table_name='post_event', postgresql_concurrently=True)
+    op.drop_column('post_event', 'txid')
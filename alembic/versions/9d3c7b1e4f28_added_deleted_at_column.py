@@ -0,0 +1,39 @@
+"""added deleted_at column
+
+Revision ID: 9d3c7b1e4f28
+Revises: 5a8e2f6d1b47
+Create Date: 2026-10-17 17:48:12.207734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3c7b1e4f28'
+down_revision: Union[str, Sequence[str], None] = '5a8e2f6d1b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A nullable column without default is a catalog-only change, the table is not rewritten
+    op.add_column('post', sa.Column(
+        'deleted_at', sa.DateTime(timezone=True), nullable=True,
+        comment='Tombstone: when the post was soft-deleted, NULL while it is live.',
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_post_deleted_at', 'post', ['deleted_at'],
+            unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'), postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_post_deleted_at', table_name='post', postgresql_concurrently=True)
+    op.drop_column('post', 'deleted_at')
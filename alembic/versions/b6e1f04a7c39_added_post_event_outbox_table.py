@@ -0,0 +1,42 @@
+"""added post_event outbox table
+
+Revision ID: b6e1f04a7c39
+Revises: 9d3c7b1e4f28
+Create Date: 2026-10-17 18:21:37.614093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1f04a7c39'
+down_revision: Union[str, Sequence[str], None] = '9d3c7b1e4f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('post_event',
+    sa.Column('id', sa.Integer(), nullable=False, comment='Position of the event in the change stream (Auto-incrementing PK).'),
+    sa.Column('event_type', sa.String(length=16), nullable=False, comment='What happened to the post: created, updated or deleted.'),
+    sa.Column('post_id', sa.Integer(), nullable=False, comment='The post the event is about.'),
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='Unique identifier for the post owner.'),
+    sa.Column('text', sa.String(length=256), nullable=True, comment="The post's text after the change, NULL for deletions."),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False, comment='Timestamp of the write that produced the event.'),
+    sa.Column('published_at', sa.DateTime(timezone=True), nullable=True, comment='When the relay handed the event to the sink, NULL until then.'),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_post_event'))
+    )
+    op.create_index(
+        'ix_post_event_unpublished', 'post_event', ['id'],
+        unique=False, postgresql_where=sa.text('published_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_post_event_unpublished', table_name='post_event')
+    op.drop_table('post_event')
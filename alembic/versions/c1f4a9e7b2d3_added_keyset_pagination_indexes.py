@@ -0,0 +1,41 @@
+"""added keyset pagination indexes
+
+Revision ID: c1f4a9e7b2d3
+Revises: 358d8ad95f1c
+Create Date: 2026-10-17 10:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1f4a9e7b2d3'
+down_revision: Union[str, Sequence[str], None] = '358d8ad95f1c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction, and keeps the table writable while building
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_post_user_id_timestamp_id', 'post',
+            ['user_id', sa.text('timestamp DESC'), sa.text('id DESC')],
+            unique=False, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_post_timestamp_id', 'post',
+            [sa.text('timestamp DESC'), sa.text('id DESC')],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_post_timestamp_id', table_name='post', postgresql_concurrently=True)
+        op.drop_index('ix_post_user_id_timestamp_id', table_name='post', postgresql_concurrently=True)
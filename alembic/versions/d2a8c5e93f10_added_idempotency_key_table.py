@@ -0,0 +1,38 @@
+"""added idempotency key table
+
+Revision ID: d2a8c5e93f10
+Revises: b6e1f04a7c39
+Create Date: 2026-10-17 19:05:53.480216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a8c5e93f10'
+down_revision: Union[str, Sequence[str], None] = 'b6e1f04a7c39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('post_idempotency_key',
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='The user who sent the key, keys are scoped per user.'),
+    sa.Column('key', sa.String(length=255), nullable=False, comment="The client's Idempotency-Key header."),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False, comment='SHA-256 of the route and request the key was first used with.'),
+    sa.Column('status_code', sa.Integer(), nullable=True, comment='Status of the stored response, NULL while the request is in flight.'),
+    sa.Column('response', sa.Text(), nullable=True, comment='Stored JSON response body, replayed verbatim.'),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False, comment='After this the key is forgotten and may be reused.'),
+    sa.PrimaryKeyConstraint('user_id', 'key', name=op.f('pk_post_idempotency_key'))
+    )
+    op.create_index(op.f('ix_post_idempotency_key_expires_at'), 'post_idempotency_key', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_post_idempotency_key_expires_at'), table_name='post_idempotency_key')
+    op.drop_table('post_idempotency_key')
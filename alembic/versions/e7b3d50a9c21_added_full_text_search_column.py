@@ -0,0 +1,41 @@
+"""added full-text search column
+
+Revision ID: e7b3d50a9c21
+Revises: c1f4a9e7b2d3
+Create Date: 2026-10-17 16:31:05.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3d50a9c21'
+down_revision: Union[str, Sequence[str], None] = 'c1f4a9e7b2d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A STORED generated column rewrites the table once; run it in a maintenance window on big tables
+    op.add_column('post', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english', text)", persisted=True),
+        nullable=True,
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_post_search_vector', 'post', ['search_vector'],
+            unique=False, postgresql_using='gin', postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_post_search_vector', table_name='post', postgresql_concurrently=True)
+    op.drop_column('post', 'search_vector')
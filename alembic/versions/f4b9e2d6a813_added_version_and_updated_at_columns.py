@@ -0,0 +1,37 @@
+"""added version and updated_at columns
+
+Revision ID: f4b9e2d6a813
+Revises: d2a8c5e93f10
+Create Date: 2026-10-17 19:52:18.093561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b9e2d6a813'
+down_revision: Union[str, Sequence[str], None] = 'd2a8c5e93f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Constant and stable defaults are stored in the catalog: neither column rewrites the table
+    op.add_column('post', sa.Column(
+        'version', sa.Integer(), server_default='1', nullable=False,
+        comment='Bumped by every write to the post, part of its ETag.',
+    ))
+    op.add_column('post', sa.Column(
+        'updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False,
+        comment='Timestamp of the last write to the post, its Last-Modified.',
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('post', 'updated_at')
+    op.drop_column('post', 'version')
@@ -1,20 +1,75 @@
-from sqlalchemy.ext.asyncio.session import AsyncSession
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from db.database import get_async_db
+from collections import OrderedDict
 from jose import JWTError, jwt
+import hashlib
+import time
 import os
 
 # 1. Configuration
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
+TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
 
 # 2. Define the scheme
 # This tells Swagger UI where to find the token (the URL of your auth service)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="http://localhost/auth/login")
+# Same scheme for routes that also serve anonymous requests
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="http://localhost/auth/login", auto_error=False)
 
-# 3. The Dependency
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> int:
+
+# 3. The verified-token cache
+class VerifiedTokenCache:
+    """
+    Bounded LRU of tokens whose signature was already verified.
+
+    Entries are keyed by the SHA-256 of the token, never the token itself, and
+    expire at the token's `exp` claim or after `ttl` seconds, whichever is first.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict[bytes, tuple[float, int]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> int | None:
+        key = self._key(token)
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, user_id = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return user_id
+
+    def put(self, token: str, user_id: int, exp: float | None) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        key = self._key(token)
+        self._data[key] = (expires_at, user_id)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+token_cache = VerifiedTokenCache()
+
+
+# 4. Verification
+def verify_token(token: str) -> int:
     """
     Decodes the token, verifies validity, and returns the User id.
     """
@@ -37,11 +92,40 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Did not find the user id in the payload",
         )
-    
+
     try:
-        return int(user_id)
+        verified_id = int(user_id)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User ID format is invalid"
         )
+
+    exp = payload.get("exp")
+    token_cache.put(token, verified_id, float(exp) if exp is not None else None)
+    return verified_id
+
+
+# 5. The Dependency
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> int:
+    """
+    Returns the User id of the bearer token, skipping signature verification
+    for tokens that were verified recently.
+    """
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+    return verify_token(token)
+
+
+async def get_optional_user(token: str | None = Depends(optional_oauth2_scheme)) -> int | None:
+    """
+    Returns the User id of a valid bearer token, or None for a missing or
+    invalid one: for routes that work without a user and never reject.
+    """
+    if token is None:
+        return None
+    try:
+        return await get_current_user(token)
+    except HTTPException:
+        return None
@@ -0,0 +1,167 @@
+from fastapi import Depends, HTTPException, status
+from monitoring.metrics import ENABLED as METRICS_ENABLED, RATE_LIMITED
+from auth.oauth2 import get_current_user
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Protocol
+from dotenv import load_dotenv
+import logging
+import math
+import time
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+# "<route>:<requests>/<seconds>" pairs, e.g. "create:20/1,create_bulk:5/1"; routes not listed are unlimited
+RATE_LIMITS: str = os.getenv("POST_RATE_LIMITS", "")
+RATE_LIMIT_BACKEND: str = os.getenv("POST_RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_MAX_BUCKETS: int = int(os.getenv("POST_RATE_LIMIT_MAX_BUCKETS", "100000"))
+REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket holding `requests` tokens, refilled at `requests / seconds` tokens per second."""
+
+    requests: int
+    seconds: float
+
+    @property
+    def refill_rate(self) -> float:
+        return self.requests / self.seconds
+
+
+def parse_limits(spec: str) -> dict[str, RateLimit]:
+    limits: dict[str, RateLimit] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            route, rate = item.split(":")
+            requests, seconds = rate.split("/")
+            limit = RateLimit(int(requests), float(seconds))
+        except ValueError as e:
+            raise ValueError(f"CRITICAL: invalid POST_RATE_LIMITS entry '{item}', expected <route>:<requests>/<seconds>.") from e
+        # Zero would divide by zero in refill_rate on the first request instead of failing here
+        if limit.requests <= 0 or not 0 < limit.seconds < math.inf:
+            raise ValueError(f"CRITICAL: invalid POST_RATE_LIMITS entry '{item}', requests and seconds must be positive.")
+        limits[route.strip()] = limit
+    return limits
+
+
+class RateLimitBackend(Protocol):
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        """Takes one token; returns 0 when allowed, else the seconds until a token is available."""
+        ...
+
+
+class MemoryBuckets:
+    """Per-process buckets. Each worker enforces the limit on its own."""
+
+    def __init__(self, max_buckets: int = RATE_LIMIT_MAX_BUCKETS) -> None:
+        self.max_buckets = max_buckets
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(limit.requests), now))
+        tokens = min(float(limit.requests), tokens + (now - updated) * limit.refill_rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / limit.refill_rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        # An evicted bucket comes back full, which only ever errs on the lenient side
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# Refill, take a token and store the bucket in one atomic step, timed by the Redis server clock
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Buckets in any Redis-protocol server, shared by every worker: one round trip per request."""
+
+    def __init__(self, url: str = REDIS_URL) -> None:
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError(
+                "CRITICAL: POST_RATE_LIMIT_BACKEND=redis requires the 'redis' package."
+            ) from e
+        self._client = aioredis.Redis.from_url(url, decode_responses=True)
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        return float(await self._script(keys=[f"ratelimit:{key}"], args=[limit.requests, limit.refill_rate]))
+
+
+def build_backend(name: str = RATE_LIMIT_BACKEND) -> RateLimitBackend:
+    if name == "redis":
+        return RedisBuckets()
+    if name != "memory":
+        logger.warning(f"Unknown POST_RATE_LIMIT_BACKEND '{name}', using memory.")
+    return MemoryBuckets()
+
+
+# ------------------------------------------------------------------------------------
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, limits: dict[str, RateLimit]) -> None:
+        self.backend = backend
+        self.limits = limits
+
+    def __call__(self, route: str) -> Any:
+        """
+        Dependency limiting `route` per user.
+
+        Give it in the route decorator's `dependencies`: FastAPI resolves those
+        before the endpoint's parameters, so a rejected request never opens a
+        DB session. `get_current_user` is cached per request and not run twice.
+        """
+
+        async def check(current_user_id: int = Depends(get_current_user)) -> None:
+            limit = self.limits.get(route)
+            if limit is None:
+                return None
+            wait = await self.backend.acquire(f"{route}:{current_user_id}", limit)
+            if wait > 0:
+                if METRICS_ENABLED:
+                    RATE_LIMITED.labels(route).inc()
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Rate limit exceeded for {route}: {limit.requests} per {limit.seconds:g}s.",
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+            return None
+
+        return Depends(check)
+
+
+rate_limit = RateLimiter(build_backend(), parse_limits(RATE_LIMITS))
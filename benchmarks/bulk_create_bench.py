@@ -0,0 +1,39 @@
+"""
+Throughput of `POST /create_bulk` compared with one `POST /create` per post.
+
+Usage: python -m benchmarks.bulk_create_bench [--posts 2000] [--batch-sizes 10 100 500] [--db-url URL]
+"""
+from benchmarks.common import bench_client, report
+import argparse
+import asyncio
+import time
+
+
+async def run(posts: int, batch_sizes: list[int], db_url: str | None) -> None:
+    async with bench_client(db_url) as client:
+        start = time.perf_counter()
+        for i in range(posts):
+            response = await client.post("/create", json={"text": f"single {i}"})
+            response.raise_for_status()
+        report("single-row create", time.perf_counter() - start, posts, "posts")
+
+        for size in batch_sizes:
+            start = time.perf_counter()
+            for offset in range(0, posts, size):
+                batch = [{"text": f"bulk {i}"} for i in range(offset, min(offset + size, posts))]
+                response = await client.post("/create_bulk", json=batch)
+                response.raise_for_status()
+            report(f"bulk create (batch={size})", time.perf_counter() - start, posts, "posts")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.posts, args.batch_sizes, args.db_url))
+
+
+if __name__ == "__main__":
+    main()
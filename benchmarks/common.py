@@ -0,0 +1,113 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The app is driven in-process through `httpx.ASGITransport`, the same way
+`test/conftest.py` does it, against a scratch database that is created and
+dropped around each run. Pass a `postgresql+asyncpg://` URL to benchmark a
+real server; it must point at a throwaway database.
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+import tempfile
+import asyncio
+import time
+import os
+
+SCRATCH_DIR: str = tempfile.mkdtemp(prefix="post-api-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{SCRATCH_DIR}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import insert
+from httpx import AsyncClient, ASGITransport
+from db.database import Base, get_async_db
+from auth.oauth2 import get_current_user
+from db.models import DbPost
+from main import app
+
+BENCH_USER_ID = 1
+
+
+@asynccontextmanager
+async def bench_sessions(db_url: str | None = None) -> AsyncIterator[async_sessionmaker[AsyncSession]]:
+    engine = create_async_engine(db_url or os.environ["DATABASE_URL"])
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+async def seed_posts(sessions: async_sessionmaker[AsyncSession], count: int, user_id: int = BENCH_USER_ID) -> None:
+    async with sessions() as db:
+        for offset in range(0, count, 5000):
+            rows = [{"text": f"seeded post {i}", "user_id": user_id} for i in range(offset, min(offset + 5000, count))]
+            await db.execute(insert(DbPost), rows)
+        await db.commit()
+
+
+@asynccontextmanager
+async def bench_client(db_url: str | None = None) -> AsyncIterator[AsyncClient]:
+    async with bench_sessions(db_url) as sessions:
+        async with app_client(sessions) as client:
+            yield client
+
+
+@asynccontextmanager
+async def app_client(sessions: async_sessionmaker[AsyncSession]) -> AsyncIterator[AsyncClient]:
+    async def override_get_async_db():
+        async with sessions() as db:
+            yield db
+
+    async def override_get_current_user():
+        return BENCH_USER_ID
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = override_get_current_user
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+def report(name: str, seconds: float, operations: int, unit: str = "ops") -> None:
+    print(f"{name:<32} {operations / seconds:12.1f} {unit}/s   ({seconds:.3f}s for {operations})")
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+async def run_concurrently(
+    operation: Callable[[int], Awaitable[object]],
+    total: int,
+    concurrency: int,
+) -> tuple[list[float], float]:
+    """Runs `operation(i)` for i in range(total) with `concurrency` workers; returns latencies and wall time."""
+    latencies: list[float] = []
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        for i in counter:
+            start = time.perf_counter()
+            await operation(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+def report_latencies(name: str, latencies: list[float], elapsed: float) -> None:
+    print(
+        f"{name:<32} {len(latencies) / elapsed:10.1f} req/s"
+        f"   p50 {percentile(latencies, 50) * 1000:7.2f} ms"
+        f"   p99 {percentile(latencies, 99) * 1000:7.2f} ms"
+    )
@@ -0,0 +1,51 @@
+"""
+Throughput of `POST /create` with and without group commit, at increasing concurrency.
+
+Without it every request commits on its own; with it (POST_GROUP_COMMIT=true)
+concurrent requests are queued and written by one INSERT and one commit per
+batch. The difference grows with concurrency and with the cost of a commit,
+so run it against PostgreSQL with `synchronous_commit = on` for real numbers.
+
+Usage: python -m benchmarks.group_commit_bench [--posts 2000] [--concurrency 1 8 32 128] [--max-rows 100] [--max-delay 0.005] [--db-url URL]
+"""
+from benchmarks.common import app_client, bench_sessions, report_latencies, run_concurrently
+from db.group_commit import post_writes
+import argparse
+import asyncio
+
+
+async def run(posts: int, concurrency_levels: list[int], max_rows: int, max_delay: float, db_url: str | None) -> None:
+    async with bench_sessions(db_url) as sessions:
+        post_writes.sessions = sessions
+        post_writes.max_rows = max_rows
+        post_writes.max_delay = max_delay
+        async with app_client(sessions) as client:
+
+            async def create(i: int) -> None:
+                response = await client.post("/create", json={"text": f"post {i}"})
+                response.raise_for_status()
+
+            for concurrency in concurrency_levels:
+                for enabled in (False, True):
+                    post_writes.enabled = enabled
+                    batches, rows = post_writes.batches, post_writes.rows
+                    latencies, elapsed = await run_concurrently(create, posts, concurrency)
+                    name = f"{'group commit' if enabled else 'commit per post'} (c={concurrency})"
+                    report_latencies(name, latencies, elapsed)
+                    if enabled and post_writes.batches > batches:
+                        print(f"{'':<32} {(post_writes.rows - rows) / (post_writes.batches - batches):10.1f} rows/commit")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--max-rows", type=int, default=100)
+    parser.add_argument("--max-delay", type=float, default=0.005)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.posts, args.concurrency, args.max_rows, args.max_delay, args.db_url))
+
+
+if __name__ == "__main__":
+    main()
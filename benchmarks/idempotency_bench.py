@@ -0,0 +1,51 @@
+"""
+Load test for `Idempotency-Key`: many coroutines send the same create at once.
+
+Every key must produce exactly one post, whatever the number of duplicates.
+Reports the throughput of the duplicates and of creates without a key.
+
+Usage: python -m benchmarks.idempotency_bench [--keys 50] [--duplicates 20] [--db-url URL]
+"""
+from benchmarks.common import bench_client, report
+from db.idempotency import REPLAY_HEADER
+import argparse
+import asyncio
+import time
+import uuid
+
+
+async def run(keys: int, duplicates: int, db_url: str | None) -> None:
+    async with bench_client(db_url) as client:
+        start = time.perf_counter()
+        for i in range(keys):
+            response = await client.post("/create", json={"text": f"plain {i}"})
+            response.raise_for_status()
+        report("create without key", time.perf_counter() - start, keys, "req")
+
+        created: set[int] = set()
+        start = time.perf_counter()
+        for i in range(keys):
+            headers = {"Idempotency-Key": str(uuid.uuid4())}
+            responses = await asyncio.gather(*(
+                client.post("/create", json={"text": f"keyed {i}"}, headers=headers) for _ in range(duplicates)
+            ))
+            ids = {r.raise_for_status().json()["id"] for r in responses}
+            replayed = sum(REPLAY_HEADER in r.headers for r in responses)
+            if len(ids) != 1 or replayed != duplicates - 1:
+                raise SystemExit(f"key {i}: {len(ids)} posts created, {replayed} replays")
+            created |= ids
+        report(f"same key x{duplicates} concurrent", time.perf_counter() - start, keys * duplicates, "req")
+        print(f"{keys * duplicates} requests, {len(created)} posts created")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keys", type=int, default=50)
+    parser.add_argument("--duplicates", type=int, default=20)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.keys, args.duplicates, args.db_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Overhead of the Prometheus middleware and DB query timing.
+
+The headline is the cost per request: the middleware timed around a no-op
+ASGI app plus one query histogram observation, each measured in interleaved
+off/on repetitions and taken at the median, then set against the service
+time of a real request (`1 / throughput` of the event loop). That figure is
+stable to a fraction of a microsecond. Target: a few percent at most.
+
+The end-to-end A/B run is printed after it for reference: rounds run the
+same request mix with instrumentation off and on in alternating order after
+a warm-up of both, and each round gives one paired difference. Run-to-run
+noise of SQLite and the event loop is several percent, so unless the spread
+of those differences is well clear of zero the throughput figure says
+nothing about a cost of a few microseconds.
+
+Usage: python -m benchmarks.metrics_bench [--requests 3000] [--concurrency 16] [--rounds 8] [--db-url URL]
+"""
+from benchmarks.common import app_client, bench_sessions, report_latencies, run_concurrently, seed_posts
+from monitoring.metrics import DB_QUERY_LATENCY, PrometheusMiddleware, instrument_engine
+from monitoring import metrics
+from starlette.types import Message
+import statistics
+import argparse
+import asyncio
+import time
+
+
+async def middleware_cost(iterations: int = 20000, repeats: int = 7) -> float:
+    """Seconds added per request by the middleware, measured around a no-op ASGI app."""
+
+    async def noop_app(scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: Message) -> None:
+        return None
+
+    middleware = PrometheusMiddleware(noop_app)
+    costs: list[float] = []
+    for repeat in range(repeats + 1):
+        cost: dict[bool, float] = {}
+        for enabled in (False, True) if repeat % 2 == 0 else (True, False):
+            metrics.ENABLED = enabled
+            start = time.perf_counter()
+            for _ in range(iterations):
+                await middleware({"type": "http", "method": "GET", "path": "/bench"}, receive, send)
+            cost[enabled] = (time.perf_counter() - start) / iterations
+        # The first repeat only warms up
+        if repeat:
+            costs.append(cost[True] - cost[False])
+    return statistics.median(costs)
+
+
+def query_timing_cost(iterations: int = 100000, repeats: int = 7) -> float:
+    """Seconds one histogram observation adds to a query (the cursor events run either way)."""
+    observe = DB_QUERY_LATENCY.labels("SELECT").observe
+    costs: list[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            observe(0.001)
+        costs.append((time.perf_counter() - start) / iterations)
+    return statistics.median(costs)
+
+
+async def run(requests: int, concurrency: int, rounds: int, db_url: str | None) -> None:
+    async with bench_sessions(db_url) as sessions:
+        instrument_engine(sessions.kw["bind"])
+        await seed_posts(sessions, 100)
+        async with app_client(sessions) as client:
+
+            async def read(i: int) -> None:
+                response = await client.get("/read_post_by_id", params={"post_id": i % 100 + 1})
+                response.raise_for_status()
+
+            # Warm-up: connections, statement caches and label children of both modes
+            for enabled in (False, True):
+                metrics.ENABLED = enabled
+                await run_concurrently(read, requests, concurrency)
+
+            throughput: dict[bool, list[float]] = {False: [], True: []}
+            for round_number in range(rounds):
+                # Alternate the order so drift and noise hit both modes evenly
+                for enabled in (False, True) if round_number % 2 == 0 else (True, False):
+                    metrics.ENABLED = enabled
+                    latencies, elapsed = await run_concurrently(read, requests, concurrency)
+                    report_latencies(f"metrics {'on' if enabled else 'off'}", latencies, elapsed)
+                    throughput[enabled].append(len(latencies) / elapsed)
+
+    off = statistics.median(throughput[False])
+    per_request = await middleware_cost() + query_timing_cost()
+    print(
+        f"instrumentation cost: {per_request * 1e6:.1f} us/request"
+        f" = {per_request * off * 100:.2f}% of the {1e6 / off:.0f} us per-request service time"
+    )
+
+    # One paired difference per round: off and on ran back to back
+    overheads = sorted((o - n) / o * 100 for o, n in zip(throughput[False], throughput[True]))
+    median = statistics.median(overheads)
+    verdict = "within noise" if overheads[0] <= 0 <= overheads[-1] else "outside noise"
+    print(
+        f"end-to-end throughput overhead over {rounds} paired rounds: median {median:.2f}%,"
+        f" range {overheads[0]:.2f}% .. {overheads[-1]:.2f}% ({verdict})"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=8)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.rounds, args.db_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Latency of `GET /read_posts_by_ids` compared with one `GET /read_post_by_id` per id.
+
+Usage: python -m benchmarks.multi_get_bench [--batch-sizes 1 10 100 300] [--rounds 20] [--db-url URL]
+"""
+from benchmarks.common import bench_client, report
+import argparse
+import asyncio
+import time
+
+
+async def run(batch_sizes: list[int], rounds: int, db_url: str | None) -> None:
+    async with bench_client(db_url) as client:
+        seeded: list[int] = []
+        for offset in range(0, max(batch_sizes), 500):
+            size = min(500, max(batch_sizes) - offset)
+            response = await client.post("/create_bulk", json=[{"text": f"post {i}"} for i in range(size)])
+            seeded.extend(item["id"] for item in response.json()["items"])
+
+        for size in batch_sizes:
+            ids = seeded[:size]
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for post_id in ids:
+                    response = await client.get("/read_post_by_id", params={"post_id": post_id})
+                    response.raise_for_status()
+            report(f"N x single read (n={size})", time.perf_counter() - start, rounds * size, "posts")
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                response = await client.get("/read_posts_by_ids", params={"ids": ids})
+                response.raise_for_status()
+            report(f"multi-get (n={size})", time.perf_counter() - start, rounds * size, "posts")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 300])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.batch_sizes, args.rounds, args.db_url))
+
+
+if __name__ == "__main__":
+    main()
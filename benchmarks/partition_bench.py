@@ -0,0 +1,126 @@
+"""
+Hash-partitioned `post` against a plain heap, on a multi-million-row dataset (PostgreSQL only).
+
+Seeds the same rows into `post`, partitioned by hash of user_id as in
+`db/models.py`, and into `post_plain`, an ordinary table with the same columns
+and indexes, then compares concurrent inserts, a user's feed page, updates by
+(id, user_id), and VACUUM of the plain heap against VACUUM of one partition.
+It also checks that a query on one user's posts only scans one partition.
+
+Usage: python -m benchmarks.partition_bench --db-url postgresql+asyncpg://... [--rows 2000000] [--users 20000] [--operations 5000] [--concurrency 32]
+"""
+from benchmarks.common import bench_sessions, report_latencies, run_concurrently
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy import text
+import argparse
+import asyncio
+import random
+import json
+import time
+
+PLAIN_TABLE_DDL: tuple[str, ...] = (
+    "CREATE TABLE post_plain (LIKE post INCLUDING DEFAULTS INCLUDING GENERATED)",
+    "ALTER TABLE post_plain ADD PRIMARY KEY (id)",
+    "CREATE INDEX ON post_plain (user_id)",
+    "CREATE INDEX ON post_plain (user_id, timestamp DESC, id DESC)",
+    "CREATE INDEX ON post_plain (timestamp DESC, id DESC)",
+    "CREATE INDEX ON post_plain (deleted_at) WHERE deleted_at IS NOT NULL",
+    "CREATE INDEX ON post_plain USING GIN (search_vector)",
+)
+FEED_QUERY = (
+    "SELECT id, text, user_id, timestamp FROM {table} WHERE user_id = :user_id AND deleted_at IS NULL "
+    "ORDER BY timestamp DESC, id DESC LIMIT 20"
+)
+
+
+async def execute(sessions: async_sessionmaker[AsyncSession], statement: str, **params: object) -> None:
+    async with sessions() as db:
+        await db.execute(text(statement), params)
+        await db.commit()
+
+
+async def seed(sessions: async_sessionmaker[AsyncSession], table: str, rows: int, users: int) -> None:
+    start = time.perf_counter()
+    for offset in range(0, rows, 500_000):
+        await execute(
+            sessions,
+            f"INSERT INTO {table} (text, user_id, timestamp) "
+            "SELECT 'seeded post ' || g, g % :users + 1, now() - g * interval '1 second' "
+            "FROM generate_series(:first, :last) AS g",
+            users=users, first=offset + 1, last=min(offset + 500_000, rows),
+        )
+    await execute(sessions, f"ANALYZE {table}")
+    print(f"{'seed ' + table:<32} {rows / (time.perf_counter() - start):10.1f} rows/s")
+
+
+async def vacuum(sessions: async_sessionmaker[AsyncSession], table: str) -> None:
+    engine = sessions.kw["bind"]
+    start = time.perf_counter()
+    async with engine.connect() as conn:
+        # VACUUM cannot run inside a transaction block
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"VACUUM (ANALYZE) {table}"))
+    print(f"{'vacuum ' + table:<32} {time.perf_counter() - start:10.3f} s")
+
+
+async def partitions_scanned(sessions: async_sessionmaker[AsyncSession], user_id: int) -> int:
+    async with sessions() as db:
+        plan = (await db.execute(text("EXPLAIN (FORMAT JSON) " + FEED_QUERY.format(table="post")), {"user_id": user_id})).scalar_one()
+    # One "Relation Name" per partition the plan reads
+    plan = plan if isinstance(plan, str) else json.dumps(plan)
+    return plan.count('"Relation Name": "post_p')
+
+
+async def compare(sessions: async_sessionmaker[AsyncSession], table: str, users: int, operations: int, concurrency: int) -> None:
+    async def insert(i: int) -> None:
+        await execute(sessions, f"INSERT INTO {table} (text, user_id) VALUES (:text, :user_id)", text=f"bench {i}", user_id=random.randint(1, users))
+
+    async def feed(i: int) -> None:
+        async with sessions() as db:
+            (await db.execute(text(FEED_QUERY.format(table=table)), {"user_id": random.randint(1, users)})).all()
+
+    async with sessions() as db:
+        keys = (await db.execute(text(f"SELECT id, user_id FROM {table} TABLESAMPLE SYSTEM (1) LIMIT :n"), {"n": operations})).all()
+
+    async def update(i: int) -> None:
+        post_id, user_id = keys[i % len(keys)]
+        await execute(sessions, f"UPDATE {table} SET version = version + 1 WHERE id = :id AND user_id = :user_id", id=post_id, user_id=user_id)
+
+    for name, operation in (("insert", insert), ("feed page", feed), ("update", update)):
+        latencies, elapsed = await run_concurrently(operation, operations, concurrency)
+        report_latencies(f"{name} {table}", latencies, elapsed)
+
+
+async def run(db_url: str, rows: int, users: int, operations: int, concurrency: int) -> None:
+    async with bench_sessions(db_url) as sessions:
+        try:
+            for ddl in PLAIN_TABLE_DDL:
+                await execute(sessions, ddl)
+            for table in ("post_plain", "post"):
+                await seed(sessions, table, rows, users)
+            print(f"partitions scanned by one user's feed: {await partitions_scanned(sessions, 1)}")
+            for table in ("post_plain", "post"):
+                await compare(sessions, table, users, operations, concurrency)
+            # The updates above left dead tuples behind in both
+            await vacuum(sessions, "post_plain")
+            await vacuum(sessions, "post_p00")
+        finally:
+            await execute(sessions, "DROP TABLE IF EXISTS post_plain")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db-url", required=True, help="throwaway PostgreSQL database")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    if make_url(args.db_url).get_backend_name() != "postgresql":
+        raise SystemExit("Partitioning is PostgreSQL-only, pass a postgresql+asyncpg:// URL.")
+    asyncio.run(run(args.db_url, args.rows, args.users, args.operations, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
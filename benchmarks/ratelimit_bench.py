@@ -0,0 +1,52 @@
+"""
+Overhead of the per-user rate limiter.
+
+Measures one bucket check on its own (memory, and Redis with `--redis-url`),
+then `POST /create` end to end with no limit configured and with a limit high
+enough that nothing is rejected, so the difference is the limiter's cost.
+
+Usage: python -m benchmarks.ratelimit_bench [--checks 100000] [--requests 2000] [--redis-url URL] [--db-url URL]
+"""
+from auth.ratelimit import MemoryBuckets, RateLimit, RateLimitBackend, RedisBuckets, rate_limit
+from benchmarks.common import bench_client, report
+import argparse
+import asyncio
+import time
+
+
+async def check_backend(name: str, backend: RateLimitBackend, checks: int) -> None:
+    limit = RateLimit(requests=checks * 2, seconds=1)
+    start = time.perf_counter()
+    for i in range(checks):
+        await backend.acquire(f"create:{i % 1000}", limit)
+    report(f"{name} acquire", time.perf_counter() - start, checks, "check")
+
+
+async def run(checks: int, requests: int, redis_url: str | None, db_url: str | None) -> None:
+    await check_backend("memory", MemoryBuckets(), checks)
+    if redis_url:
+        await check_backend("redis", RedisBuckets(redis_url), checks // 10)
+
+    async with bench_client(db_url) as client:
+        for name, limits in (("create, no limit", {}), ("create, limited", {"create": RateLimit(requests * 2, 1)})):
+            rate_limit.backend, rate_limit.limits = MemoryBuckets(), limits
+            start = time.perf_counter()
+            for i in range(requests):
+                response = await client.post("/create", json={"text": f"limited {i}"})
+                response.raise_for_status()
+            report(name, time.perf_counter() - start, requests, "req")
+    rate_limit.limits = {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--checks", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.checks, args.requests, args.redis_url, args.db_url))
+
+
+if __name__ == "__main__":
+    main()
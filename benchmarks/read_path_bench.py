@@ -0,0 +1,47 @@
+"""
+Side-by-side comparison of the ORM and Core read paths of `db_post.read_all_posts`.
+
+Reports rows/sec and traced allocation per page for each page size.
+
+Usage: python -m benchmarks.read_path_bench [--page-sizes 10 100 1000] [--pages 200] [--db-url URL]
+"""
+from benchmarks.common import bench_sessions, seed_posts
+from db import db_post
+import tracemalloc
+import argparse
+import asyncio
+import time
+
+
+async def run(page_sizes: list[int], pages: int, db_url: str | None) -> None:
+    async with bench_sessions(db_url) as sessions:
+        await seed_posts(sessions, max(page_sizes) + 1)
+        print(f"{'path':<6} {'page size':>10} {'rows/s':>14} {'alloc KiB/page':>16}")
+        for size in page_sizes:
+            for read_path in ("orm", "core"):
+                async with sessions() as db:
+                    await db_post.read_all_posts(size, None, db, read_path)  # warm-up
+
+                    start = time.perf_counter()
+                    for _ in range(pages):
+                        await db_post.read_all_posts(size, None, db, read_path)
+                    elapsed = time.perf_counter() - start
+
+                    tracemalloc.start()
+                    await db_post.read_all_posts(size, None, db, read_path)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                print(f"{read_path:<6} {size:>10} {pages * size / elapsed:>14.0f} {peak / 1024:>16.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.page_sizes, args.pages, args.db_url))
+
+
+if __name__ == "__main__":
+    main()
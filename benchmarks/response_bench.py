@@ -0,0 +1,47 @@
+"""
+Latency and throughput of `/read_all_posts` with FastAPI's default response
+handling and with the pydantic-core fast path (`POST_RESPONSE_CLASS=fast`).
+
+With `--cache` the page is served from the in-process post cache, which
+leaves serialization as the dominant cost.
+
+Usage: python -m benchmarks.response_bench [--limit 100] [--requests 2000] [--concurrency 16] [--cache] [--db-url URL]
+"""
+from benchmarks.common import app_client, bench_sessions, report_latencies, run_concurrently, seed_posts
+from db.cache import MemoryCache, post_cache
+from router import post
+import argparse
+import asyncio
+
+
+async def run(limit: int, requests: int, concurrency: int, cache: bool, db_url: str | None) -> None:
+    if cache:
+        post_cache.backend = MemoryCache()
+    async with bench_sessions(db_url) as sessions:
+        await seed_posts(sessions, limit + 1)
+        async with app_client(sessions) as client:
+
+            async def read_page(_: int) -> None:
+                response = await client.get("/read_all_posts", params={"limit": limit})
+                response.raise_for_status()
+
+            for fast in (False, True):
+                post.respond.fast = fast
+                await run_concurrently(read_page, concurrency, concurrency)  # warm-up
+                latencies, elapsed = await run_concurrently(read_page, requests, concurrency)
+                report_latencies(f"{'fast' if fast else 'default'} (limit={limit})", latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--cache", action="store_true")
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.limit, args.requests, args.concurrency, args.cache, args.db_url))
+
+
+if __name__ == "__main__":
+    main()
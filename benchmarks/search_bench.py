@@ -0,0 +1,75 @@
+"""
+Full-text search latency on a seeded table (one million posts by default).
+
+On PostgreSQL the rows are generated server-side with generate_series; on
+SQLite they are inserted in chunks, which takes a while for large sizes.
+
+Usage: python -m benchmarks.search_bench [--posts 1000000] [--queries 200] [--concurrency 8] [--db-url URL]
+"""
+from benchmarks.common import app_client, bench_sessions, report_latencies, run_concurrently
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import insert, text
+from db.models import DbPost
+import argparse
+import asyncio
+import random
+import time
+
+VOCABULARY = (
+    "cool video photo cat dog sunset beach coffee music concert city night train "
+    "mountain river garden pizza football game movie book rain snow travel friend"
+).split()
+QUERIES = ["cool", "video", "cat dog", "sunset beach", "coffee", '"music concert"', "train -night", "pizza or book"]
+
+
+async def seed(sessions: async_sessionmaker[AsyncSession], posts: int) -> None:
+    async with sessions() as db:
+        if db.bind.dialect.name == "postgresql":
+            words = ", ".join(f"'{word}'" for word in VOCABULARY)
+            await db.execute(text(
+                "INSERT INTO post (text, user_id, timestamp) "
+                f"SELECT array_to_string(ARRAY(SELECT (ARRAY[{words}])[1 + floor(random() * {len(VOCABULARY)})::int] "
+                "FROM generate_series(1, 8 + g % 3)), ' '), g % 10000, now() "
+                "FROM generate_series(1, :posts) AS g"
+            ), {"posts": posts})
+            await db.execute(text("ANALYZE post"))
+        else:
+            rng = random.Random(42)
+            for offset in range(0, posts, 10000):
+                rows = [
+                    {"text": " ".join(rng.choices(VOCABULARY, k=8 + i % 3)), "user_id": i % 10000}
+                    for i in range(offset, min(offset + 10000, posts))
+                ]
+                await db.execute(insert(DbPost), rows)
+        await db.commit()
+
+
+async def run(posts: int, queries: int, concurrency: int, db_url: str | None) -> None:
+    async with bench_sessions(db_url) as sessions:
+        start = time.perf_counter()
+        await seed(sessions, posts)
+        print(f"seeded {posts} posts in {time.perf_counter() - start:.1f}s")
+
+        async with app_client(sessions) as client:
+            for query in QUERIES:
+
+                async def search(_: int) -> None:
+                    response = await client.get("/search", params={"q": query, "limit": 20})
+                    response.raise_for_status()
+
+                latencies, elapsed = await run_concurrently(search, queries, concurrency)
+                report_latencies(f"search {query!r}", latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.posts, args.queries, args.concurrency, args.db_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Load-test suite for the Post API.
+
+Drives the app in-process through `httpx.ASGITransport` against SQLite
+(default) or a throwaway Postgres database (`--db-url`), runs every hot path
+under the requested concurrency and writes req/s, p50/p95/p99 and DB round
+trips per request as JSON. With `--baseline`, the run fails (exit code 1)
+when a scenario is slower than the baseline by more than `--threshold`.
+
+Usage:
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --baseline bench.json --threshold 0.15
+"""
+from benchmarks.common import app_client, bench_sessions, percentile
+from typing import Any, Awaitable, Callable
+from sqlalchemy.ext.asyncio import AsyncEngine
+from httpx import AsyncClient
+from sqlalchemy import event
+import argparse
+import asyncio
+import platform
+import json
+import time
+import sys
+
+SCENARIOS: tuple[str, ...] = ("create", "read_post_by_id", "read_all_posts", "update", "patch", "delete")
+
+
+class RoundTripCounter:
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.count = 0
+        event.listen(engine.sync_engine, "after_cursor_execute", self._increment)
+
+    def _increment(self, *args: Any) -> None:
+        self.count += 1
+
+
+async def measure(
+    operation: Callable[[int], Awaitable[Any]],
+    requests: int,
+    concurrency: int,
+    round_trips: RoundTripCounter,
+) -> dict[str, float]:
+    latencies: list[float] = []
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for i in counter:
+            start = time.perf_counter()
+            await operation(i)
+            latencies.append(time.perf_counter() - start)
+
+    queries_before = round_trips.count
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "req_per_s": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "db_round_trips_per_request": round((round_trips.count - queries_before) / requests, 3),
+    }
+
+
+async def check_call(request: Awaitable[Any]) -> None:
+    response = await request
+    response.raise_for_status()
+
+
+def operations(client: AsyncClient, ids: list[int], page_size: int) -> dict[str, Callable[[int], Awaitable[Any]]]:
+    async def create(i: int) -> None:
+        response = await client.post("/create", json={"text": f"benchmark post {i}"})
+        response.raise_for_status()
+        ids.append(response.json()["id"])
+
+    return {
+        "create": create,
+        "read_post_by_id": lambda i: check_call(client.get("/read_post_by_id", params={"post_id": ids[i % len(ids)]})),
+        "read_all_posts": lambda i: check_call(client.get("/read_all_posts", params={"limit": page_size})),
+        "update": lambda i: check_call(client.put("/update", params={"post_id": ids[i % len(ids)]}, json={"text": f"updated {i}"})),
+        "patch": lambda i: check_call(client.patch("/patch", params={"post_id": ids[i % len(ids)]}, json={"text": f"patched {i}"})),
+        "delete": lambda i: check_call(client.delete("/delete", params={"post_id": ids[i]})),
+    }
+
+
+async def run_suite(
+    requests: int,
+    concurrency: int,
+    page_size: int = 20,
+    scenarios: tuple[str, ...] = SCENARIOS,
+    db_url: str | None = None,
+) -> dict[str, Any]:
+    async with bench_sessions(db_url) as sessions:
+        engine: AsyncEngine = sessions.kw["bind"]
+        round_trips = RoundTripCounter(engine)
+        results: dict[str, Any] = {
+            "meta": {
+                "backend": engine.dialect.name,
+                "requests": requests,
+                "concurrency": concurrency,
+                "page_size": page_size,
+                "python": platform.python_version(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            },
+            "scenarios": {},
+        }
+        async with app_client(sessions) as client:
+            ids: list[int] = []
+            ops = operations(client, ids, page_size)
+            # Every scenario after "create" works on the posts it created, so it always runs first
+            for name in ("create", *(s for s in scenarios if s != "create")):
+                results["scenarios"][name] = await measure(ops[name], requests, concurrency, round_trips)
+        return results
+
+
+def check_regressions(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Returns one message per scenario whose throughput or p95 is worse than the baseline by more than `threshold`."""
+    failures: list[str] = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if current["req_per_s"] < previous["req_per_s"] * (1 - threshold):
+            failures.append(f"{name}: {current['req_per_s']} req/s < baseline {previous['req_per_s']} req/s")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            failures.append(f"{name}: p95 {current['p95_ms']} ms > baseline {previous['p95_ms']} ms")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--db-url", default=None, help="throwaway database, defaults to a scratch SQLite file")
+    parser.add_argument("--output", default=None, help="write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", default=None, help="JSON results of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        run_suite(args.requests, args.concurrency, args.page_size, tuple(args.scenarios), args.db_url)
+    )
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = check_regressions(results, json.load(f), args.threshold)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Throughput of the production server (`serve.py`) with one worker and with N.
+
+Each run starts `python serve.py` as a real HTTP server on localhost, waits for
+`/health`, and drives a read path from several client processes so the load
+generator is not the bottleneck. The server is stopped with SIGTERM, the same
+way a container runtime stops it.
+
+Usage: python -m benchmarks.workers_bench [--workers N] [--path read_post_by_id] [--requests 5000] [--concurrency 64] [--clients 4] [--db-url URL]
+"""
+from benchmarks.common import BENCH_USER_ID, bench_sessions, report_latencies, run_concurrently, seed_posts
+from concurrent.futures import ProcessPoolExecutor
+from jose import jwt
+import subprocess
+import argparse
+import asyncio
+import signal
+import socket
+import httpx
+import time
+import sys
+import os
+
+PATHS: dict[str, str] = {
+    "read_post_by_id": "/read_post_by_id?post_id={i}",
+    "read_all_posts": "/read_all_posts?limit=20",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen[bytes]:
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "UVICORN_HOST": "127.0.0.1", "UVICORN_PORT": str(port)}
+    server = subprocess.Popen([sys.executable, "serve.py"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise SystemExit(f"server with {workers} worker(s) did not become healthy")
+
+
+def stop_server(server: subprocess.Popen[bytes]) -> None:
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+def client_process(base_url: str, path: str, requests: int, concurrency: int, posts: int) -> tuple[list[float], float]:
+    token = jwt.encode({"sub": str(BENCH_USER_ID)}, os.environ["SECRET_KEY"], algorithm=os.environ["ALGORITHM"])
+
+    async def run() -> tuple[list[float], float]:
+        limits = httpx.Limits(max_connections=concurrency)
+        headers = {"Authorization": f"Bearer {token}"}
+        async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits) as client:
+            async def read(i: int) -> None:
+                response = await client.get(path.format(i=i % posts + 1))
+                response.raise_for_status()
+
+            return await run_concurrently(read, requests, concurrency)
+
+    return asyncio.run(run())
+
+
+def measure(workers: int, path: str, requests: int, concurrency: int, clients: int, posts: int) -> None:
+    port = free_port()
+    server = start_server(workers, port)
+    try:
+        with ProcessPoolExecutor(clients) as pool:
+            futures = [
+                pool.submit(client_process, f"http://127.0.0.1:{port}", path, requests // clients, concurrency // clients, posts)
+                for _ in range(clients)
+            ]
+            results = [f.result() for f in futures]
+    finally:
+        stop_server(server)
+    latencies = [latency for result, _ in results for latency in result]
+    report_latencies(f"{workers} worker(s)", latencies, max(elapsed for _, elapsed in results))
+
+
+async def run(args: argparse.Namespace) -> None:
+    async with bench_sessions(args.db_url) as sessions:
+        await seed_posts(sessions, args.posts)
+        print(f"{os.cpu_count()} CPU(s), GET {PATHS[args.path]}")
+        for workers in dict.fromkeys((1, args.workers)):
+            await asyncio.to_thread(
+                measure, workers, PATHS[args.path], args.requests, args.concurrency, args.clients, args.posts,
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="N, compared with a single worker")
+    parser.add_argument("--path", choices=PATHS, default="read_post_by_id")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=4, help="load-generating processes")
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+    if args.db_url:
+        os.environ["DATABASE_URL"] = args.db_url
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
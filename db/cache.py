@@ -0,0 +1,318 @@
+from schemas.schemas_post import Freshness, PaginatedPostDisplay, PostDisplay
+from collections import Counter, OrderedDict
+from typing import Protocol
+from dotenv import load_dotenv
+import logging
+import time
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+CACHE_BACKEND: str = os.getenv("POST_CACHE_BACKEND", "none").lower()
+CACHE_TTL: float = float(os.getenv("POST_CACHE_TTL", "30"))
+CACHE_MAX_ENTRIES: int = int(os.getenv("POST_CACHE_MAX_ENTRIES", "10000"))
+CACHE_LIST_MAX_LIMIT: int = int(os.getenv("POST_CACHE_LIST_MAX_LIMIT", "100"))
+REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+POST_KEY = "post:{post_id}"
+FRESHNESS_SUFFIX = ":etag"
+PAGE_PREFIX = "posts:page:"
+# /cache/stats breaks hits and misses down by these kinds of lookup, never by key
+KEY_KINDS = ("post", "etag", "page", "multi_get")
+# Bumped by every write, in the backend so that every worker sees it
+GENERATION_KEY = "posts:generation"
+# Session.info key set by db.replicas: "replica" reads never fill the cache, "sticky" reads
+# (on the primary, for a user who just wrote) never use it; missing means the primary
+READ_SOURCE_KEY = "read_source"
+
+# SET KEYS[1] only while the counter KEYS[2] still equals ARGV[3] (a missing counter reads as 0)
+SET_IF_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[3] then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------------
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> str | None: ...
+    async def get_many(self, keys: list[str]) -> list[str | None]: ...
+    async def set(self, key: str, value: str, ttl: float) -> None: ...
+    async def delete(self, *keys: str) -> None: ...
+    async def delete_prefix(self, prefix: str) -> None: ...
+    async def incr(self, key: str) -> int: ...
+    async def set_if(self, key: str, value: str, ttl: float, counter: str, expected: int) -> None: ...
+
+
+class NullCache:
+    """Backend used when caching is disabled: every lookup is a miss, counters still count."""
+
+    def __init__(self) -> None:
+        self._counters: dict[str, int] = {}
+
+    async def get(self, key: str) -> str | None:
+        counter = self._counters.get(key)
+        return str(counter) if counter is not None else None
+
+    async def get_many(self, keys: list[str]) -> list[str | None]:
+        return [None] * len(keys)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        return None
+
+    async def delete(self, *keys: str) -> None:
+        return None
+
+    async def delete_prefix(self, prefix: str) -> None:
+        return None
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def set_if(self, key: str, value: str, ttl: float, counter: str, expected: int) -> None:
+        return None
+
+
+class MemoryCache:
+    """
+    In-process LRU cache with a per-entry TTL.
+
+    Counters live outside the LRU so they are never evicted. Each worker has its
+    own copy: with several workers, writes in one are not seen by the others
+    until the entries expire, use the Redis backend there.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+
+    async def get(self, key: str) -> str | None:
+        if key in self._counters:
+            return str(self._counters[key])
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def get_many(self, keys: list[str]) -> list[str | None]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def set_if(self, key: str, value: str, ttl: float, counter: str, expected: int) -> None:
+        if self._counters.get(counter, 0) == expected:
+            await self.set(key, value, ttl)
+
+
+class RedisCache:
+    """Backend for any Redis-protocol server, shared by every worker."""
+
+    def __init__(self, url: str = REDIS_URL) -> None:
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError(
+                "CRITICAL: POST_CACHE_BACKEND=redis requires the 'redis' package."
+            ) from e
+        self._client = aioredis.Redis.from_url(url, decode_responses=True)
+        self._set_if = self._client.register_script(SET_IF_SCRIPT)
+
+    async def get(self, key: str) -> str | None:
+        return await self._client.get(key)
+
+    async def get_many(self, keys: list[str]) -> list[str | None]:
+        return await self._client.mget(keys) if keys else []
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._client.set(key, value, px=int(ttl * 1000))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._client.delete(*keys)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        keys = [key async for key in self._client.scan_iter(match=f"{prefix}*")]
+        if keys:
+            await self._client.delete(*keys)
+
+    async def incr(self, key: str) -> int:
+        return await self._client.incr(key)
+
+    async def set_if(self, key: str, value: str, ttl: float, counter: str, expected: int) -> None:
+        # Compare and set in one step: a write between the two cannot slip through
+        await self._set_if(keys=[key, counter], args=[value, int(ttl * 1000), str(expected)])
+
+
+def build_backend(name: str = CACHE_BACKEND) -> CacheBackend:
+    if name == "memory":
+        return MemoryCache()
+    if name == "redis":
+        return RedisCache()
+    if name != "none":
+        logger.warning(f"Unknown POST_CACHE_BACKEND '{name}', caching disabled.")
+    return NullCache()
+
+
+# ------------------------------------------------------------------------------------
+
+
+class PostCache:
+    """
+    Read-through cache for single posts and first pages of the post list.
+
+    Writers call `invalidate` after their commit. Every invalidation bumps a
+    generation counter kept in the backend, and a reader only stores what it
+    loaded if no write happened while its query was running (the backend
+    compares and sets in one step), so a slow reader in any worker cannot put
+    an outdated row back into the cache.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = CACHE_TTL) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return not isinstance(self.backend, NullCache)
+
+    def _count(self, kind: str, hit: bool) -> None:
+        if not self.enabled:
+            return
+        if hit:
+            self.hits[kind] += 1
+        else:
+            self.misses[kind] += 1
+
+    async def _get(self, key: str) -> str | None:
+        value = await self.backend.get(key)
+        self._count(_key_kind(key), value is not None)
+        return value
+
+    async def _set(self, key: str, value: str, generation: int | None) -> None:
+        # None: what was read must not be cached at all
+        if generation is not None and self.enabled:
+            await self.backend.set_if(key, value, self.ttl, GENERATION_KEY, generation)
+
+    async def current_generation(self) -> int:
+        """Read before the query whose result may be cached, and passed back to the setters."""
+        value = await self.backend.get(GENERATION_KEY)
+        return int(value) if value is not None else 0
+
+    # --------------------------------------------------------------------------
+
+    async def get_post(self, post_id: int) -> PostDisplay | None:
+        value = await self._get(POST_KEY.format(post_id=post_id))
+        return PostDisplay.model_validate_json(value) if value is not None else None
+
+    async def set_post(self, post: PostDisplay, generation: int | None) -> None:
+        await self._set(POST_KEY.format(post_id=post.id), post.model_dump_json(), generation)
+
+    async def get_posts(self, post_ids: list[int]) -> dict[int, PostDisplay]:
+        keys = [POST_KEY.format(post_id=post_id) for post_id in post_ids]
+        found: dict[int, PostDisplay] = {}
+        for post_id, value in zip(post_ids, await self.backend.get_many(keys)):
+            self._count("multi_get", value is not None)
+            if value is not None:
+                found[post_id] = PostDisplay.model_validate_json(value)
+        return found
+
+    async def get_freshness(self, key: str) -> Freshness | None:
+        """Validators stored next to a post or page key; found without loading the body."""
+        value = await self._get(key + FRESHNESS_SUFFIX)
+        return Freshness.model_validate_json(value) if value is not None else None
+
+    async def _get_with_freshness(self, key: str) -> tuple[str, Freshness] | None:
+        value, freshness = await self.backend.get_many([key, key + FRESHNESS_SUFFIX])
+        # Multi-get caches posts without validators: only both together are a hit
+        if value is None or freshness is None:
+            self._count(_key_kind(key), False)
+            return None
+        self._count(_key_kind(key), True)
+        return value, Freshness.model_validate_json(freshness)
+
+    async def get_post_with_freshness(self, post_id: int) -> tuple[PostDisplay, Freshness] | None:
+        found = await self._get_with_freshness(POST_KEY.format(post_id=post_id))
+        return (PostDisplay.model_validate_json(found[0]), found[1]) if found is not None else None
+
+    async def get_page_with_freshness(self, key: str) -> tuple[PaginatedPostDisplay, Freshness] | None:
+        found = await self._get_with_freshness(key)
+        return (PaginatedPostDisplay.model_validate_json(found[0]), found[1]) if found is not None else None
+
+    async def set_freshness(self, key: str, freshness: Freshness, generation: int | None) -> None:
+        await self._set(key + FRESHNESS_SUFFIX, freshness.model_dump_json(), generation)
+
+    def page_key(self, limit: int, last_id: int | None) -> str | None:
+        """Only the first page of each page size is cached."""
+        if last_id or limit > CACHE_LIST_MAX_LIMIT:
+            return None
+        return f"{PAGE_PREFIX}{limit}"
+
+    async def get_page(self, key: str) -> PaginatedPostDisplay | None:
+        value = await self._get(key)
+        return PaginatedPostDisplay.model_validate_json(value) if value is not None else None
+
+    async def set_page(self, key: str, page: PaginatedPostDisplay, generation: int | None) -> None:
+        await self._set(key, page.model_dump_json(), generation)
+
+    async def invalidate(self, post_id: int | None = None) -> None:
+        await self.backend.incr(GENERATION_KEY)
+        if post_id is not None:
+            key = POST_KEY.format(post_id=post_id)
+            await self.backend.delete(key, key + FRESHNESS_SUFFIX)
+        await self.backend.delete_prefix(PAGE_PREFIX)
+
+    # --------------------------------------------------------------------------
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        stats = {kind: _ratio(self.hits[kind], self.misses[kind]) for kind in KEY_KINDS}
+        stats["total"] = _ratio(self.hits.total(), self.misses.total())
+        return stats
+
+    def reset_stats(self) -> None:
+        self.hits.clear()
+        self.misses.clear()
+
+
+def _key_kind(key: str) -> str:
+    if key.endswith(FRESHNESS_SUFFIX):
+        return "etag"
+    return "page" if key.startswith(PAGE_PREFIX) else "post"
+
+
+def _ratio(hits: int, misses: int) -> dict[str, int | float]:
+    lookups = hits + misses
+    return {"hits": hits, "misses": misses, "hit_ratio": hits / lookups if lookups else 0.0}
+
+
+post_cache = PostCache(build_backend())
@@ -1,10 +1,16 @@
 import os
+import time
+import uuid
 import logging
+from typing import Any
 from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.asyncio.engine import AsyncEngine
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.engine import make_url
+from monitoring.metrics import instrument_engine
 from sqlalchemy import MetaData
 
 # ------------------------------------------------------------------------------------
@@ -33,16 +39,100 @@ DATABASE_URL: str | None = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("CRITICAL: DATABASE_URL environment variable is required.")
 
+
+def env_bool(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+def env_float(name: str) -> float | None:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING: bool = env_bool("DB_POOL_PRE_PING")
+# asyncpg only
+DB_COMMAND_TIMEOUT: float | None = env_float("DB_COMMAND_TIMEOUT")
+DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_PREPARED_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100"))
+# PgBouncer in transaction mode cannot keep named prepared statements between transactions
+DB_PGBOUNCER: bool = env_bool("DB_PGBOUNCER")
+
 # ------------------------------------------------------------------------------------
 
-engine: AsyncEngine = create_async_engine(
-    DATABASE_URL,
-    max_overflow=10,
-    pool_size=10,
-    pool_timeout=30,
-    pool_recycle=1800, 
-    echo=False,
-)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that also records how many callers wait for a connection and for how long."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.waiters = 0
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+
+    def _do_get(self) -> Any:
+        self.waiters += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            self.waiters -= 1
+            self.checkouts += 1
+            self.checkout_wait_total += waited
+            self.checkout_wait_max = max(self.checkout_wait_max, waited)
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "waiters": self.waiters,
+            "checkouts": self.checkouts,
+            "checkout_wait_seconds_total": self.checkout_wait_total,
+            "checkout_wait_seconds_max": self.checkout_wait_max,
+        }
+
+
+def asyncpg_connect_args() -> dict[str, Any]:
+    connect_args: dict[str, Any] = {
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+    if DB_COMMAND_TIMEOUT is not None:
+        connect_args["command_timeout"] = DB_COMMAND_TIMEOUT
+    if DB_PGBOUNCER:
+        # No statement caches, and unique names so two backends never see the same statement
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    return connect_args
+
+
+def create_engine_from_env(url: str, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW) -> AsyncEngine:
+    options: dict[str, Any] = {
+        "poolclass": InstrumentedPool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "echo": False,
+    }
+    if make_url(url).drivername == "postgresql+asyncpg":
+        options["connect_args"] = asyncpg_connect_args()
+    return create_async_engine(url, **options)
+
+
+# ------------------------------------------------------------------------------------
+
+engine: AsyncEngine = create_engine_from_env(DATABASE_URL)
+instrument_engine(engine)
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -52,6 +142,12 @@ AsyncSessionLocal = async_sessionmaker(
 
 # ------------------------------------------------------------------------------------
 
+def pool_stats(target: AsyncEngine | None = None) -> dict[str, int | float]:
+    pool = (target or engine).pool
+    return pool.stats() if isinstance(pool, InstrumentedPool) else {}
+
+# ------------------------------------------------------------------------------------
+
 async def get_async_db():
     async with AsyncSessionLocal() as db:
         try:
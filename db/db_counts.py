@@ -0,0 +1,118 @@
+from schemas.schemas_post import CounterDrift
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from db.models import DbPost, DbUserPostCount
+from sqlalchemy import func, select, text, update
+
+# The partitioned parent has no rows of its own (reltuples -1), its partitions do.
+# -1 while any partition is still unanalyzed; a plain table has no partitions.
+ESTIMATE_QUERY = text("""
+    SELECT CASE
+        WHEN count(part.oid) = 0 THEN (SELECT reltuples FROM pg_class WHERE oid = 'post'::regclass)
+        WHEN min(part.reltuples) < 0 THEN -1
+        ELSE sum(part.reltuples)
+    END::bigint
+    FROM pg_inherits JOIN pg_class part ON part.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = 'post'::regclass
+""")
+
+
+async def increment(
+    user_id: int,
+    delta: int,
+    db: AsyncSession,
+) -> None:
+    """Adds `delta` to the user's counter inside the caller's transaction (no commit)."""
+    if not delta:
+        return None
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    query = insert(DbUserPostCount).values(user_id=user_id, post_count=delta)
+    query = query.on_conflict_do_update(
+        index_elements=[DbUserPostCount.user_id],
+        set_={"post_count": DbUserPostCount.post_count + query.excluded.post_count},
+    )
+    await db.execute(query)
+    return None
+
+
+# --------------------------------------------------------------------------
+
+
+async def read_user_count(
+    user_id: int,
+    db: AsyncSession,
+) -> int:
+    count = await db.scalar(
+        select(DbUserPostCount.post_count).where(DbUserPostCount.user_id == user_id)
+    )
+    return count or 0
+
+
+async def approximate_total(
+    db: AsyncSession,
+) -> int:
+    """
+    Cheap estimate of the number of posts.
+
+    PostgreSQL keeps a row estimate per table in pg_class that vacuum and analyze
+    refresh, summed over the partitions of `post`; it is -1 until they have all
+    been analyzed once, and other backends have no such statistic, so the
+    fallback is the sum of the per-user counters.
+    """
+    if db.bind.dialect.name == "postgresql":
+        estimate = await db.scalar(ESTIMATE_QUERY)
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    total = await db.scalar(select(func.coalesce(func.sum(DbUserPostCount.post_count), 0)))
+    return int(total)
+
+
+# --------------------------------------------------------------------------
+
+
+async def find_drift(
+    db: AsyncSession,
+) -> list[CounterDrift]:
+    actual = dict((await db.execute(
+        select(DbPost.user_id, func.count())
+        .where(DbPost.deleted_at.is_(None))
+        .group_by(DbPost.user_id)
+    )).all())
+    stored = dict((await db.execute(
+        select(DbUserPostCount.user_id, DbUserPostCount.post_count)
+    )).all())
+    return [
+        CounterDrift(user_id=user_id, stored=stored.get(user_id, 0), actual=actual.get(user_id, 0))
+        for user_id in sorted(actual.keys() | stored.keys())
+        if stored.get(user_id, 0) != actual.get(user_id, 0)
+    ]
+
+
+async def repair(
+    user_id: int,
+    db: AsyncSession,
+) -> int:
+    """
+    Recounts one user's posts and stores the result.
+
+    The counter row is created if missing and locked before the recount, so a
+    create or delete of that user waits for the repair instead of applying its
+    delta to a value about to be replaced. FOR UPDATE alone locks nothing when
+    the row does not exist yet, and a concurrent first increment would be lost.
+    """
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    await db.execute(
+        insert(DbUserPostCount)
+        .values(user_id=user_id, post_count=0)
+        .on_conflict_do_nothing(index_elements=[DbUserPostCount.user_id])
+    )
+    await db.execute(
+        select(DbUserPostCount).where(DbUserPostCount.user_id == user_id).with_for_update()
+    )
+    actual = await db.scalar(select(func.count()).where(DbPost.user_id == user_id, DbPost.deleted_at.is_(None))) or 0
+    await db.execute(
+        update(DbUserPostCount).where(DbUserPostCount.user_id == user_id).values(post_count=actual)
+    )
+    await db.commit()
+    return actual
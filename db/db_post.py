@@ -1,38 +1,306 @@
 from schemas.schemas_post import (
     PaginatedPostDisplay,
+    FeedPostDisplay,
+    FeedPost,
+    SearchPostDisplay,
+    SearchPost,
+    MultiPostDisplay,
     PostDisplay,
     PostModel,
     PostPatchModel,
     ReadAllPost,
+    Freshness,
 )
-from sqlalchemy import select, update as sql_update, delete as sql_delete
+from sqlalchemy import Integer, Select, any_, bindparam, insert, select, tuple_, update as sql_update, delete as sql_delete
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio.session import AsyncSession
+from db.pagination import decode_cursor, decode_search_cursor, encode_cursor, encode_search_cursor
+from db.search import fts5_query, search_query
 from fastapi import HTTPException, status
+from typing import Any, AsyncIterator, Literal, Sequence
+from datetime import datetime, timezone
+from collections import Counter
+from db.singleflight import post_reads
+from db.cache import POST_KEY, READ_SOURCE_KEY, post_cache
+from db import db_counts, outbox
+from dotenv import load_dotenv
 from db.models import DbPost
+import hashlib
+import csv
+import io
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+# "core" selects plain columns and builds the schemas directly, "orm" hydrates DbPost first
+READ_PATH: str = os.getenv("POST_READ_PATH", "core").lower()
+# "soft" stamps deleted_at and leaves the row to db.purge, "hard" deletes it in the request
+DELETE_MODE: str = os.getenv("POST_DELETE_MODE", "soft").lower()
+
+# ------------------------------------------------------------------------------------
+
+
+async def _finish(
+    db: AsyncSession,
+    commit: bool,
+    post_id: int | None = None,
+) -> None:
+    """
+    Ends a write. With `commit=False` the changes are only flushed: the caller
+    commits them together with its own rows (see `idempotency.run_once`), then
+    calls `after_commit`.
+    """
+    if not commit:
+        await db.flush()
+        return None
+    await db.commit()
+    await after_commit(post_id)
+    return None
+
+
+async def after_commit(post_id: int | None = None) -> None:
+    """Drops the cached copies of what a committed write changed, and wakes the outbox relay."""
+    await post_cache.invalidate(post_id)
+    outbox.notifier.notify()
+    return None
+
+
+# --------------------------------------------------------------------------
 
 
 async def create(
     request: PostModel,
     db: AsyncSession,
     current_user_id: int,
+    commit: bool = True,
 ) -> PostDisplay:
     new_post = DbPost(text=request.text, user_id=current_user_id)
     db.add(new_post)
-    await db.commit()
-    return PostDisplay.model_validate(new_post)
+    await db.flush()
+    post = PostDisplay.model_validate(new_post)
+    await db_counts.increment(current_user_id, 1, db)
+    await outbox.record("created", [post], db)
+    await _finish(db, commit)
+    return post
 
 
 # --------------------------------------------------------------------------
 
 
+async def create_bulk(
+    requests: list[PostModel],
+    db: AsyncSession,
+    current_user_id: int,
+    commit: bool = True,
+) -> list[PostDisplay]:
+    return await insert_posts([(r.text, current_user_id) for r in requests], db, commit)
+
+
+async def insert_posts(
+    rows: Sequence[tuple[str, int]],
+    db: AsyncSession,
+    commit: bool = True,
+) -> list[PostDisplay]:
+    """Inserts (text, user_id) rows with one statement and one commit; posts come back in row order."""
+    if not rows:
+        return []
+    # A single multi-row INSERT ... RETURNING, rows come back in request order
+    query = insert(DbPost).returning(
+        DbPost.id, DbPost.text, DbPost.user_id, sort_by_parameter_order=True
+    )
+    result = await db.execute(
+        query, [{"text": text, "user_id": user_id} for text, user_id in rows]
+    )
+    posts = [PostDisplay.model_validate(row._mapping) for row in result.all()]
+    # In user_id order, so two batches touching the same counters cannot deadlock
+    for user_id, count in sorted(Counter(post.user_id for post in posts).items()):
+        await db_counts.increment(user_id, count, db)
+    await outbox.record("created", posts, db)
+    await _finish(db, commit)
+    return posts
+
+
+# --------------------------------------------------------------------------
+
+
+def post_freshness(post_id: int, version: int, updated_at: datetime) -> Freshness:
+    return Freshness(etag=f'"{post_id}.{version}"', last_modified=_as_utc(updated_at))
+
+
+def _strong_etag(*parts: Any) -> str:
+    return f'"{hashlib.sha256(repr(parts).encode()).hexdigest()[:32]}"'
+
+
+def page_freshness(rows: Sequence[Any], *extra: Any) -> Freshness:
+    """
+    Validators of a page: the ETag changes whenever a post joins, leaves or is edited.
+
+    No Last-Modified: the newest updated_at among the rows goes backwards when
+    the newest post is deleted, which would answer 304 to a stale copy.
+    """
+    return Freshness(etag=_strong_etag([(row.id, row.version) for row in rows], *extra), last_modified=None)
+
+
+def _columns(lean: bool) -> tuple[Any, ...]:
+    return (DbPost.id, DbPost.text, DbPost.user_id, DbPost.version, DbPost.updated_at) if lean else (DbPost,)
+
+
+def post_query(post_id: int, lean: bool) -> Select:
+    return select(*_columns(lean)).where(DbPost.id == post_id, DbPost.deleted_at.is_(None))
+
+
+def freshness_query(post_id: int) -> Select:
+    return select(DbPost.version, DbPost.updated_at).where(DbPost.id == post_id, DbPost.deleted_at.is_(None))
+
+
+def page_query(limit: int, last_id: int | None, lean: bool) -> Select:
+    query = (
+        select(*_columns(lean))
+        .where(DbPost.deleted_at.is_(None))
+        .order_by(DbPost.id.desc())
+        .limit(limit + 1)
+    )
+    if last_id:
+        query = query.where(DbPost.id < last_id)
+    return query
+
+
+def warmup_queries(read_path: str | None = None) -> list[Select]:
+    """
+    The hot read statements, with throwaway parameters: running them once per
+    connection compiles them in SQLAlchemy's cache and prepares them in the
+    driver's statement cache before the first request needs them.
+    """
+    lean = (read_path or READ_PATH) == "core"
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return [
+        post_query(0, lean),
+        freshness_query(0),
+        page_query(1, None, lean),
+        page_query(1, 1, lean),
+        feed_query(1),
+        feed_query(1, user_id=0),
+        feed_query(1, after=(epoch, 0)),
+        feed_query(1, after=(epoch, 0), user_id=0),
+    ]
+
+
+def _read_source(db: AsyncSession) -> str:
+    return db.info.get(READ_SOURCE_KEY, "primary")
+
+
+async def _cache_generation(source: str) -> int | None:
+    """
+    Generation to store the result under, None when it must not be cached: a
+    lagging replica can return a row older than the last invalidation.
+    """
+    return None if source == "replica" else await post_cache.current_generation()
+
+
 async def read_post_by_id(
     post_id: int,
     db: AsyncSession,
+    read_path: str | None = None,
 ) -> PostDisplay:
-    query = select(DbPost).where(DbPost.id == post_id)
-    result = await db.execute(query)
-    post = result.scalar_one_or_none()
-    return PostDisplay.model_validate(post)
+    post, _ = await read_versioned_post(post_id, db, read_path)
+    return post
+
+
+async def read_versioned_post(
+    post_id: int,
+    db: AsyncSession,
+    read_path: str | None = None,
+) -> tuple[PostDisplay, Freshness]:
+    path = read_path or READ_PATH
+    source = _read_source(db)
+    if source == "sticky":
+        # Read-your-writes: straight to the primary, neither a cached nor a shared read
+        return await _load_post(post_id, db, path, await post_cache.current_generation())
+    cached = await post_cache.get_post_with_freshness(post_id)
+    if cached is not None:
+        return cached
+    generation = await post_cache.current_generation()
+    # The cache generation changes on every write, so a read never joins one that started before it
+    return await post_reads.do(
+        "read_post_by_id", (post_id, path, source, generation),
+        lambda: _load_post(post_id, db, path, None if source == "replica" else generation),
+    )
+
+
+async def _load_post(
+    post_id: int,
+    db: AsyncSession,
+    read_path: str,
+    generation: int | None,
+) -> tuple[PostDisplay, Freshness]:
+    lean = read_path == "core"
+    result = await db.execute(post_query(post_id, lean))
+    post = result.one_or_none() if lean else result.scalar_one_or_none()
+    if not post:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
+        )
+    display = (
+        PostDisplay.model_construct(id=post.id, text=post.text, user_id=post.user_id)
+        if lean else PostDisplay.model_validate(post)
+    )
+    freshness = post_freshness(post.id, post.version, post.updated_at)
+    await post_cache.set_post(display, generation)
+    await post_cache.set_freshness(POST_KEY.format(post_id=post_id), freshness, generation)
+    return display, freshness
+
+
+async def read_post_freshness(
+    post_id: int,
+    db: AsyncSession,
+) -> Freshness:
+    """The post's validators alone: from the cache, else a primary key lookup that skips the text."""
+    source = _read_source(db)
+    freshness = await post_cache.get_freshness(POST_KEY.format(post_id=post_id)) if source != "sticky" else None
+    if freshness is not None:
+        return freshness
+    generation = await _cache_generation(source)
+    row = (await db.execute(freshness_query(post_id))).one_or_none()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
+        )
+    freshness = post_freshness(post_id, row.version, row.updated_at)
+    await post_cache.set_freshness(POST_KEY.format(post_id=post_id), freshness, generation)
+    return freshness
+
+
+# --------------------------------------------------------------------------
+
+
+async def read_posts_by_ids(
+    post_ids: list[int],
+    db: AsyncSession,
+) -> MultiPostDisplay:
+    unique_ids = list(dict.fromkeys(post_ids))
+    source = _read_source(db)
+    found = await post_cache.get_posts(unique_ids) if source != "sticky" else {}
+    generation = await _cache_generation(source)
+
+    wanted = [post_id for post_id in unique_ids if post_id not in found]
+    if wanted:
+        if db.bind.dialect.name == "postgresql":
+            # A single array parameter keeps the statement text (and its prepared plan) stable
+            condition = DbPost.id == any_(bindparam("ids", wanted, type_=ARRAY(Integer)))
+        else:
+            condition = DbPost.id.in_(wanted)
+        query = select(DbPost.id, DbPost.text, DbPost.user_id).where(condition, DbPost.deleted_at.is_(None))
+        result = await db.execute(query)
+        for row in result.all():
+            post = PostDisplay.model_construct(**row._mapping)
+            found[post.id] = post
+            await post_cache.set_post(post, generation)
+
+    return MultiPostDisplay(
+        items=[found.get(post_id) for post_id in post_ids],
+        missing=[post_id for post_id in unique_ids if post_id not in found],
+    )
 
 
 # --------------------------------------------------------------------------
@@ -42,51 +310,270 @@ async def read_all_posts(
     limit: int,
     last_id: int | None,
     db: AsyncSession,
+    read_path: str | None = None,
+    include_total: bool = False,
 ) -> PaginatedPostDisplay:
-    
-    query = select(DbPost).order_by(DbPost.id.desc()).limit(limit + 1)
-    if last_id:
-        query = query.where(DbPost.id < last_id)
-    result = await db.execute(query)
-    post = result.scalars().all()
+    page, _ = await read_versioned_page(limit, last_id, db, read_path, include_total)
+    return page
+
+
+async def read_versioned_page(
+    limit: int,
+    last_id: int | None,
+    db: AsyncSession,
+    read_path: str | None = None,
+    include_total: bool = False,
+) -> tuple[PaginatedPostDisplay, Freshness]:
+    path = read_path or READ_PATH
+    source = _read_source(db)
+    cache_key = post_cache.page_key(limit, last_id)
+    cached = await post_cache.get_page_with_freshness(cache_key) if cache_key and source != "sticky" else None
+    if cached is not None:
+        page, freshness = cached
+    elif source == "sticky":
+        page, freshness = await _read_page(limit, last_id, db, path, cache_key, await post_cache.current_generation())
+    else:
+        generation = await post_cache.current_generation()
+        page, freshness = await post_reads.do(
+            "read_all_posts", (limit, last_id, path, source, generation),
+            lambda: _read_page(limit, last_id, db, path, cache_key, None if source == "replica" else generation),
+        )
+    if include_total:
+        total = await db_counts.approximate_total(db)
+        page = page.model_copy(update={"approximate_total": total})
+        freshness = freshness.model_copy(update={"etag": _strong_etag(freshness.etag, total)})
+    return page, freshness
+
+
+async def _read_page(
+    limit: int,
+    last_id: int | None,
+    db: AsyncSession,
+    read_path: str,
+    cache_key: str | None,
+    generation: int | None,
+) -> tuple[PaginatedPostDisplay, Freshness]:
+    # The lean path selects plain columns and builds the schema without a second validation
+    lean = read_path == "core"
+    result = await db.execute(page_query(limit, last_id, lean))
+    post = result.all() if lean else result.scalars().all()
 
     items = post[:limit]
     next_cursor: int | None = items[-1].id if items else None
     has_more: bool = len(post) > limit
 
-    return PaginatedPostDisplay(
-        items=[ReadAllPost.model_validate(p) for p in items],
+    page = PaginatedPostDisplay(
+        items=[
+            ReadAllPost.model_construct(id=p.id, text=p.text, user_id=p.user_id) if lean else ReadAllPost.model_validate(p)
+            for p in items
+        ],
         next_cursor=next_cursor if has_more else None,
         has_more=has_more,
     )
+    freshness = page_freshness(items, page.next_cursor, has_more)
+    if cache_key:
+        await post_cache.set_page(cache_key, page, generation)
+        await post_cache.set_freshness(cache_key, freshness, generation)
+    return page, freshness
+
+
+# --------------------------------------------------------------------------
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def feed_query(
+    limit: int,
+    after: tuple[datetime, int] | None = None,
+    user_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> Select:
+    """
+    Page query in (timestamp, id) descending order.
+
+    Matches `ix_post_user_id_timestamp_id` when `user_id` is given and
+    `ix_post_timestamp_id` otherwise, so pages never sort or scan the table.
+    """
+    query = (
+        select(DbPost)
+        .where(DbPost.deleted_at.is_(None))
+        .order_by(DbPost.timestamp.desc(), DbPost.id.desc())
+        .limit(limit + 1)
+    )
+    if user_id is not None:
+        query = query.where(DbPost.user_id == user_id)
+    if since is not None:
+        query = query.where(DbPost.timestamp >= _as_utc(since))
+    if until is not None:
+        query = query.where(DbPost.timestamp < _as_utc(until))
+    if after is not None:
+        query = query.where(tuple_(DbPost.timestamp, DbPost.id) < tuple_(_as_utc(after[0]), after[1]))
+    return query
+
+
+async def read_posts(
+    limit: int,
+    cursor: str | None,
+    user_id: int | None,
+    since: datetime | None,
+    until: datetime | None,
+    db: AsyncSession,
+) -> FeedPostDisplay:
+    after = decode_cursor(cursor) if cursor else None
+    result = await db.execute(feed_query(limit, after, user_id, since, until))
+    post = result.scalars().all()
+
+    items = post[:limit]
+    has_more: bool = len(post) > limit
+    next_cursor: str | None = None
+    if has_more:
+        next_cursor = encode_cursor(items[-1].timestamp, items[-1].id)
+
+    return FeedPostDisplay(
+        items=[FeedPost.model_validate(p) for p in items],
+        next_cursor=next_cursor,
+        has_more=has_more,
+    )
+
+
+# --------------------------------------------------------------------------
+
+
+async def search_posts(
+    terms: str,
+    limit: int,
+    cursor: str | None,
+    db: AsyncSession,
+) -> SearchPostDisplay:
+    if not fts5_query(terms):
+        # Nothing searchable left (only punctuation): no match on any backend
+        return SearchPostDisplay(items=[], next_cursor=None, has_more=False)
+
+    after = decode_search_cursor(cursor) if cursor else None
+    result = await db.execute(search_query(db.bind.dialect.name, terms, limit, after))
+    post = result.all()
+
+    items = post[:limit]
+    has_more: bool = len(post) > limit
+    next_cursor: str | None = None
+    if has_more:
+        next_cursor = encode_search_cursor(items[-1].rank, items[-1].id)
+
+    return SearchPostDisplay(
+        items=[SearchPost.model_construct(**p._mapping) for p in items],
+        next_cursor=next_cursor,
+        has_more=has_more,
+    )
 
 
 # --------------------------------------------------------------------------
 
 
+async def export_posts(
+    export_format: Literal["ndjson", "csv"],
+    user_id: int | None,
+    min_id: int | None,
+    max_id: int | None,
+    fetch_size: int,
+    db: AsyncSession,
+) -> AsyncIterator[bytes]:
+    """
+    Yields the matching posts in id order, one chunk per `fetch_size` rows.
+
+    Rows are read through a server-side cursor as plain tuples (no ORM identity
+    map), so memory use depends on `fetch_size` and not on the table size.
+    """
+    query = (
+        select(DbPost.id, DbPost.text, DbPost.user_id, DbPost.timestamp)
+        .where(DbPost.deleted_at.is_(None))
+        .order_by(DbPost.id)
+        .execution_options(yield_per=fetch_size)
+    )
+    if user_id is not None:
+        query = query.where(DbPost.user_id == user_id)
+    if min_id is not None:
+        query = query.where(DbPost.id >= min_id)
+    if max_id is not None:
+        query = query.where(DbPost.id <= max_id)
+
+    if export_format == "csv":
+        yield b"id,text,user_id,timestamp\r\n"
+
+    result = await db.stream(query)
+    async for rows in result.partitions():
+        if export_format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(
+                (row.id, row.text, row.user_id, row.timestamp.isoformat()) for row in rows
+            )
+            yield buffer.getvalue().encode()
+        else:
+            yield b"".join(
+                FeedPost.model_validate(row._mapping).model_dump_json().encode() + b"\n"
+                for row in rows
+            )
+
+
+# --------------------------------------------------------------------------
+
+
+def _write_conditions(post_id: int, current_user_id: int, expected_versions: list[int] | None) -> list[Any]:
+    conditions = [DbPost.id == post_id, DbPost.user_id == current_user_id, DbPost.deleted_at.is_(None)]
+    if expected_versions is not None:
+        # Compare-and-set: a writer holding an outdated ETag matches no row
+        conditions.append(DbPost.version.in_(expected_versions))
+    return conditions
+
+
+async def _raise_missing_or_modified(
+    post_id: int,
+    current_user_id: int,
+    expected_versions: list[int] | None,
+    db: AsyncSession,
+    detail: str,
+) -> None:
+    if expected_versions is not None:
+        exists = await db.scalar(select(DbPost.id).where(*_write_conditions(post_id, current_user_id, None)))
+        if exists is not None:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="The post was modified since it was read, fetch it again.",
+            )
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail=detail
+    )
+
+
 async def update(
     post_id: int,
     request: PostModel,
     db: AsyncSession,
     current_user_id: int,
+    expected_versions: list[int] | None = None,
+    commit: bool = True,
 ) -> PostDisplay:
     query = (
         sql_update(DbPost)
-        .where(DbPost.id == post_id, DbPost.user_id == current_user_id)
+        .where(*_write_conditions(post_id, current_user_id, expected_versions))
         .values(
             text=request.text,
+            version=DbPost.version + 1,
+            updated_at=datetime.now(timezone.utc),
         )
         .returning(DbPost)
     )
 
     result = await db.execute(query)
-    await db.commit()
     post = result.scalar_one_or_none()
     if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-        )
-    return PostDisplay.model_validate(post)
+        await _raise_missing_or_modified(post_id, current_user_id, expected_versions, db, "User not found")
+    display = PostDisplay.model_validate(post)
+    await outbox.record("updated", [display], db)
+    await _finish(db, commit, post_id)
+    return display
 
 
 # --------------------------------------------------------------------------
@@ -97,6 +584,8 @@ async def patch(
     request: PostPatchModel,
     db: AsyncSession,
     current_user_id: int,
+    expected_versions: list[int] | None = None,
+    commit: bool = True,
 ) -> PostDisplay:
     # Convert request to a dictionary, keeping only the fields the user actually sent
     update_data = request.model_dump(exclude_unset=True)
@@ -109,15 +598,20 @@ async def patch(
     # Execute the update
     query = (
         sql_update(DbPost)
-        .where(DbPost.id == post_id, DbPost.user_id == current_user_id)
+        .where(*_write_conditions(post_id, current_user_id, expected_versions))
         .values(**update_data)  # Unpack the dict into the update query
+        .values(version=DbPost.version + 1, updated_at=datetime.now(timezone.utc))
         .returning(DbPost)
     )
 
     result = await db.execute(query)
-    await db.commit()
     post = result.scalar_one_or_none()
-    return PostDisplay.model_validate(post)
+    if not post:
+        await _raise_missing_or_modified(post_id, current_user_id, expected_versions, db, "Post not found")
+    display = PostDisplay.model_validate(post)
+    await outbox.record("updated", [display], db)
+    await _finish(db, commit, post_id)
+    return display
 
 
 # --------------------------------------------------------------------------
@@ -127,10 +621,27 @@ async def delete(
     post_id: int,
     db: AsyncSession,
     current_user_id: int,
+    delete_mode: str | None = None,
+    commit: bool = True,
 ) -> None:
-    query = sql_delete(DbPost).where(
-        DbPost.id == post_id, DbPost.user_id == current_user_id
-    )
-    await db.execute(query)
-    await db.commit()
+    """
+    Removes the post from every read path, or raises 404 when there is no such live post.
+
+    In soft mode this is a one-row UPDATE; the row and its index entries are
+    removed later, in small batches, by `db.purge`.
+    """
+    condition = (DbPost.id == post_id, DbPost.user_id == current_user_id, DbPost.deleted_at.is_(None))
+    if (delete_mode or DELETE_MODE) == "hard":
+        query = sql_delete(DbPost).where(*condition)
+    else:
+        query = sql_update(DbPost).where(*condition).values(deleted_at=datetime.now(timezone.utc))
+    result = await db.execute(query.returning(DbPost.id, DbPost.text, DbPost.user_id))
+    post = result.one_or_none()
+    if post is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
+        )
+    await db_counts.increment(current_user_id, -1, db)
+    await outbox.record("deleted", [PostDisplay.model_construct(**post._mapping)], db)
+    await _finish(db, commit, post_id)
     return None
@@ -0,0 +1,162 @@
+from monitoring.metrics import ENABLED as METRICS_ENABLED, GROUP_COMMIT_ROWS
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from schemas.schemas_post import PostDisplay, PostModel
+from db.database import AsyncSessionLocal, env_bool
+from dotenv import load_dotenv
+from typing import Any
+from db import db_post
+import logging
+import asyncio
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+# Opt-in: concurrent POST /create requests of this worker share one INSERT and one commit
+GROUP_COMMIT_ENABLED: bool = env_bool("POST_GROUP_COMMIT")
+# A batch is flushed once it has this many rows...
+GROUP_COMMIT_MAX_ROWS: int = int(os.getenv("POST_GROUP_COMMIT_MAX_ROWS", "100"))
+# ...or this many seconds after its first row arrived, whichever comes first
+GROUP_COMMIT_MAX_DELAY: float = float(os.getenv("POST_GROUP_COMMIT_MAX_DELAY", "0.005"))
+# "row" retries each row of a failed batch on its own so only the bad rows fail, "batch" fails them all
+GROUP_COMMIT_ISOLATION: str = os.getenv("POST_GROUP_COMMIT_ISOLATION", "row").lower()
+
+ISOLATIONS: tuple[str, ...] = ("row", "batch")
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------------
+
+
+class GroupCommit:
+    """
+    Queues concurrent post creations and writes them together.
+
+    The first row starts a flusher task, which waits up to `max_delay` for more
+    rows (or until `max_rows` are queued) and writes them with one multi-row
+    INSERT and one commit, so a burst costs one WAL flush instead of one per
+    post. Rows arriving during a commit form the next batch. Every caller gets
+    its own post back, or the exception its row failed with.
+    """
+
+    def __init__(
+        self,
+        sessions: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        enabled: bool = GROUP_COMMIT_ENABLED,
+        max_rows: int = GROUP_COMMIT_MAX_ROWS,
+        max_delay: float = GROUP_COMMIT_MAX_DELAY,
+        isolation: str = GROUP_COMMIT_ISOLATION,
+    ) -> None:
+        if isolation not in ISOLATIONS:
+            raise ValueError(f"CRITICAL: POST_GROUP_COMMIT_ISOLATION must be one of {', '.join(ISOLATIONS)}, not '{isolation}'.")
+        self.sessions = sessions
+        self.enabled = enabled
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.isolation = isolation
+        self._pending: list[tuple[tuple[str, int], asyncio.Future[PostDisplay]]] = []
+        self._full = asyncio.Event()
+        self._flusher: asyncio.Task[None] | None = None
+        self.batches = 0
+        self.rows = 0
+        self.failed_batches = 0
+        self.failed_rows = 0
+
+    async def create(self, request: PostModel, current_user_id: int) -> PostDisplay:
+        future: asyncio.Future[PostDisplay] = asyncio.get_running_loop().create_future()
+        self._pending.append(((request.text, current_user_id), future))
+        if len(self._pending) >= self.max_rows:
+            self._full.set()
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+        # shield: a client that disconnects must not cancel the rows of the others
+        return await asyncio.shield(future)
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                if len(self._pending) < self.max_rows:
+                    self._full.clear()
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.max_delay)
+                    except asyncio.TimeoutError:
+                        pass
+                batch, self._pending = self._pending[:self.max_rows], self._pending[self.max_rows:]
+                await self._flush(batch)
+        finally:
+            self._flusher = None
+
+    async def _insert(self, rows: list[tuple[str, int]]) -> list[PostDisplay]:
+        # Commit here, not in insert_posts: a failing after_commit must not look like a failed insert
+        async with self.sessions() as db:
+            posts = await db_post.insert_posts(rows, db, commit=False)
+            await db.commit()
+            return posts
+
+    async def _flush(self, batch: list[tuple[tuple[str, int], asyncio.Future[PostDisplay]]]) -> None:
+        self.batches += 1
+        self.rows += len(batch)
+        if METRICS_ENABLED:
+            GROUP_COMMIT_ROWS.observe(len(batch))
+        committed = False
+        try:
+            posts = await self._insert([row for row, _ in batch])
+            committed = True
+            for (_, future), post in zip(batch, posts):
+                _resolve(future, post)
+        except Exception as e:
+            self.failed_batches += 1
+            if self.isolation == "batch" or len(batch) == 1:
+                self.failed_rows += len(batch)
+                for _, future in batch:
+                    _resolve(future, error=e)
+            else:
+                logger.warning(f"Group commit of {len(batch)} post(s) failed ({e}), retrying them one by one.")
+                for row, future in batch:
+                    try:
+                        _resolve(future, (await self._insert([row]))[0])
+                        committed = True
+                    except Exception as row_error:
+                        self.failed_rows += 1
+                        _resolve(future, error=row_error)
+        if committed:
+            await self._after_commit()
+
+    async def _after_commit(self) -> None:
+        # The rows are committed and their callers answered: a cache or notify failure is only logged
+        try:
+            await db_post.after_commit()
+        except Exception:
+            logger.exception("Group commit: post-commit invalidation failed.")
+
+    async def drain(self) -> None:
+        """Waits for the queued rows to be written; called on shutdown."""
+        if self._flusher is not None:
+            await asyncio.shield(self._flusher)
+
+    # --------------------------------------------------------------------------
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "enabled": int(self.enabled),
+            "batches": self.batches,
+            "rows": self.rows,
+            "rows_per_batch": self.rows / self.batches if self.batches else 0.0,
+            "failed_batches": self.failed_batches,
+            "failed_rows": self.failed_rows,
+            "queued": len(self._pending),
+        }
+
+
+def _resolve(future: asyncio.Future[Any], result: Any = None, error: BaseException | None = None) -> None:
+    # Nobody awaits a row whose caller was cancelled before the shield: nothing to do
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+# ------------------------------------------------------------------------------------
+
+post_writes = GroupCommit()
@@ -0,0 +1,149 @@
+from sqlalchemy.ext.asyncio.engine import AsyncConnection, AsyncEngine
+from db.database import asyncpg_connect_args, engine, pool_stats
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from dotenv import load_dotenv
+from sqlalchemy import text
+import logging
+import asyncio
+import time
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+HEALTH_CHECK_SECONDS: float = float(os.getenv("DB_HEALTH_CHECK_SECONDS", "2"))
+HEALTH_CHECK_TIMEOUT: float = float(os.getenv("DB_HEALTH_CHECK_TIMEOUT", "1"))
+# Not ready while the average wait for a pooled connection over the last interval is above this
+READY_MAX_POOL_WAIT_SECONDS: float = float(os.getenv("DB_READY_MAX_POOL_WAIT_SECONDS", "0.5"))
+# Not ready while more than this share of the last interval's checkouts ended in a database error
+READY_MAX_ERROR_RATE: float = float(os.getenv("DB_READY_MAX_ERROR_RATE", "0.5"))
+# Fewer checkouts than this in an interval are too few to judge the error rate by
+READY_MIN_CHECKOUTS: int = int(os.getenv("DB_READY_MIN_CHECKOUTS", "20"))
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------------
+
+
+class DatabaseHealth:
+    """
+    Database health of this worker, checked in the background and cached, so that
+    probes answer from memory instead of taking a connection from the pool.
+
+    Every `interval` seconds `monitor` runs `SELECT 1` and compares the pool's
+    counters with the previous run: the worker is ready while the database
+    answers, the average checkout wait stays under `max_pool_wait` and the share
+    of checkouts that ended in a database error stays under `max_error_rate`.
+    A result older than three intervals counts as not ready, in case the task died.
+
+    The ping runs over a connection of its own, outside the pool it judges: on a
+    saturated pool it would otherwise wait for a checkout, time out and report
+    the database down, pulling the pod out of rotation exactly under load.
+    Saturation is read from the pool counters only.
+    """
+
+    def __init__(
+        self,
+        target: AsyncEngine,
+        interval: float = HEALTH_CHECK_SECONDS,
+        max_pool_wait: float = READY_MAX_POOL_WAIT_SECONDS,
+        max_error_rate: float = READY_MAX_ERROR_RATE,
+        min_checkouts: int = READY_MIN_CHECKOUTS,
+    ) -> None:
+        self.engine = target
+        options = {"connect_args": asyncpg_connect_args()} if target.url.drivername == "postgresql+asyncpg" else {}
+        self.probe: AsyncEngine = create_async_engine(target.url, poolclass=NullPool, **options)
+        self._connection: AsyncConnection | None = None
+        self.interval = interval
+        self.max_pool_wait = max_pool_wait
+        self.max_error_rate = max_error_rate
+        self.min_checkouts = min_checkouts
+        self.errors = 0
+        self.ready = False
+        self.reason = "not checked yet"
+        self.checked_at: float | None = None
+        self.pool_wait = 0.0
+        self.error_rate = 0.0
+        self._last = (0, 0.0, 0)
+
+    def record_error(self) -> None:
+        """Counts a request that failed on the database; called from the exception handlers."""
+        self.errors += 1
+
+    async def ping(self) -> None:
+        try:
+            if self._connection is None:
+                self._connection = await self.probe.connect()
+            await self._connection.execute(text("SELECT 1"))
+            await self._connection.rollback()
+        except BaseException:
+            # Reconnect on the next check rather than reuse a broken connection
+            await self.close()
+            raise
+
+    async def close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                await connection.close()
+            except Exception:
+                pass
+        await self.probe.dispose()
+
+    async def check(self) -> None:
+        try:
+            await asyncio.wait_for(self.ping(), HEALTH_CHECK_TIMEOUT)
+            reachable = None
+        except Exception as e:
+            reachable = f"database check failed: {e!r}"
+
+        stats = pool_stats(self.engine)
+        checkouts, wait_total = stats.get("checkouts", 0), stats.get("checkout_wait_seconds_total", 0.0)
+        last_checkouts, last_wait_total, last_errors = self._last
+        self._last = (checkouts, wait_total, self.errors)
+        new_checkouts = checkouts - last_checkouts
+        self.pool_wait = (wait_total - last_wait_total) / new_checkouts if new_checkouts else 0.0
+        self.error_rate = (self.errors - last_errors) / new_checkouts if new_checkouts >= self.min_checkouts else 0.0
+
+        if reachable is not None:
+            self._set(False, reachable)
+        elif self.pool_wait > self.max_pool_wait:
+            self._set(False, f"pool saturated, checkouts waited {self.pool_wait:.3f}s on average")
+        elif self.error_rate > self.max_error_rate:
+            self._set(False, f"{self.error_rate:.0%} of checkouts ended in a database error")
+        else:
+            self._set(True, "ok")
+        self.checked_at = time.monotonic()
+
+    def _set(self, ready: bool, reason: str) -> None:
+        if ready != self.ready:
+            if ready:
+                logger.info(f"Ready to serve ({reason}).")
+            else:
+                logger.warning(f"Not ready to serve ({reason}).")
+        self.ready = ready
+        self.reason = reason
+
+    def is_ready(self) -> bool:
+        if self.checked_at is None or time.monotonic() - self.checked_at > 3 * self.interval:
+            return False
+        return self.ready
+
+    async def monitor(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict[str, int | float | str]:
+        return {
+            "status": "ready" if self.is_ready() else "not ready",
+            "reason": self.reason,
+            "checked_seconds_ago": -1 if self.checked_at is None else round(time.monotonic() - self.checked_at, 3),
+            "pool_wait_seconds": self.pool_wait,
+            "error_rate": self.error_rate,
+        }
+
+# ------------------------------------------------------------------------------------
+
+database_health = DatabaseHealth(engine)
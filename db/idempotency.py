@@ -0,0 +1,189 @@
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable
+from fastapi import HTTPException, Response, status
+from sqlalchemy.exc import IntegrityError
+from db.models import DbIdempotencyKey
+from pydantic_core import to_json
+from dotenv import load_dotenv
+import asyncio
+import hashlib
+import time
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("POST_IDEMPOTENCY_TTL_SECONDS", "86400"))
+# How long a duplicate waits for another worker's in-flight request before giving up with 409
+IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("POST_IDEMPOTENCY_WAIT_SECONDS", "10"))
+IDEMPOTENCY_POLL_SECONDS: float = 0.05
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+# ------------------------------------------------------------------------------------
+
+
+class KeyedLocks:
+    """One asyncio.Lock per key, dropped again once nobody holds or waits for it."""
+
+    def __init__(self) -> None:
+        self._locks: dict[Hashable, tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+        lock, users = self._locks.get(key, (asyncio.Lock(), 0))
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+in_flight = KeyedLocks()
+
+
+def fingerprint(*parts: Any) -> str:
+    return hashlib.sha256(to_json(parts)).hexdigest()
+
+
+def _replay(row: DbIdempotencyKey, digest: str) -> Response:
+    if row.fingerprint != digest:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="This Idempotency-Key was already used with a different request.",
+        )
+    return Response(
+        content=row.response or None,
+        status_code=row.status_code,
+        media_type="application/json" if row.response else None,
+        headers={REPLAY_HEADER: "true"},
+    )
+
+
+async def _lookup(
+    user_id: int,
+    key: str,
+    db: AsyncSession,
+) -> DbIdempotencyKey | None:
+    """The live row for the key; an expired one is deleted, as it still holds the primary key."""
+    query = select(DbIdempotencyKey).where(
+        DbIdempotencyKey.user_id == user_id,
+        DbIdempotencyKey.key == key,
+    ).execution_options(populate_existing=True)
+    row = (await db.execute(query)).scalar_one_or_none()
+    if row is None:
+        return None
+    expires_at = row.expires_at if row.expires_at.tzinfo else row.expires_at.replace(tzinfo=timezone.utc)
+    if expires_at > datetime.now(timezone.utc):
+        return row
+    await db.delete(row)
+    await db.flush()
+    return None
+
+
+async def _wait_for_response(
+    user_id: int,
+    key: str,
+    db: AsyncSession,
+) -> DbIdempotencyKey:
+    """Waits for the response of a request with the same key that another worker is running."""
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        row = await _lookup(user_id, key, db)
+        if row is not None and row.status_code is not None:
+            return row
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress.",
+            )
+        await db.rollback()
+        await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+
+# ------------------------------------------------------------------------------------
+
+
+async def run_once(
+    key: str | None,
+    user_id: int,
+    digest: str,
+    status_code: int,
+    db: AsyncSession,
+    operation: Callable[[bool], Awaitable[Any]],
+    after_commit: Callable[[], Awaitable[None]],
+) -> Any:
+    """
+    Runs a write at most once per (user, Idempotency-Key) and replays its response afterwards.
+
+    `operation(commit)` is the write. Without a key it commits by itself. With
+    one it only flushes, and the key row, the write and the stored response are
+    committed together, so a retry either finds the response or the write never
+    happened; `after_commit` then runs the write's post-commit steps. The key
+    row is inserted first, on its own: an IntegrityError there can only be
+    another request holding the same key, which is waited for and replayed.
+    Duplicates in this worker queue on a per-key lock first. Failed writes
+    store nothing and may be retried.
+    """
+    if key is None:
+        return await operation(True)
+
+    async with in_flight.hold((user_id, key)):
+        row = await _lookup(user_id, key, db)
+        if row is not None and row.status_code is not None:
+            return _replay(row, digest)
+        if row is not None:
+            return _replay(await _wait_for_response(user_id, key, db), digest)
+
+        row = DbIdempotencyKey(
+            user_id=user_id,
+            key=key,
+            fingerprint=digest,
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+        )
+        db.add(row)
+        try:
+            # Blocks while another worker's transaction holds the same key, then fails if it committed
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            return _replay(await _wait_for_response(user_id, key, db), digest)
+
+        try:
+            result = await operation(False)
+            row.status_code = status_code
+            row.response = to_json(result).decode() if result is not None else ""
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+        await after_commit()
+        return result
+
+
+async def purge_expired(
+    db: AsyncSession,
+    batch_size: int,
+) -> int:
+    """Deletes at most `batch_size` expired keys and commits."""
+    expired = (
+        select(DbIdempotencyKey.user_id, DbIdempotencyKey.key)
+        .where(DbIdempotencyKey.expires_at <= datetime.now(timezone.utc))
+        .limit(batch_size)
+    )
+    result = await db.execute(
+        delete(DbIdempotencyKey).where(tuple_(DbIdempotencyKey.user_id, DbIdempotencyKey.key).in_(expired))
+    )
+    await db.commit()
+    return result.rowcount
@@ -1,12 +1,21 @@
-from sqlalchemy import Integer, String, DateTime, func
+from sqlalchemy import DDL, BigInteger, Index, Integer, PrimaryKeyConstraint, String, Text, DateTime, event, func
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column
-from datetime import datetime
+from datetime import datetime, timezone
 from db.database import Base
+from dotenv import load_dotenv
+from typing import Any
+import os
 
-
+load_dotenv()
+# PostgreSQL hash partitions of `post` created with the table; changing it later means repartitioning
+POST_PARTITIONS: int = int(os.getenv("POST_PARTITIONS", "16"))
 
 class DbPost(Base):
     __tablename__: str = "post"
+    # PostgreSQL: one partition per hash of user_id, so a user's posts share one small heap and
+    # indexes, inserts spread over all of them, and autovacuum works on one partition at a time.
+    __table_args__ = {"postgresql_partition_by": "HASH (user_id)", "info": {"partition_key": ("user_id",)}}
     id: Mapped[int] = mapped_column(
         Integer,
         primary_key=True,
@@ -21,11 +30,212 @@ class DbPost(Base):
     user_id: Mapped[int] = mapped_column(
         Integer,
         primary_key=False,
+        nullable=False,
         index=True,
         comment="Unique identifier for the post owner.",
     )
     timestamp: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        # Set client-side too, so every row carries microseconds and cursors compare exactly
+        default=lambda: datetime.now(timezone.utc),
         server_default=func.now(),
         comment="Timestamp of when the post was created.",
     )
+    version: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=1,
+        server_default="1",
+        comment="Bumped by every write to the post, part of its ETag.",
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        comment="Timestamp of the last write to the post, its Last-Modified.",
+    )
+    deleted_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        default=None,
+        comment="Tombstone: when the post was soft-deleted, NULL while it is live.",
+    )
+
+
+class DbUserPostCount(Base):
+    __tablename__: str = "post_user_count"
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        comment="Unique identifier for the post owner.",
+    )
+    post_count: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Number of posts of the user, maintained in the same transaction as every write.",
+    )
+
+
+class DbPostEvent(Base):
+    __tablename__: str = "post_event"
+    id: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        comment="Position of the event in the change stream (Auto-incrementing PK).",
+    )
+    event_type: Mapped[str] = mapped_column(
+        String(16),
+        nullable=False,
+        comment="What happened to the post: created, updated or deleted.",
+    )
+    post_id: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        comment="The post the event is about.",
+    )
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        comment="Unique identifier for the post owner.",
+    )
+    text: Mapped[str | None] = mapped_column(
+        String(256),
+        nullable=True,
+        comment="The post's text after the change, NULL for deletions.",
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        comment="Timestamp of the write that produced the event.",
+    )
+    published_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        default=None,
+        comment="When the relay handed the event to the sink, NULL until then.",
+    )
+    txid: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        server_default="0",
+        comment="PostgreSQL: transaction that wrote the event (pg_current_xact_id), orders the change stream. 0 elsewhere.",
+    )
+
+
+class DbIdempotencyKey(Base):
+    __tablename__: str = "post_idempotency_key"
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        comment="The user who sent the key, keys are scoped per user.",
+    )
+    key: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True,
+        comment="The client's Idempotency-Key header.",
+    )
+    fingerprint: Mapped[str] = mapped_column(
+        String(64),
+        nullable=False,
+        comment="SHA-256 of the route and request the key was first used with.",
+    )
+    status_code: Mapped[int | None] = mapped_column(
+        Integer,
+        nullable=True,
+        comment="Status of the stored response, NULL while the request is in flight.",
+    )
+    response: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+        comment="Stored JSON response body, replayed verbatim.",
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        index=True,
+        comment="After this the key is forgotten and may be reused.",
+    )
+
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def compile_primary_key(constraint: PrimaryKeyConstraint, compiler: Any, **kw: Any) -> str:
+    """
+    PostgreSQL requires the partition key in the primary key of a partitioned
+    table: `post` gets PRIMARY KEY (id, user_id) there. The mapped key stays
+    `id`, unique on its own since every id comes from the one sequence, and
+    SQLite keeps `id` as its INTEGER PRIMARY KEY.
+    """
+    partition_key = constraint.table.info.get("partition_key", ())
+    if not partition_key:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    names = [column.name for column in constraint.columns]
+    names += [name for name in partition_key if name not in names]
+    prefix = ""
+    if constraint.name is not None:
+        prefix = f"CONSTRAINT {compiler.preparer.format_constraint(constraint)} "
+    return f"{prefix}PRIMARY KEY ({', '.join(compiler.preparer.quote(name) for name in names)})"
+
+
+def partition_ddl(table: str, count: int = POST_PARTITIONS) -> list[str]:
+    return [
+        f"CREATE TABLE post_p{remainder:02d} PARTITION OF {table} FOR VALUES WITH (MODULUS {count}, REMAINDER {remainder})"
+        for remainder in range(count)
+    ]
+
+
+for ddl in partition_ddl("post"):
+    event.listen(DbPost.__table__, "after_create", DDL(ddl).execute_if(dialect="postgresql"))
+
+
+# Keyset pagination indexes: every feed page is a range scan in (timestamp, id) order
+Index("ix_post_user_id_timestamp_id", DbPost.user_id, DbPost.timestamp.desc(), DbPost.id.desc())
+Index("ix_post_timestamp_id", DbPost.timestamp.desc(), DbPost.id.desc())
+
+# Purge queue: only tombstones are indexed, so the index stays as small as the backlog of deletes
+Index(
+    "ix_post_deleted_at",
+    DbPost.deleted_at,
+    postgresql_where=DbPost.deleted_at.is_not(None),
+    sqlite_where=DbPost.deleted_at.is_not(None),
+)
+
+
+# Relay queue: only events still waiting for the sink are indexed
+Index(
+    "ix_post_event_unpublished",
+    DbPostEvent.id,
+    postgresql_where=DbPostEvent.published_at.is_(None),
+    sqlite_where=DbPostEvent.published_at.is_(None),
+)
+
+
+# Change stream order: GET /events reads (txid, id) ranges
+Index("ix_post_event_txid_id", DbPostEvent.txid, DbPostEvent.id)
+
+
+# Full-text search. The column, the index and the SQLite FTS5 table are not mapped:
+# queries reach them through `db.search`, and alembic/env.py keeps autogenerate away from them.
+# PostgreSQL: a generated tsvector column with a GIN index (see the matching migration).
+for ddl in (
+    "ALTER TABLE post ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', text)) STORED",
+    "CREATE INDEX ix_post_search_vector ON post USING GIN (search_vector)",
+):
+    event.listen(DbPost.__table__, "after_create", DDL(ddl).execute_if(dialect="postgresql"))
+
+# SQLite (tests, offline work): an external-content FTS5 table kept in sync by triggers.
+for ddl in (
+    "CREATE VIRTUAL TABLE post_fts USING fts5(text, content='post', content_rowid='id')",
+    "CREATE TRIGGER post_fts_ai AFTER INSERT ON post BEGIN "
+    "INSERT INTO post_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER post_fts_ad AFTER DELETE ON post BEGIN "
+    "INSERT INTO post_fts(post_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER post_fts_au AFTER UPDATE OF text ON post BEGIN "
+    "INSERT INTO post_fts(post_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+    "INSERT INTO post_fts(rowid, text) VALUES (new.id, new.text); END",
+):
+    event.listen(DbPost.__table__, "after_create", DDL(ddl).execute_if(dialect="sqlite"))
+event.listen(DbPost.__table__, "before_drop", DDL("DROP TABLE IF EXISTS post_fts").execute_if(dialect="sqlite"))
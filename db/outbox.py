@@ -0,0 +1,350 @@
+from monitoring.metrics import ENABLED as METRICS_ENABLED, OUTBOX_HORIZON_LAG
+from schemas.schemas_post import PostDisplay, PostEvent, PostEventPage
+from db.pagination import decode_event_cursor, encode_event_cursor
+from sqlalchemy import ColumnElement, and_, delete, insert, or_, select, text, update
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Protocol
+from db.database import AsyncSessionLocal, engine
+from db.models import DbPostEvent
+from dotenv import load_dotenv
+import argparse
+import asyncio
+import httpx
+import logging
+import time
+import json
+import sys
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+OUTBOX_SINK: str = os.getenv("POST_OUTBOX_SINK", "none").lower()
+OUTBOX_WEBHOOK_URL: str | None = os.getenv("POST_OUTBOX_WEBHOOK_URL")
+OUTBOX_WEBHOOK_TIMEOUT: float = float(os.getenv("POST_OUTBOX_WEBHOOK_TIMEOUT", "10"))
+OUTBOX_REDIS_STREAM: str = os.getenv("POST_OUTBOX_REDIS_STREAM", "post-events")
+OUTBOX_REDIS_MAXLEN: int = int(os.getenv("POST_OUTBOX_REDIS_MAXLEN", "100000"))
+OUTBOX_BATCH_SIZE: int = int(os.getenv("POST_OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_POLL_SECONDS: float = float(os.getenv("POST_OUTBOX_POLL_SECONDS", "1"))
+# GET /events warns once the oldest open transaction, which holds its events back, is this old
+OUTBOX_MAX_HORIZON_LAG_SECONDS: float = float(os.getenv("POST_OUTBOX_MAX_HORIZON_LAG_SECONDS", "60"))
+# Published events stay readable from GET /events this long
+OUTBOX_RETENTION_SECONDS: float = float(os.getenv("POST_OUTBOX_RETENTION_SECONDS", "86400"))
+REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+EventType = Literal["created", "updated", "deleted"]
+
+# PostgreSQL: the writing transaction's id, and the oldest transaction still in flight
+CURRENT_TXID = text("pg_current_xact_id()::text::bigint")
+OLDEST_RUNNING_TXID = text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+# Seconds since the oldest transaction holding a txid started, in any database of the cluster
+HORIZON_LAG_QUERY = text("""
+    SELECT COALESCE(EXTRACT(EPOCH FROM now() - min(xact_start)), 0)::float
+    FROM pg_stat_activity WHERE backend_xid IS NOT NULL
+""")
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------------
+
+
+class ChangeNotifier:
+    """Wakes this worker's long-polls after a write; other workers are caught by polling."""
+
+    def __init__(self) -> None:
+        self._event = asyncio.Event()
+
+    def notify(self) -> None:
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def wait(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+notifier = ChangeNotifier()
+
+
+async def record(
+    event_type: EventType,
+    posts: list[PostDisplay],
+    db: AsyncSession,
+) -> None:
+    """Queues one event per post inside the caller's transaction (no commit)."""
+    if not posts:
+        return None
+    statement = insert(DbPostEvent)
+    if db.bind.dialect.name == "postgresql":
+        statement = statement.values(txid=CURRENT_TXID)
+    await db.execute(statement, [
+        {
+            "event_type": event_type,
+            "post_id": post.id,
+            "user_id": post.user_id,
+            "text": None if event_type == "deleted" else post.text,
+        }
+        for post in posts
+    ])
+    return None
+
+
+# --------------------------------------------------------------------------
+
+
+async def horizon_lag(db: AsyncSession) -> float:
+    """How long GET /events may currently be holding events back; 0 where writers are serialized."""
+    if db.bind.dialect.name != "postgresql":
+        return 0.0
+    return float(await db.scalar(HORIZON_LAG_QUERY) or 0.0)
+
+
+def visible_horizon(db: AsyncSession) -> ColumnElement[int] | None:
+    """Events of this txid and above can still gain older neighbours; None where writers are serialized."""
+    return OLDEST_RUNNING_TXID if db.bind.dialect.name == "postgresql" else None
+
+
+async def read_events(
+    after: str | None,
+    limit: int,
+    db: AsyncSession,
+) -> PostEventPage:
+    """
+    Returns the events after the cursor `after` in commit order.
+
+    Ids come from a sequence at insert time, so on PostgreSQL a transaction can
+    commit an id below one a reader has already passed. Events are ordered by
+    (txid, id) instead, and only those written by transactions older than every
+    transaction still in flight are returned: anything that commits later has a
+    txid at or above that horizon and sorts after the cursor. SQLite runs one
+    writer at a time, so there txid stays 0 and the id order is the commit order.
+
+    The horizon is cluster-wide: delivery waits for the oldest open transaction,
+    whatever it is (a repartition batch, an analytics query, an idle session in
+    a transaction). `check_horizon` exports and warns about that wait.
+    """
+    txid, event_id = decode_event_cursor(after) if after else (0, 0)
+    query = (
+        select(DbPostEvent)
+        .where(or_(
+            DbPostEvent.txid > txid,
+            and_(DbPostEvent.txid == txid, DbPostEvent.id > event_id),
+        ))
+        .order_by(DbPostEvent.txid, DbPostEvent.id)
+        .limit(limit)
+    )
+    horizon = visible_horizon(db)
+    if horizon is not None:
+        query = query.where(DbPostEvent.txid < horizon)
+    rows = (await db.execute(query)).scalars().all()
+    if rows:
+        txid, event_id = rows[-1].txid, rows[-1].id
+    return PostEventPage(
+        items=[PostEvent.model_validate(e) for e in rows],
+        next_cursor=encode_event_cursor(txid, event_id),
+    )
+
+
+async def check_horizon(db: AsyncSession, max_lag: float = OUTBOX_MAX_HORIZON_LAG_SECONDS) -> float:
+    lag = await horizon_lag(db)
+    if METRICS_ENABLED:
+        OUTBOX_HORIZON_LAG.set(lag)
+    if lag > max_lag:
+        logger.warning(
+            f"GET /events is holding events back behind a transaction open for {lag:.0f}s, "
+            "see pg_stat_activity for the oldest xact_start."
+        )
+    return lag
+
+
+async def wait_for_events(
+    after: str | None,
+    limit: int,
+    wait: float,
+    db: AsyncSession,
+) -> PostEventPage:
+    """
+    Long-poll: returns as soon as there is an event after `after`, or an empty page after `wait` seconds.
+
+    The transaction is ended before every wait so an idle long-poll does not
+    keep a pooled connection checked out.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        page = await read_events(after, limit, db)
+        remaining = deadline - time.monotonic()
+        if page.items or remaining <= 0:
+            if len(page.items) < limit:
+                # Caught up, or held back: tell which
+                await check_horizon(db)
+            return page
+        await db.rollback()
+        await notifier.wait(min(OUTBOX_POLL_SECONDS, remaining))
+
+
+# ------------------------------------------------------------------------------------
+
+
+class EventSink(Protocol):
+    async def publish(self, events: list[PostEvent]) -> None: ...
+
+
+class QueueSink:
+    """In-process sink, every published batch lands on `queue` (tests, local consumers)."""
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue[list[PostEvent]] = asyncio.Queue()
+
+    async def publish(self, events: list[PostEvent]) -> None:
+        await self.queue.put(events)
+
+
+class WebhookSink:
+    """POSTs each batch as `{"events": [...]}`, any non-2xx answer fails the batch."""
+
+    def __init__(self, url: str | None = OUTBOX_WEBHOOK_URL, timeout: float = OUTBOX_WEBHOOK_TIMEOUT) -> None:
+        if not url:
+            raise RuntimeError("CRITICAL: POST_OUTBOX_SINK=webhook requires POST_OUTBOX_WEBHOOK_URL.")
+        self.url = url
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def publish(self, events: list[PostEvent]) -> None:
+        body = {"events": [json.loads(e.model_dump_json()) for e in events]}
+        response = await self._client.post(self.url, json=body)
+        response.raise_for_status()
+
+
+class RedisStreamSink:
+    """Appends every event to a capped Redis stream, one pipelined round trip per batch."""
+
+    def __init__(self, url: str = REDIS_URL, stream: str = OUTBOX_REDIS_STREAM, maxlen: int = OUTBOX_REDIS_MAXLEN) -> None:
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError(
+                "CRITICAL: POST_OUTBOX_SINK=redis requires the 'redis' package."
+            ) from e
+        self._client = aioredis.Redis.from_url(url)
+        self.stream = stream
+        self.maxlen = maxlen
+
+    async def publish(self, events: list[PostEvent]) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.xadd(self.stream, {"event": event.model_dump_json()}, maxlen=self.maxlen, approximate=True)
+            await pipe.execute()
+
+
+def build_sink(name: str = OUTBOX_SINK) -> EventSink:
+    if name == "webhook":
+        return WebhookSink()
+    if name == "redis":
+        return RedisStreamSink()
+    if name == "queue":
+        return QueueSink()
+    raise RuntimeError(f"CRITICAL: unknown POST_OUTBOX_SINK '{name}' (webhook, redis or queue).")
+
+
+# ------------------------------------------------------------------------------------
+
+
+async def relay_batch(
+    sink: EventSink,
+    db: AsyncSession,
+    batch_size: int = OUTBOX_BATCH_SIZE,
+) -> int:
+    """
+    Publishes the oldest unpublished events as one batch, then marks them published.
+
+    Delivery is at-least-once: if the commit fails after the sink accepted the
+    batch, the same events go out again. Consumers dedupe on the event id.
+    """
+    query = (
+        select(DbPostEvent)
+        .where(DbPostEvent.published_at.is_(None))
+        .order_by(DbPostEvent.txid, DbPostEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    events = [PostEvent.model_validate(e) for e in (await db.execute(query)).scalars().all()]
+    if not events:
+        return 0
+    try:
+        await sink.publish(events)
+    except Exception:
+        await db.rollback()
+        raise
+    await db.execute(
+        update(DbPostEvent)
+        .where(DbPostEvent.id.in_([e.id for e in events]))
+        .values(published_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
+    return len(events)
+
+
+async def relay(
+    sink: EventSink,
+    db: AsyncSession,
+    batch_size: int = OUTBOX_BATCH_SIZE,
+) -> int:
+    """Publishes batches until the outbox is drained, and returns the number of events sent."""
+    total = 0
+    while True:
+        sent = await relay_batch(sink, db, batch_size)
+        total += sent
+        if sent < batch_size:
+            return total
+
+
+async def prune(
+    db: AsyncSession,
+    retention_seconds: float = OUTBOX_RETENTION_SECONDS,
+    batch_size: int = OUTBOX_BATCH_SIZE,
+) -> int:
+    """Deletes at most `batch_size` published events older than the retention window."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=retention_seconds)
+    expired = (
+        select(DbPostEvent.id)
+        .where(DbPostEvent.published_at.is_not(None), DbPostEvent.created_at < cutoff)
+        .order_by(DbPostEvent.id)
+        .limit(batch_size)
+    )
+    result = await db.execute(delete(DbPostEvent).where(DbPostEvent.id.in_(expired.scalar_subquery())))
+    await db.commit()
+    return result.rowcount
+
+
+async def run(once: bool) -> int:
+    sink = build_sink()
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                sent = await relay(sink, db)
+                pruned = await prune(db)
+            if sent or pruned:
+                logger.info(f"Relayed {sent} event(s), pruned {pruned}.")
+        except Exception as e:
+            # The batch stays unpublished and is retried on the next round
+            logger.error(f"Outbox relay failed: {e}")
+            if once:
+                await engine.dispose()
+                return 1
+        if once:
+            break
+        await asyncio.sleep(OUTBOX_POLL_SECONDS)
+
+    await engine.dispose()
+    return 0
+
+# ------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish post change events from the outbox to POST_OUTBOX_SINK.")
+    parser.add_argument("--once", action="store_true", help="drain the outbox once and exit instead of polling")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(run(args.once)))
@@ -0,0 +1,100 @@
+from fastapi import HTTPException, status
+from datetime import datetime
+from dotenv import load_dotenv
+import base64
+import hashlib
+import hmac
+import json
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+CURSOR_SECRET: str | None = os.getenv("CURSOR_SECRET") or os.getenv("SECRET_KEY")
+
+# ------------------------------------------------------------------------------------
+
+
+def _sign(payload: bytes) -> bytes:
+    if not CURSOR_SECRET:
+        raise ValueError("CRITICAL: CURSOR_SECRET or SECRET_KEY environment variable is required.")
+    return hmac.new(CURSOR_SECRET.encode(), payload, hashlib.sha256).digest()[:16]
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor"
+    )
+
+
+def _encode(values: list) -> str:
+    payload = json.dumps(values, separators=(",", ":")).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def _decode(cursor: str) -> list:
+    try:
+        encoded_payload, encoded_signature = cursor.split(".")
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except ValueError:
+        raise _invalid_cursor()
+    if not hmac.compare_digest(_sign(payload), signature):
+        raise _invalid_cursor()
+    try:
+        values = json.loads(payload)
+    except ValueError:
+        raise _invalid_cursor()
+    if not isinstance(values, list):
+        raise _invalid_cursor()
+    return values
+
+
+# ------------------------------------------------------------------------------------
+
+
+def encode_cursor(timestamp: datetime, post_id: int) -> str:
+    """Opaque cursor pointing just after the (timestamp, id) of the last row of a page."""
+    return _encode([timestamp.isoformat(), post_id])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        timestamp, post_id = _decode(cursor)
+        return datetime.fromisoformat(timestamp), int(post_id)
+    except (ValueError, TypeError):
+        raise _invalid_cursor()
+
+
+def encode_search_cursor(rank: float, post_id: int) -> str:
+    """Opaque cursor pointing just after the (rank, id) of the last search result of a page."""
+    return _encode([rank, post_id])
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        rank, post_id = _decode(cursor)
+        return float(rank), int(post_id)
+    except (ValueError, TypeError):
+        raise _invalid_cursor()
+
+
+def encode_event_cursor(txid: int, event_id: int) -> str:
+    """Opaque cursor pointing just after the (txid, id) of the last event of a page."""
+    return _encode([txid, event_id])
+
+
+def decode_event_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        txid, event_id = _decode(cursor)
+        return int(txid), int(event_id)
+    except (ValueError, TypeError):
+        raise _invalid_cursor()
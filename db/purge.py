@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.ext.asyncio.session import AsyncSession
+
+from db.database import AsyncSessionLocal, engine
+from db.models import DbPost
+from db import idempotency
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+PURGE_BATCH_SIZE: int = int(os.getenv("POST_PURGE_BATCH_SIZE", "500"))
+PURGE_MAX_ROWS_PER_SECOND: float = float(os.getenv("POST_PURGE_MAX_ROWS_PER_SECOND", "1000"))
+PURGE_IDLE_SECONDS: float = float(os.getenv("POST_PURGE_IDLE_SECONDS", "30"))
+# Tombstones younger than this are left alone
+PURGE_GRACE_SECONDS: float = float(os.getenv("POST_PURGE_GRACE_SECONDS", "0"))
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------------
+
+
+async def purge_batch(
+    db: AsyncSession,
+    batch_size: int = PURGE_BATCH_SIZE,
+    grace_seconds: float = PURGE_GRACE_SECONDS,
+) -> int:
+    """Hard-deletes at most `batch_size` tombstoned posts, oldest first, and commits."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    # Walks ix_post_deleted_at; SKIP LOCKED lets several purgers run without waiting on each other
+    batch = (
+        select(DbPost.id, DbPost.user_id)
+        .where(DbPost.deleted_at.is_not(None), DbPost.deleted_at <= cutoff)
+        .order_by(DbPost.deleted_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    # Deleting by the full key lets PostgreSQL go straight to each row's partition
+    result = await db.execute(delete(DbPost).where(tuple_(DbPost.id, DbPost.user_id).in_(batch)))
+    await db.commit()
+    return result.rowcount
+
+
+async def purge(
+    db: AsyncSession,
+    batch_size: int = PURGE_BATCH_SIZE,
+    max_rows_per_second: float = PURGE_MAX_ROWS_PER_SECOND,
+    grace_seconds: float = PURGE_GRACE_SECONDS,
+) -> int:
+    """
+    Purges batches until no tombstone is left, and returns the number of rows removed.
+
+    Each batch is its own short transaction, and batches are spaced so that the
+    deletes never exceed `max_rows_per_second`: autovacuum and the indexes see a
+    steady trickle instead of one large burst.
+    """
+    total = 0
+    while True:
+        start = time.monotonic()
+        purged = await purge_batch(db, batch_size, grace_seconds)
+        total += purged
+        if purged < batch_size:
+            return total
+        await asyncio.sleep(max(0.0, purged / max_rows_per_second - (time.monotonic() - start)))
+
+
+async def run(once: bool) -> int:
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                purged = await purge(db)
+                expired = await idempotency.purge_expired(db, PURGE_BATCH_SIZE)
+            logger.info(f"Purged {purged} soft-deleted post(s) and {expired} expired idempotency key(s).")
+        except Exception:
+            # Whatever is left is picked up on the next round, after the idle sleep
+            logger.exception("Purge round failed.")
+            if once:
+                await engine.dispose()
+                return 1
+        if once:
+            break
+        await asyncio.sleep(PURGE_IDLE_SECONDS)
+
+    await engine.dispose()
+    return 0
+
+# ------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hard-delete soft-deleted posts in bounded, rate-limited batches, and expired idempotency keys.")
+    parser.add_argument("--once", action="store_true", help="purge the current backlog and exit instead of polling")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(run(args.once)))
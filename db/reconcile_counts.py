@@ -0,0 +1,32 @@
+import argparse
+import asyncio
+import sys
+
+from db.database import AsyncSessionLocal, engine
+from db import db_counts
+
+# ------------------------------------------------------------------------------------
+
+
+async def reconcile(fix: bool) -> int:
+    async with AsyncSessionLocal() as db:
+        drifts = await db_counts.find_drift(db)
+        await db.rollback()
+
+        for drift in drifts:
+            print(f"user {drift.user_id}: counter {drift.stored}, actual {drift.actual}")
+            if fix:
+                fixed = await db_counts.repair(drift.user_id, db)
+                print(f"user {drift.user_id}: counter set to {fixed}")
+
+    await engine.dispose()
+    print(f"{len(drifts)} drifted counter(s){' repaired' if fix and drifts else ''}.")
+    return 1 if drifts and not fix else 0
+
+# ------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect (and with --fix, repair) per-user post counter drift.")
+    parser.add_argument("--fix", action="store_true", help="recount and overwrite every drifted counter")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(reconcile(args.fix)))
@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio.session import AsyncSession
+
+from db.database import AsyncSessionLocal, engine
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+REPARTITION_BATCH_SIZE: int = int(os.getenv("POST_REPARTITION_BATCH_SIZE", "5000"))
+REPARTITION_MAX_ROWS_PER_SECOND: float = float(os.getenv("POST_REPARTITION_MAX_ROWS_PER_SECOND", "20000"))
+
+COLUMNS = "id, text, user_id, timestamp, version, updated_at, deleted_at"
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------------
+
+
+async def copy_batch(
+    db: AsyncSession,
+    batch_size: int = REPARTITION_BATCH_SIZE,
+) -> tuple[int, int, int]:
+    """
+    Copies the next `batch_size` ids of `post` into `post_partitioned` and
+    commits, together with the progress; returns (rows copied, last id, target id).
+
+    Rows the mirror trigger already copied are skipped. FOR SHARE makes a
+    concurrent delete of a row in the batch wait for the commit, after which its
+    trigger removes the copy, so no deleted row is ever resurrected.
+    """
+    last_id, target_id = (await db.execute(text("SELECT last_id, target_id FROM post_partition_copy FOR UPDATE"))).one()
+    if last_id >= target_id:
+        await db.rollback()
+        return 0, last_id, target_id
+    upper = min(last_id + batch_size, target_id)
+    result = await db.execute(
+        text(f"""
+            INSERT INTO post_partitioned ({COLUMNS})
+            SELECT {COLUMNS} FROM post WHERE id > :last_id AND id <= :upper FOR SHARE
+            ON CONFLICT (id, user_id) DO NOTHING
+        """),
+        {"last_id": last_id, "upper": upper},
+    )
+    await db.execute(text("UPDATE post_partition_copy SET last_id = :upper"), {"upper": upper})
+    await db.commit()
+    return result.rowcount, upper, target_id
+
+
+async def copy(
+    db: AsyncSession,
+    batch_size: int = REPARTITION_BATCH_SIZE,
+    max_rows_per_second: float = REPARTITION_MAX_ROWS_PER_SECOND,
+) -> int:
+    """
+    Backfills `post_partitioned` up to the target id, and returns the number of rows copied.
+
+    Like `db.purge`, each batch is a short transaction and batches are spaced
+    to at most `max_rows_per_second`, so replicas and autovacuum keep up. It can
+    be stopped at any time and resumes where it left off.
+    """
+    total = 0
+    while True:
+        start = time.monotonic()
+        copied, last_id, target_id = await copy_batch(db, batch_size)
+        total += copied
+        if last_id >= target_id:
+            return total
+        if copied:
+            logger.info(f"Copied up to id {last_id} of {target_id} ({total} row(s) so far).")
+        await asyncio.sleep(max(0.0, copied / max_rows_per_second - (time.monotonic() - start)))
+
+
+async def verify(db: AsyncSession) -> tuple[int, int]:
+    """Row counts of `post` and `post_partitioned`; they only match exactly while nobody writes."""
+    counts = (await db.execute(text("SELECT (SELECT count(*) FROM post), (SELECT count(*) FROM post_partitioned)"))).one()
+    return counts[0], counts[1]
+
+
+async def run(check: bool) -> int:
+    async with AsyncSessionLocal() as db:
+        if check:
+            source, copied = await verify(db)
+            logger.info(f"post: {source} row(s), post_partitioned: {copied} row(s).")
+            status = 0 if source == copied else 1
+        else:
+            copied = await copy(db)
+            logger.info(f"Backfill complete, {copied} row(s) copied. Run `alembic upgrade head` to swap the tables.")
+            status = 0
+    await engine.dispose()
+    return status
+
+# ------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the hash-partitioned post table in bounded, rate-limited batches (PostgreSQL).")
+    parser.add_argument("--verify", action="store_true", help="only compare the row counts of both tables")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(run(args.verify)))
@@ -0,0 +1,211 @@
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from db.database import create_engine_from_env, get_async_db, pool_stats
+from db.cache import READ_SOURCE_KEY, CacheBackend, build_backend
+from monitoring.metrics import instrument_engine
+from auth.oauth2 import get_current_user, get_optional_user
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.engine import make_url
+from typing import AsyncIterator
+from dotenv import load_dotenv
+from sqlalchemy import text
+from fastapi import Depends
+import itertools
+import logging
+import asyncio
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+# Comma-separated URLs of read-only copies of DATABASE_URL; reads use the primary when empty
+READ_REPLICA_URLS: list[str] = [url.strip() for url in os.getenv("DATABASE_READ_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_SELECTION: str = os.getenv("DB_REPLICA_SELECTION", "round_robin").lower()
+REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_CHECK_SECONDS: float = float(os.getenv("DB_REPLICA_CHECK_SECONDS", "2"))
+REPLICA_CHECK_TIMEOUT: float = float(os.getenv("DB_REPLICA_CHECK_TIMEOUT", "1"))
+# After a write, the user's reads stay on the primary this long (read-your-writes)
+STICKY_SECONDS: float = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+# "memory" remembers writers per worker, "redis" across workers (see POST_CACHE_BACKEND)
+STICKY_BACKEND: str = os.getenv("DB_REPLICA_STICKY_BACKEND", "memory").lower()
+
+STICKY_KEY = "sticky:{user_id}"
+SELECTIONS: tuple[str, ...] = ("round_robin", "least_connections")
+
+# Seconds since the last replayed transaction, 0 when the replica has replayed everything it received
+LAG_QUERIES: dict[str, str] = {
+    "postgresql": """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+        END
+    """,
+}
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------------
+
+
+class Replica:
+    def __init__(self, url: str) -> None:
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_engine_from_env(url)
+        instrument_engine(self.engine)
+        self.sessions = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.healthy = True
+        self.lag: float | None = None
+        # Sessions currently handed out, for least-connections selection
+        self.in_use = 0
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "healthy": int(self.healthy),
+            "lag_seconds": -1 if self.lag is None else self.lag,
+            "in_use": self.in_use,
+            **pool_stats(self.engine),
+        }
+
+
+class ReplicaSet:
+    """
+    Read replicas, picked round-robin or by fewest sessions in use.
+
+    `monitor` measures every replica's replication lag in the background and
+    takes a replica out of rotation while it lags more than `max_lag` seconds or
+    cannot be reached; a connection error during a request ejects it at once.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        selection: str = REPLICA_SELECTION,
+        max_lag: float = REPLICA_MAX_LAG_SECONDS,
+    ) -> None:
+        if selection not in SELECTIONS:
+            raise ValueError(f"CRITICAL: DB_REPLICA_SELECTION must be one of {', '.join(SELECTIONS)}, not '{selection}'.")
+        self.replicas = [Replica(url) for url in urls]
+        self.selection = selection
+        self.max_lag = max_lag
+        self._turn = itertools.count()
+
+    def pick(self) -> Replica | None:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.selection == "least_connections":
+            return min(healthy, key=lambda replica: replica.in_use)
+        return healthy[next(self._turn) % len(healthy)]
+
+    async def measure_lag(self, replica: Replica) -> float:
+        query = LAG_QUERIES.get(replica.engine.dialect.name, "SELECT 0")
+        async with replica.engine.connect() as conn:
+            return float((await conn.execute(text(query))).scalar_one() or 0)
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            replica.lag = await asyncio.wait_for(self.measure_lag(replica), REPLICA_CHECK_TIMEOUT)
+        except Exception as e:
+            self._set_health(replica, False, f"health check failed: {e}")
+            return
+        self._set_health(replica, replica.lag <= self.max_lag, f"lag {replica.lag:.1f}s")
+
+    async def check(self) -> None:
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    def eject(self, replica: Replica, reason: str) -> None:
+        self._set_health(replica, False, reason)
+
+    def _set_health(self, replica: Replica, healthy: bool, reason: str) -> None:
+        if healthy != replica.healthy:
+            if healthy:
+                logger.info(f"Read replica {replica.name} back in rotation ({reason}).")
+            else:
+                logger.warning(f"Read replica {replica.name} ejected ({reason}).")
+        replica.healthy = healthy
+
+    async def monitor(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(REPLICA_CHECK_SECONDS)
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        return {replica.name: replica.stats() for replica in self.replicas}
+
+
+class RecentWriters:
+    """Users who wrote in the last `window` seconds."""
+
+    def __init__(self, backend: CacheBackend, window: float = STICKY_SECONDS) -> None:
+        self.backend = backend
+        self.window = window
+
+    async def mark(self, user_id: int) -> None:
+        await self.backend.set(STICKY_KEY.format(user_id=user_id), "1", self.window)
+
+    async def wrote_recently(self, user_id: int | None) -> bool:
+        if user_id is None:
+            return False
+        return await self.backend.get(STICKY_KEY.format(user_id=user_id)) is not None
+
+
+replicas = ReplicaSet(READ_REPLICA_URLS)
+recent_writers = RecentWriters(build_backend(STICKY_BACKEND))
+
+# ------------------------------------------------------------------------------------
+
+
+async def sticky_writes(current_user_id: int = Depends(get_current_user)) -> AsyncIterator[None]:
+    """
+    Write route dependency: the user's next reads go to the primary.
+
+    Marked before the write so the window is open whenever the response
+    arrives, and again after it so the window is counted from the commit.
+    """
+    if not replicas.replicas:
+        yield
+        return
+    await recent_writers.mark(current_user_id)
+    yield
+    await recent_writers.mark(current_user_id)
+
+
+async def get_async_read_db(
+    primary: AsyncSession = Depends(get_async_db),
+    current_user_id: int | None = Depends(get_optional_user),
+) -> AsyncIterator[AsyncSession]:
+    """
+    Session for read-only routes, on a healthy replica when there is one.
+
+    Falls back to the primary when no replica is configured or healthy, and for
+    users who wrote recently. The unused primary session costs nothing: a
+    session only checks out a connection on its first query.
+    """
+    replica = replicas.pick()
+    if replica is None:
+        yield primary
+        return
+    if await recent_writers.wrote_recently(current_user_id):
+        # Tells db_post to bypass the shared cache and single-flight, see READ_SOURCE_KEY
+        primary.info[READ_SOURCE_KEY] = "sticky"
+        yield primary
+        return
+
+    replica.in_use += 1
+    try:
+        async with replica.sessions() as db:
+            db.info[READ_SOURCE_KEY] = "replica"
+            try:
+                yield db
+            except OperationalError as e:
+                replicas.eject(replica, f"query failed: {e}")
+                await db.rollback()
+                raise
+            except Exception:
+                await db.rollback()
+                raise
+    finally:
+        replica.in_use -= 1
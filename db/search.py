@@ -0,0 +1,45 @@
+from sqlalchemy import Integer, Select, column, func, literal_column, select, table, tuple_
+from db.models import DbPost
+import re
+
+# ------------------------------------------------------------------------------------
+
+post_fts = table("post_fts", column("rowid", Integer))
+search_vector = literal_column("post.search_vector")
+
+
+def fts5_query(terms: str) -> str:
+    """Turns free text into an FTS5 query matching every word, with no operator syntax left."""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", terms))
+
+
+def search_query(
+    dialect: str,
+    terms: str,
+    limit: int,
+    after: tuple[float, int] | None = None,
+) -> Select:
+    """
+    Ranked matches for `terms`, best first, as (id, text, user_id, rank) rows.
+
+    PostgreSQL matches the GIN-indexed `search_vector` with `websearch_to_tsquery`
+    and ranks with `ts_rank_cd`; SQLite uses the FTS5 table and `bm25`, negated
+    so that on both backends a higher rank is a better match.
+    """
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery("english", terms)
+        rank = func.ts_rank_cd(search_vector, tsquery)
+        query = select(DbPost.id, DbPost.text, DbPost.user_id, rank.label("rank")).where(
+            search_vector.op("@@")(tsquery)
+        )
+    else:
+        rank = -func.bm25(literal_column("post_fts"))
+        query = (
+            select(DbPost.id, DbPost.text, DbPost.user_id, rank.label("rank"))
+            .select_from(post_fts.join(DbPost, DbPost.id == post_fts.c.rowid))
+            .where(literal_column("post_fts").op("MATCH")(fts5_query(terms)))
+        )
+    query = query.where(DbPost.deleted_at.is_(None))
+    if after is not None:
+        query = query.where(tuple_(rank, DbPost.id) < tuple_(after[0], after[1]))
+    return query.order_by(rank.desc(), DbPost.id.desc()).limit(limit + 1)
@@ -0,0 +1,94 @@
+from monitoring.metrics import ENABLED as METRICS_ENABLED, SINGLEFLIGHT_CALLS
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+from collections import Counter
+from dotenv import load_dotenv
+from db.database import env_bool
+import asyncio
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+SINGLEFLIGHT_ENABLED: bool = env_bool("POST_SINGLEFLIGHT", True)
+
+T = TypeVar("T")
+
+# ------------------------------------------------------------------------------------
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one.
+
+    The first caller for a key (the leader) runs the call; callers arriving
+    while it is in flight (followers) await the same future and get its result
+    or its exception. Nothing is kept once the call returns, so this never
+    serves anything older than a read that was already running.
+    """
+
+    def __init__(self, enabled: bool = SINGLEFLIGHT_ENABLED) -> None:
+        self.enabled = enabled
+        self._calls: dict[Hashable, asyncio.Future[Any]] = {}
+        self.leaders: Counter[str] = Counter()
+        self.followers: Counter[str] = Counter()
+
+    def _count(self, name: str, role: str) -> None:
+        (self.leaders if role == "leader" else self.followers)[name] += 1
+        if METRICS_ENABLED:
+            SINGLEFLIGHT_CALLS.labels(name, role).inc()
+
+    async def do(self, name: str, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        if not self.enabled:
+            return await call()
+
+        flight_key = (name, key)
+        future = self._calls.get(flight_key)
+        if future is not None:
+            self._count(name, "follower")
+            try:
+                # shield: a follower that gives up must not cancel the leader's call
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled, not us: run the call ourselves
+                return await call()
+
+        self._count(name, "leader")
+        future = asyncio.get_running_loop().create_future()
+        self._calls[flight_key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Marks the exception as retrieved when no follower was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[flight_key]
+
+    # --------------------------------------------------------------------------
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        stats: dict[str, dict[str, int | float]] = {}
+        for name in sorted(self.leaders.keys() | self.followers.keys()):
+            leaders, followers = self.leaders[name], self.followers[name]
+            stats[name] = {
+                "leaders": leaders,
+                "followers": followers,
+                # Share of calls answered without a query of their own
+                "coalescing_ratio": followers / (leaders + followers),
+            }
+        return stats
+
+    def reset_stats(self) -> None:
+        self.leaders.clear()
+        self.followers.clear()
+
+
+post_reads = SingleFlight()
@@ -1,5 +1,7 @@
 import asyncio
 import asyncpg
+import random
+import time
 import os
 import sys
 
@@ -11,25 +13,32 @@ async def check_db():
     uri: str | None = os.getenv("DATABASE_URL")
     if uri and uri.startswith("postgresql+asyncpg://"):
         uri = uri.replace("postgresql+asyncpg://", "postgresql://")
+    timeout = float(os.getenv("DB_STARTUP_TIMEOUT", "60"))
+    initial = float(os.getenv("DB_CONNECT_BACKOFF_INITIAL", "0.1"))
+    maximum = float(os.getenv("DB_CONNECT_BACKOFF_MAX", "5"))
 
 # ------------------------------------------------------------------------------------
 
-    retries = 30
-    while retries > 0:
+    # Same exponential backoff with full jitter as db/warmup.py, this script runs before the app is importable
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
         try:
             conn = await asyncpg.connect(uri)
             await conn.close()
             print("Database is ready.")
             sys.exit(0)
         except Exception as e:
-            print(f"Waiting for database... ({retries} retries left) {e}")
-            print(f"DEBUG: Attempting to connect to {uri}")
-            retries -= 1
-            await asyncio.sleep(2)
+            delay = random.uniform(0, min(maximum, initial * 2 ** attempt))
+            if time.monotonic() + delay > deadline:
+                break
+            print(f"Waiting for database... (attempt {attempt + 1}, retrying in {delay:.2f}s) {e}")
+            attempt += 1
+            await asyncio.sleep(delay)
     print("Database connection failed.")
     sys.exit(1)
 
 # ------------------------------------------------------------------------------------
 
 if __name__ == "__main__":
-    asyncio.run(check_db())
\ No newline at end of file
+    asyncio.run(check_db())
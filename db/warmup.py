@@ -0,0 +1,83 @@
+from sqlalchemy.ext.asyncio.engine import AsyncEngine
+from contextlib import AsyncExitStack
+from db.database import DB_POOL_SIZE
+from dotenv import load_dotenv
+from sqlalchemy import text
+from db import db_post
+import logging
+import asyncio
+import random
+import time
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+# Connections each worker opens (and warms) before it serves, at most the pool size
+WARMUP_CONNECTIONS: int = int(os.getenv("DB_WARMUP_CONNECTIONS", str(DB_POOL_SIZE)))
+# How long startup keeps retrying an unreachable database before the worker gives up
+STARTUP_TIMEOUT: float = float(os.getenv("DB_STARTUP_TIMEOUT", "60"))
+BACKOFF_INITIAL_SECONDS: float = float(os.getenv("DB_CONNECT_BACKOFF_INITIAL", "0.1"))
+BACKOFF_MAX_SECONDS: float = float(os.getenv("DB_CONNECT_BACKOFF_MAX", "5"))
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------------
+
+
+def backoff_delay(
+    attempt: int,
+    initial: float = BACKOFF_INITIAL_SECONDS,
+    maximum: float = BACKOFF_MAX_SECONDS,
+) -> float:
+    """Exponential backoff with full jitter, so restarting pods do not retry in lockstep."""
+    return random.uniform(0, min(maximum, initial * 2 ** attempt))
+
+
+async def wait_for_database(
+    target: AsyncEngine,
+    timeout: float = STARTUP_TIMEOUT,
+) -> int:
+    """Retries `SELECT 1` with exponential backoff until it succeeds; returns the number of attempts."""
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        try:
+            async with target.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return attempt + 1
+        except Exception as e:
+            delay = backoff_delay(attempt)
+            if time.monotonic() + delay > deadline:
+                raise
+            logger.warning(f"Database not ready ({e}), retrying in {delay:.2f}s.")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def warm_up(
+    target: AsyncEngine,
+    connections: int = WARMUP_CONNECTIONS,
+) -> int:
+    """
+    Opens up to `connections` pooled connections at once and runs the hot read
+    queries on each, then hands them back to the pool; returns how many were warmed.
+
+    They are all held together, otherwise the pool would hand out the same
+    connection every time.
+    """
+    connections = min(connections, target.pool.size())
+    if connections <= 0:
+        return 0
+    queries = db_post.warmup_queries()
+    async with AsyncExitStack() as stack:
+        opened = await asyncio.gather(*(stack.enter_async_context(target.connect()) for _ in range(connections)))
+
+        async def warm(conn) -> None:
+            for query in queries:
+                await conn.execute(query)
+            # Read-only: nothing to keep, end the transaction before checking in
+            await conn.rollback()
+
+        await asyncio.gather(*(warm(conn) for conn in opened))
+    return len(opened)
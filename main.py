@@ -1,19 +1,75 @@
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError, OperationalError
 from fastapi.exceptions import RequestValidationError
-from fastapi import FastAPI, Request, status
+from monitoring.metrics import ENABLED as METRICS_ENABLED, STARTUP_SECONDS, PoolCollector, PrometheusMiddleware, multiprocess, render_metrics
+from fastapi import FastAPI, Request, Response, status
 from fastapi.responses import JSONResponse
+from prometheus_client import REGISTRY
+from db.database import engine, pool_stats
+from db.replicas import replicas
+from db.health import database_health
+from db.group_commit import post_writes
+from db import warmup
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 from router import post
 import logging
+import asyncio
+import time
+
+logger: logging.Logger = logging.getLogger(__name__)
 
 # -----------------------------------------------------------------------------------------------
 
-app = FastAPI(root_path="/post")
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Uvicorn only accepts connections once this returns: the first request finds a warm pool
+    start = time.perf_counter()
+    await warmup.wait_for_database(engine)
+    connected = time.perf_counter()
+    warmed = await warmup.warm_up(engine)
+    for replica in replicas.replicas:
+        try:
+            await warmup.warm_up(replica.engine)
+        except Exception as e:
+            # Not fatal: the monitor keeps it out of rotation until it answers
+            logger.warning(f"Could not warm up read replica {replica.name}: {e}")
+    ready = time.perf_counter()
+    if METRICS_ENABLED:
+        STARTUP_SECONDS.labels("database").set(connected - start)
+        STARTUP_SECONDS.labels("warmup").set(ready - connected)
+        STARTUP_SECONDS.labels("total").set(ready - start)
+    logger.info(f"Ready in {ready - start:.3f}s with {warmed} warm connection(s).")
+
+    # First check before serving, so /readyz is accurate from the first probe
+    await database_health.check()
+    monitors = [asyncio.create_task(database_health.monitor())]
+    if replicas.replicas:
+        monitors.append(asyncio.create_task(replicas.monitor()))
+    if METRICS_ENABLED and multiprocess():
+        monitors.append(asyncio.create_task(pool_collector.export_every()))
+    yield
+    for monitor in monitors:
+        monitor.cancel()
+    # Uvicorn runs this once in-flight requests are drained: close pooled connections cleanly
+    await post_writes.drain()
+    await database_health.close()
+    await replicas.dispose()
+    await engine.dispose()
+
+
+app = FastAPI(root_path="/post", lifespan=lifespan)
 app.include_router(post.router)
+app.add_middleware(PrometheusMiddleware)
+pool_collector = PoolCollector(pool_stats)
+REGISTRY.register(pool_collector)
 
-# -----------------------------------------------------------------------------------------------
 
-logger: logging.Logger = logging.getLogger(__name__)
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    body, content_type = render_metrics(pool_collector)
+    return Response(content=body, media_type=content_type)
 
+# -----------------------------------------------------------------------------------------------
 
 @app.exception_handler(IntegrityError)
 async def integrity_exception_handler(request: Request, exc: IntegrityError) -> JSONResponse:
@@ -25,8 +81,9 @@ async def integrity_exception_handler(request: Request, exc: IntegrityError) ->
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
-    # Flattens the complex Pydantic errors
-    errors = {err['loc'][-1]: err['msg'] for err in exc.errors()}
+    # Flattens the complex Pydantic errors, keyed by their path without the source ("body", "query"...)
+    # so that list items keep apart: "0.text", "2.text"
+    errors = {".".join(map(str, err['loc'][1:])) or str(err['loc'][-1]): err['msg'] for err in exc.errors()}
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
         content={"detail": "Validation Error", "errors": errors}
@@ -37,6 +94,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 @app.exception_handler(SQLAlchemyError)
 async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError) -> JSONResponse:
     logger.error(f"General Database Error: {exc}")
+    database_health.record_error()
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "A database error occurred. Please try again later."},
@@ -53,6 +111,7 @@ async def universal_handler(request: Request, exc: Exception) -> JSONResponse:
 @app.exception_handler(OperationalError)
 async def operational_handler(request: Request, exc: OperationalError) -> JSONResponse:
     logger.critical(f"DB Connection Error: {exc}")
+    database_health.record_error()
     return JSONResponse(
         status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
         content={"detail": "Database connection failed. Please check if the DB is running."},
@@ -61,6 +120,7 @@ async def operational_handler(request: Request, exc: OperationalError) -> JSONRe
 @app.exception_handler(TimeoutError)
 async def timeout_handler(request: Request, exc: TimeoutError) -> JSONResponse:
     logger.error(f"Error: {exc}")
+    database_health.record_error()
     return JSONResponse(
         status_code=status.HTTP_504_GATEWAY_TIMEOUT,
         content={"detail": f"The database took too long to respond. \n{exc}"}
@@ -0,0 +1,182 @@
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy.ext.asyncio.engine import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Any, Callable, Iterator
+from sqlalchemy import event
+from dotenv import load_dotenv
+import asyncio
+import time
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+# Not db.database.env_bool: db.database imports this module
+ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+# Multiprocess mode: how often each worker writes its pool stats for the scrapes to read
+POOL_EXPORT_SECONDS: float = float(os.getenv("METRICS_POOL_EXPORT_SECONDS", "5"))
+
+REQUESTS = Counter(
+    "post_api_requests_total",
+    "HTTP requests handled, by route template and status code.",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "post_api_request_duration_seconds",
+    "HTTP request latency, by route template and status code.",
+    ["method", "route", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+IN_FLIGHT = Gauge(
+    "post_api_requests_in_flight",
+    "HTTP requests currently being handled.",
+    multiprocess_mode="livesum",
+)
+DB_QUERY_LATENCY = Histogram(
+    "post_api_db_query_duration_seconds",
+    "Time spent in the database driver, by statement type.",
+    ["statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+OUTBOX_HORIZON_LAG = Gauge(
+    "post_api_outbox_horizon_lag_seconds",
+    "Age of the oldest open transaction in the cluster, which GET /events waits for.",
+    multiprocess_mode="max",
+)
+STARTUP_SECONDS = Gauge(
+    "post_api_startup_seconds",
+    "Time the worker spent getting ready before serving, by phase: database, warmup and total.",
+    ["phase"],
+)
+RATE_LIMITED = Counter(
+    "post_api_rate_limited_total",
+    "Requests rejected with 429 by the per-user rate limiter, by route.",
+    ["route"],
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "post_api_singleflight_calls_total",
+    "Coalesced reads: a leader runs the query, followers share its result.",
+    ["name", "role"],
+)
+GROUP_COMMIT_ROWS = Histogram(
+    "post_api_group_commit_rows",
+    "Posts written by each group commit of POST /create.",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+
+# ------------------------------------------------------------------------------------
+
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware recording request count, latency and in-flight requests.
+
+    Requests are labelled with the route template (`/read_post_by_id`), never
+    the raw URL, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            # The router stores the matched route in the (shared) scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = (scope["method"], route, str(status_code))
+            REQUESTS.labels(*labels).inc()
+            REQUEST_LATENCY.labels(*labels).observe(time.perf_counter() - start)
+
+
+# ------------------------------------------------------------------------------------
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Times every statement sent to the driver through the engine's cursor events."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        if ENABLED:
+            keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+            DB_QUERY_LATENCY.labels(keyword).observe(elapsed)
+
+
+class PoolCollector:
+    """
+    Exposes the connection pool counters of `db.database.pool_stats` as gauges at scrape time.
+
+    In multiprocess mode a scrape only reads the files the workers wrote, so
+    every worker calls `export` instead, which copies its stats into
+    multiprocess gauges of the same names: summed over the live workers, or
+    the highest of them for maxima.
+    """
+
+    def __init__(self, stats: Callable[[], dict[str, int | float]]) -> None:
+        self.stats = stats
+        self._gauges: dict[str, Gauge] = {}
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        for name, value in self.stats().items():
+            yield GaugeMetricFamily(f"post_api_db_pool_{name}", _pool_description(name), value=value)
+
+    def export(self) -> None:
+        for name, value in self.stats().items():
+            if name not in self._gauges:
+                # Unregistered: in single-process mode `collect` already owns these names
+                self._gauges[name] = Gauge(
+                    f"post_api_db_pool_{name}",
+                    _pool_description(name),
+                    multiprocess_mode="livemax" if name.endswith("_max") else "livesum",
+                    registry=None,
+                )
+            self._gauges[name].set(value)
+
+    async def export_every(self, interval: float = POOL_EXPORT_SECONDS) -> None:
+        while True:
+            self.export()
+            await asyncio.sleep(interval)
+
+
+def _pool_description(name: str) -> str:
+    return f"Connection pool {name.replace('_', ' ')}."
+
+
+# ------------------------------------------------------------------------------------
+
+
+def multiprocess() -> bool:
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def render_metrics(pool: PoolCollector | None = None) -> tuple[bytes, str]:
+    if multiprocess():
+        # Every worker writes its own files; aggregate them for this scrape
+        if pool is not None:
+            pool.export()
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,70 @@
+from email.utils import format_datetime, parsedate_to_datetime
+from schemas.schemas_post import Freshness
+from fastapi import Response, status
+from datetime import timezone
+from typing import Any
+import re
+
+# ------------------------------------------------------------------------------------
+
+ETAG_PATTERN = re.compile(r'(?:W/)?"[^"]*"')
+
+
+def _etags(header: str) -> list[str]:
+    return ETAG_PATTERN.findall(header)
+
+
+def _opaque(etag: str) -> str:
+    return etag.removeprefix("W/")
+
+
+def validator_headers(freshness: Freshness) -> dict[str, str]:
+    headers = {"ETag": freshness.etag}
+    if freshness.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(freshness.last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def is_not_modified(
+    freshness: Freshness,
+    if_none_match: str | None,
+    if_modified_since: str | None,
+) -> bool:
+    """RFC 9110: If-None-Match uses weak comparison and, when sent, If-Modified-Since is ignored."""
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque(freshness.etag) in {_opaque(tag) for tag in _etags(if_none_match)}
+    if if_modified_since is not None and freshness.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole seconds
+        return freshness.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def not_modified(freshness: Freshness) -> Response:
+    # No body at all: the representation is neither loaded nor serialized
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(freshness))
+
+
+def with_validators(result: Any, response: Response, freshness: Freshness) -> Any:
+    """Puts ETag and Last-Modified on whatever the endpoint returns, a model or a ready response."""
+    target = result if isinstance(result, Response) else response
+    target.headers.update(validator_headers(freshness))
+    return result
+
+
+def expected_versions(if_match: str | None, post_id: int) -> list[int] | None:
+    """
+    Post versions an If-Match header accepts, None when it sets no condition.
+
+    If-Match uses strong comparison, so weak tags and tags of other posts never
+    match; an empty list makes the write fail with 412.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    pattern = re.compile(rf'"{post_id}\.(\d+)"')
+    return [int(match.group(1)) for tag in _etags(if_match) if (match := pattern.fullmatch(tag))]
@@ -1,17 +1,68 @@
 from schemas.schemas_post import (
     PaginatedPostDisplay,
+    FeedPostDisplay,
+    SearchPostDisplay,
+    MultiPostDisplay,
+    UserPostCount,
+    PostEventPage,
+    BulkPostDisplay,
+    BulkPostError,
     PostModel,
     PostPatchModel,
     PostDisplay,
 )
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, Body, HTTPException, Depends, Header, Query, Response, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from datetime import datetime
+from typing import Any, Literal
 from auth.oauth2 import get_current_user
-from db.database import get_async_db
+from auth.ratelimit import rate_limit
+from db.database import get_async_db, pool_stats
+from db.replicas import get_async_read_db, replicas, sticky_writes
+from db.health import database_health
+from router.responses import Responder
+from router import conditional
+from db.singleflight import post_reads
+from db.group_commit import post_writes
+from db.cache import post_cache
 from sqlalchemy import text
-from db import db_post
+from db import db_post, db_counts, idempotency, outbox
+import os
 
-router = APIRouter(tags=["post"])
+respond = Responder("post")
+router = APIRouter(tags=["post"], default_response_class=respond.response_class)
+
+BULK_MAX_ITEMS: int = int(os.getenv("POST_BULK_MAX_ITEMS", "500"))
+MULTI_GET_MAX_IDS: int = int(os.getenv("POST_MULTI_GET_MAX_IDS", "300"))
+EXPORT_FETCH_SIZE: int = int(os.getenv("POST_EXPORT_FETCH_SIZE", "1000"))
+EVENTS_MAX_WAIT: float = float(os.getenv("POST_EVENTS_MAX_WAIT", "30"))
+
+IDEMPOTENCY_KEY_HEADER = Header(
+    default=None,
+    alias="Idempotency-Key",
+    max_length=255,
+    description="Retries with the same key replay the first response instead of writing again.",
+)
+RATE_LIMIT_RESPONSES: dict[int | str, dict[str, Any]] = {
+    429: {"description": "TOO MANY REQUESTS - Per-user rate limit hit, retry after `Retry-After` seconds"},
+}
+IF_MATCH_HEADER = Header(
+    default=None,
+    alias="If-Match",
+    description="ETag from a previous read; the write is rejected with 412 if the post changed since.",
+)
+IDEMPOTENCY_RESPONSES: dict[int | str, dict[str, Any]] = {
+    409: {"description": "CONFLICT - A request with this Idempotency-Key is still in progress"},
+    422: {"description": "UNPROCESSABLE - Idempotency-Key already used with a different request"},
+}
+
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
 
 
 # --------------------------------------------------------------------------
@@ -32,11 +83,60 @@ async def health_check(db: AsyncSession = Depends(get_async_db)):
         )
 
 
+@router.get("/livez", tags=["system"])
+async def liveness_probe() -> dict[str, str]:
+    # The event loop answers: restarting the pod would not help with anything else
+    return {"status": "alive"}
+
+
+@router.get(
+    "/readyz",
+    tags=["system"],
+    responses={503: {"description": "SERVICE UNAVAILABLE - Database unreachable, pool saturated or erroring"}},
+)
+async def readiness_probe(response: Response) -> dict[str, int | float | str]:
+    # Answered from the result cached by database_health.monitor, no connection is checked out
+    if not database_health.is_ready():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return database_health.stats()
+
+
+@router.get("/metrics/pool", tags=["system"])
+async def connection_pool_stats() -> dict[str, int | float]:
+    # Live connection pool usage of this worker
+    return pool_stats()
+
+
+@router.get("/cache/stats", tags=["system"])
+async def cache_stats() -> dict[str, dict[str, int | float]]:
+    # Hit/miss counters of the post read cache in this worker, by kind of key
+    return post_cache.stats()
+
+
+@router.get("/group_commit/stats", tags=["system"])
+async def group_commit_stats() -> dict[str, int | float]:
+    # Batches and rows written by this worker's POST /create group commit
+    return post_writes.stats()
+
+
+@router.get("/replicas/stats", tags=["system"])
+async def replica_stats() -> dict[str, dict[str, int | float]]:
+    # Health, lag and pool usage of each read replica as seen by this worker
+    return replicas.stats()
+
+
+@router.get("/singleflight/stats", tags=["system"])
+async def singleflight_stats() -> dict[str, dict[str, int | float]]:
+    # Per-read leader/follower counters of this worker's request coalescing
+    return post_reads.stats()
+
+
 # --------------------------------------------------------------------------
 
 
 @router.post(
     "/create",
+    dependencies=[rate_limit("create"), Depends(sticky_writes)],
     include_in_schema=True,
     deprecated=False,
     name="Post_Creation",
@@ -59,15 +159,201 @@ async def health_check(db: AsyncSession = Depends(get_async_db)):
             },
         },
         409: {"description": "CONFLICT"},
+        **IDEMPOTENCY_RESPONSES,
+        **RATE_LIMIT_RESPONSES,
     },
 )
 async def create(
     request: PostModel,
+    idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
     db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user),
 ) -> PostDisplay:
-    post: PostDisplay = await db_post.create(request, db, current_user_id)
-    return post
+    if post_writes.enabled and idempotency_key is None:
+        # Group commit writes on its own session; keyed requests need the key row in the same transaction
+        return respond(await post_writes.create(request, current_user_id), status.HTTP_201_CREATED)
+    post: PostDisplay | Response = await idempotency.run_once(
+        idempotency_key, current_user_id, idempotency.fingerprint("create", request), status.HTTP_201_CREATED, db,
+        lambda commit: db_post.create(request, db, current_user_id, commit),
+        db_post.after_commit,
+    )
+    return respond(post, status.HTTP_201_CREATED)
+
+
+# --------------------------------------------------------------------------
+
+
+@router.post(
+    "/create_bulk",
+    dependencies=[rate_limit("create_bulk"), Depends(sticky_writes)],
+    include_in_schema=True,
+    deprecated=False,
+    name="Post_bulk_creation",
+    summary="Create many posts at once",
+    description=(
+        "Saves a list of posts with a single INSERT and a single commit. "
+        "With `partial=true`, invalid items are reported in `errors` and the valid ones are still created."
+    ),
+    response_model=BulkPostDisplay,
+    status_code=status.HTTP_201_CREATED,
+    response_description="Posts created successfully",
+    responses={
+        201: {
+            "description": "SUCCESS - Posts have been created",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "items": [
+                            {"id": 3, "text": "this photo is cool.", "user_id": 7},
+                            {"id": 4, "text": "this video is cool.", "user_id": 7},
+                        ],
+                        "errors": [
+                            {"index": 2, "errors": {"text": "Field required"}},
+                        ],
+                    }
+                },
+            },
+        },
+        413: {"description": "PAYLOAD TOO LARGE - Too many items in the batch"},
+        **IDEMPOTENCY_RESPONSES,
+        **RATE_LIMIT_RESPONSES,
+    },
+    # The body is read as list[Any] so that partial mode can validate item by item; document the items anyway
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/json": {"schema": {"items": {"$ref": "#/components/schemas/PostModel"}}}},
+        },
+    },
+)
+async def create_bulk(
+    request: list[Any] = Body(default=Ellipsis, examples=[[{"text": "this video is cool."}]]),
+    partial: bool = False,
+    idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user),
+) -> BulkPostDisplay:
+    if len(request) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"A batch can contain at most {BULK_MAX_ITEMS} posts.",
+        )
+
+    valid: list[PostModel] = []
+    errors: list[BulkPostError] = []
+    raw_errors: list[dict[str, Any]] = []
+    for index, item in enumerate(request):
+        try:
+            valid.append(PostModel.model_validate(item))
+        except ValidationError as e:
+            errors.append(BulkPostError(
+                index=index,
+                # Full path inside the item, so nested errors of one item keep distinct keys
+                errors={".".join(map(str, err["loc"])) or "item": err["msg"] for err in e.errors()},
+            ))
+            raw_errors.extend({**err, "loc": ("body", index, *err["loc"])} for err in e.errors())
+
+    if raw_errors and not partial:
+        raise RequestValidationError(raw_errors)
+
+    async def create_valid(commit: bool) -> BulkPostDisplay:
+        posts: list[PostDisplay] = await db_post.create_bulk(valid, db, current_user_id, commit)
+        return BulkPostDisplay(items=posts, errors=errors)
+
+    result: BulkPostDisplay | Response = await idempotency.run_once(
+        idempotency_key, current_user_id, idempotency.fingerprint("create_bulk", request, partial),
+        status.HTTP_201_CREATED, db, create_valid, db_post.after_commit,
+    )
+    return respond(result, status.HTTP_201_CREATED)
+
+
+# --------------------------------------------------------------------------
+
+
+@router.get(
+    "/read_post_by_id",
+    include_in_schema=True,
+    deprecated=False,
+    name="Post_read_by_id",
+    summary="Retrieve a single post",
+    description="Returns one post, served from the read cache when it is warm.",
+    response_model=PostDisplay,
+    status_code=status.HTTP_200_OK,
+    response_description="Post retrieved successfully",
+    responses={
+        200: {
+            "description": "SUCCESS - Post found",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "id": 3,
+                        "text": "this photo is cool.",
+                        "user_id": 7
+                    }
+                },
+            },
+        },
+        304: {"description": "NOT MODIFIED - The client's copy (If-None-Match / If-Modified-Since) is current"},
+        404: {"description": "NOT FOUND - Post ID not found"},
+    },
+)
+async def read_post_by_id(
+    post_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    if_modified_since: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> PostDisplay:
+    if if_none_match is not None or if_modified_since is not None:
+        # Revalidation only needs the version, which is often cached even when the post is not
+        freshness = await db_post.read_post_freshness(post_id, db)
+        if conditional.is_not_modified(freshness, if_none_match, if_modified_since):
+            return conditional.not_modified(freshness)
+    post, freshness = await db_post.read_versioned_post(post_id, db)
+    return conditional.with_validators(respond(post), response, freshness)
+
+
+# --------------------------------------------------------------------------
+
+
+@router.get(
+    "/read_posts_by_ids",
+    include_in_schema=True,
+    deprecated=False,
+    name="Post_read_many",
+    summary="Retrieve many posts by id",
+    description="Returns the requested posts in the order of `ids` with a single query. Missing posts are null and listed in `missing`.",
+    response_model=MultiPostDisplay,
+    status_code=status.HTTP_200_OK,
+    response_description="Posts retrieved successfully",
+    responses={
+        200: {
+            "description": "SUCCESS - Posts looked up",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "items": [
+                            {"id": 3, "text": "this photo is cool.", "user_id": 7},
+                            None,
+                        ],
+                        "missing": [99],
+                    },
+                },
+            },
+        },
+        413: {"description": "PAYLOAD TOO LARGE - Too many ids requested"},
+    },
+)
+async def read_posts_by_ids(
+    ids: list[int] = Query(default=Ellipsis, min_length=1),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> MultiPostDisplay:
+    if len(ids) > MULTI_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"At most {MULTI_GET_MAX_IDS} ids can be requested at once.",
+        )
+    posts: MultiPostDisplay = await db_post.read_posts_by_ids(ids, db)
+    return respond(posts)
 
 
 # --------------------------------------------------------------------------
@@ -79,7 +365,10 @@ async def create(
     deprecated=False,
     name="Post_read_all",
     summary="Retrieve all posts",
-    description="Returns a complete list of all posts stored in the PostgreSQL database.",
+    description=(
+        "Returns a complete list of all posts stored in the PostgreSQL database. "
+        "With `include_total=true`, `approximate_total` holds a cheap estimate of the number of posts."
+    ),
     response_model=PaginatedPostDisplay,
     status_code=status.HTTP_200_OK,
     response_description="List of posts retrieved successfully",
@@ -95,19 +384,242 @@ async def create(
                         ],
                         "next_cursor": "null",
                         "has_more": "false",
+                        "approximate_total": "null",
                     },
                 },
             },
         },
+        304: {"description": "NOT MODIFIED - The client's copy (If-None-Match) is current"},
     },
 )
 async def read_all_posts(
     limit: int,
+    response: Response,
     last_id: int | None = None,
-    db: AsyncSession = Depends(get_async_db),
+    include_total: bool = False,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_async_read_db),
 ) -> PaginatedPostDisplay:
-    post: PaginatedPostDisplay = await db_post.read_all_posts(limit, last_id, db)
-    return post
+    post, freshness = await db_post.read_versioned_page(limit, last_id, db, include_total=include_total)
+    # Pages are validated by ETag only, If-Modified-Since is not honored
+    if conditional.is_not_modified(freshness, if_none_match, None):
+        return conditional.not_modified(freshness)
+    return conditional.with_validators(respond(post), response, freshness)
+
+
+# --------------------------------------------------------------------------
+
+
+@router.get(
+    "/count",
+    include_in_schema=True,
+    deprecated=False,
+    name="Post_count_by_user",
+    summary="Number of posts of a user",
+    description="Reads the user's post counter, kept up to date by every create and delete. Never counts rows.",
+    response_model=UserPostCount,
+    status_code=status.HTTP_200_OK,
+    response_description="Post count retrieved successfully",
+    responses={
+        200: {
+            "description": "SUCCESS - Count found",
+            "content": {
+                "application/json": {
+                    "example": {"user_id": 7, "post_count": 42},
+                },
+            },
+        },
+    },
+)
+async def count(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+) -> UserPostCount:
+    post_count: int = await db_counts.read_user_count(user_id, db)
+    return respond(UserPostCount(user_id=user_id, post_count=post_count))
+
+
+# --------------------------------------------------------------------------
+
+
+@router.get(
+    "/read_posts",
+    include_in_schema=True,
+    deprecated=False,
+    name="Post_read_feed",
+    summary="Retrieve posts newest first with keyset pagination",
+    description=(
+        "Returns posts ordered by creation time, optionally for a single author and a time window "
+        "(`since` inclusive, `until` exclusive). Pass `next_cursor` back as `cursor` to get the next page."
+    ),
+    response_model=FeedPostDisplay,
+    status_code=status.HTTP_200_OK,
+    response_description="Page of posts retrieved successfully",
+    responses={
+        200: {
+            "description": "SUCCESS - Posts found",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "items": [
+                            {"id": 3, "text": "this video is NOT cool.", "user_id": 7, "timestamp": "2026-01-20T02:50:13.780645Z"},
+                            {"id": 2, "text": "this video is cool.", "user_id": 7, "timestamp": "2026-01-20T02:49:01.120001Z"},
+                        ],
+                        "next_cursor": "WyIyMDI2LTAxLTIwVDAyOjQ5OjAxLjEyMDAwMSIsMl0.q8Xw0m1bS8vYhT2Yl2X9Pw",
+                        "has_more": True,
+                    },
+                },
+            },
+        },
+        400: {"description": "BAD REQUEST - Invalid pagination cursor"},
+    },
+)
+async def read_posts(
+    limit: int = Query(default=20, ge=1, le=1000),
+    cursor: str | None = None,
+    user_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+) -> FeedPostDisplay:
+    posts: FeedPostDisplay = await db_post.read_posts(limit, cursor, user_id, since, until, db)
+    return respond(posts)
+
+
+# --------------------------------------------------------------------------
+
+
+@router.get(
+    "/search",
+    include_in_schema=True,
+    deprecated=False,
+    name="Post_search",
+    summary="Full-text search over posts",
+    description=(
+        "Returns the posts matching `q`, best match first. `q` accepts web-search syntax on PostgreSQL "
+        "(quoted phrases, `or`, `-word`). Pass `next_cursor` back as `cursor` to get the next page."
+    ),
+    response_model=SearchPostDisplay,
+    status_code=status.HTTP_200_OK,
+    response_description="Matching posts retrieved successfully",
+    responses={
+        200: {
+            "description": "SUCCESS - Search done",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "items": [
+                            {"id": 2, "text": "this video is cool.", "user_id": 7, "rank": 0.1},
+                        ],
+                        "next_cursor": None,
+                        "has_more": False,
+                    },
+                },
+            },
+        },
+        400: {"description": "BAD REQUEST - Invalid pagination cursor"},
+    },
+)
+async def search(
+    q: str = Query(default=Ellipsis, min_length=1, max_length=256),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+) -> SearchPostDisplay:
+    posts: SearchPostDisplay = await db_post.search_posts(q, limit, cursor, db)
+    return respond(posts)
+
+
+# --------------------------------------------------------------------------
+
+
+@router.get(
+    "/export",
+    include_in_schema=True,
+    deprecated=False,
+    name="Post_export",
+    summary="Stream every post as NDJSON or CSV",
+    description=(
+        "Streams all matching posts in id order without paging. "
+        "Memory use on the server stays flat whatever the size of the table."
+    ),
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    response_description="Posts streamed successfully",
+    responses={
+        200: {
+            "description": "SUCCESS - Posts streamed",
+            "content": {
+                "application/x-ndjson": {
+                    "example": '{"id":2,"text":"this video is cool.","user_id":7,"timestamp":"2026-01-20T02:49:01.120001Z"}\n'
+                },
+                "text/csv": {
+                    "example": "id,text,user_id,timestamp\r\n2,this video is cool.,7,2026-01-20T02:49:01.120001+00:00\r\n"
+                },
+            },
+        },
+    },
+)
+async def export(
+    export_format: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+    user_id: int | None = None,
+    min_id: int | None = None,
+    max_id: int | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+) -> StreamingResponse:
+    chunks = db_post.export_posts(export_format, user_id, min_id, max_id, EXPORT_FETCH_SIZE, db)
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="posts.{export_format}"'},
+    )
+
+
+# --------------------------------------------------------------------------
+
+
+@router.get(
+    "/events",
+    include_in_schema=True,
+    deprecated=False,
+    name="Post_events",
+    summary="Tail post changes from a cursor",
+    description=(
+        "Returns the create, update and delete events that came after the cursor `after`, in commit order. "
+        "With `wait`, an empty result is held open for up to that many seconds until a change arrives (long-poll). "
+        "Pass `next_cursor` back as `after` to continue. "
+        "On PostgreSQL an event is only returned once every transaction older than the one that wrote it has ended, "
+        "so a long-running transaction anywhere in the cluster delays delivery until it finishes "
+        "(exported as `post_api_outbox_horizon_lag_seconds`)."
+    ),
+    response_model=PostEventPage,
+    status_code=status.HTTP_200_OK,
+    response_description="Events retrieved successfully",
+    responses={
+        200: {
+            "description": "SUCCESS - Events found, or the wait ran out",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "items": [
+                            {"id": 41, "event_type": "created", "post_id": 3, "user_id": 7, "text": "this photo is cool.", "created_at": "2026-01-20T02:49:01.120001Z"},
+                            {"id": 42, "event_type": "deleted", "post_id": 3, "user_id": 7, "text": None, "created_at": "2026-01-20T02:50:13.780645Z"},
+                        ],
+                        "next_cursor": "WzgyMTQsNDJd.sY2uE7u5nQm3xW0pL1aT9g",
+                    },
+                },
+            },
+        },
+    },
+)
+async def events(
+    after: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    wait: float = Query(default=0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+) -> PostEventPage:
+    page: PostEventPage = await outbox.wait_for_events(after, limit, min(wait, EVENTS_MAX_WAIT), db)
+    return respond(page)
 
 
 # --------------------------------------------------------------------------
@@ -115,6 +627,7 @@ async def read_all_posts(
 
 @router.put(
     "/update",
+    dependencies=[rate_limit("update"), Depends(sticky_writes)],
     include_in_schema=True,
     deprecated=False,
     name="Post_update",
@@ -137,16 +650,26 @@ async def read_all_posts(
             },
         },
         404: {"description": "NOT FOUND - Post ID not found"},
+        412: {"description": "PRECONDITION FAILED - If-Match does not match the current ETag"},
+        **IDEMPOTENCY_RESPONSES,
+        **RATE_LIMIT_RESPONSES,
     },
 )
 async def update(
     post_id: int,
     request: PostModel,
+    if_match: str | None = IF_MATCH_HEADER,
+    idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
     db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user),
 ) -> PostDisplay:
-    post: PostDisplay = await db_post.update(post_id, request, db, current_user_id)
-    return post
+    versions = conditional.expected_versions(if_match, post_id)
+    post: PostDisplay | Response = await idempotency.run_once(
+        idempotency_key, current_user_id, idempotency.fingerprint("update", post_id, request, if_match), status.HTTP_200_OK, db,
+        lambda commit: db_post.update(post_id, request, db, current_user_id, versions, commit),
+        lambda: db_post.after_commit(post_id),
+    )
+    return respond(post)
 
 
 # --------------------------------------------------------------------------
@@ -154,6 +677,7 @@ async def update(
 
 @router.patch(
     "/patch",
+    dependencies=[rate_limit("patch"), Depends(sticky_writes)],
     include_in_schema=True,
     deprecated=False,
     name="Post_patch",
@@ -175,16 +699,28 @@ async def update(
                 },
             },
         },
+        404: {"description": "NOT FOUND - Post ID not found"},
+        412: {"description": "PRECONDITION FAILED - If-Match does not match the current ETag"},
+        **IDEMPOTENCY_RESPONSES,
+        **RATE_LIMIT_RESPONSES,
     },
 )
 async def patch(
     post_id: int,
     request: PostPatchModel,
+    if_match: str | None = IF_MATCH_HEADER,
+    idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
     db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user),
 ) -> PostDisplay:
-    post: PostDisplay = await db_post.patch(post_id, request, db, current_user_id)
-    return post
+    versions = conditional.expected_versions(if_match, post_id)
+    post: PostDisplay | Response = await idempotency.run_once(
+        idempotency_key, current_user_id,
+        idempotency.fingerprint("patch", post_id, request.model_dump(exclude_unset=True), if_match), status.HTTP_200_OK, db,
+        lambda commit: db_post.patch(post_id, request, db, current_user_id, versions, commit),
+        lambda: db_post.after_commit(post_id),
+    )
+    return respond(post)
 
 
 # --------------------------------------------------------------------------
@@ -192,16 +728,21 @@ async def patch(
 
 @router.delete(
     "/delete",
+    dependencies=[rate_limit("delete"), Depends(sticky_writes)],
     include_in_schema=True,
     deprecated=False,
     name="Post_delete",
     summary="Delete a post from the database",
-    description="Permanently removes a user record from the PostgreSQL database using their unique ID.",
+    description=(
+        "Removes one of the current user's posts from every read endpoint. By default the row is only "
+        "tombstoned, and a background purge deletes it for good later."
+    ),
     response_model=None,
     status_code=status.HTTP_204_NO_CONTENT,
     response_description="Post deleted successfully",
     responses={
         204: {"description": "SUCCESS - Post has been deleted"},
+        404: {"description": "NOT FOUND - No such post of the current user"},
         500: {
             "description": "SERVER ERROR - Database failure during deletion",
             "content": {
@@ -210,12 +751,19 @@ async def patch(
                 },
             },
         },
+        **IDEMPOTENCY_RESPONSES,
+        **RATE_LIMIT_RESPONSES,
     },
 )
 async def delete(
     post_id: int,
+    idempotency_key: str | None = IDEMPOTENCY_KEY_HEADER,
     db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user),
-) -> None:
-    await db_post.delete(post_id, db, current_user_id)
-    return None
+) -> Response | None:
+    # A replayed delete answers 204 again instead of 404 for the post it already removed
+    return await idempotency.run_once(
+        idempotency_key, current_user_id, idempotency.fingerprint("delete", post_id), status.HTTP_204_NO_CONTENT, db,
+        lambda commit: db_post.delete(post_id, db, current_user_id, commit=commit),
+        lambda: db_post.after_commit(post_id),
+    )
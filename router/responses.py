@@ -0,0 +1,47 @@
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+from dotenv import load_dotenv
+from typing import Any
+import os
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------------
+
+
+class PydanticJSONResponse(JSONResponse):
+    """
+    JSON response rendered by pydantic-core in a single pass.
+
+    Models are serialized with their own compiled serializer, anything else
+    (dicts, lists of models, ...) with `pydantic_core.to_json`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return to_json(content)
+
+
+class Responder:
+    """
+    Per-router switch between FastAPI's default response handling and the fast path.
+
+    Set `<NAME>_RESPONSE_CLASS=fast` to enable it for the router called `name`.
+    With the fast path, endpoints hand back a ready `PydanticJSONResponse`, so
+    FastAPI skips re-validating the result against `response_model`; the
+    default keeps the usual validation and `JSONResponse`.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.fast: bool = os.getenv(f"{name.upper()}_RESPONSE_CLASS", "default").lower() == "fast"
+
+    @property
+    def response_class(self) -> type[JSONResponse]:
+        return PydanticJSONResponse if self.fast else JSONResponse
+
+    def __call__(self, content: Any, status_code: int = 200) -> Any:
+        if not self.fast or isinstance(content, Response):
+            return content
+        return PydanticJSONResponse(content, status_code=status_code)
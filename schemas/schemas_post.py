@@ -1,4 +1,5 @@
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
+from datetime import datetime
 from pydantic import BaseModel, ConfigDict, Field
 
 
@@ -45,9 +46,103 @@ class ReadAllPost(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class MultiPostDisplay(BaseModel):
+    # One entry per requested id, in request order, null when the post does not exist
+    items: List[Optional[PostDisplay]]
+    missing: List[int]
+
+
 class PaginatedPostDisplay(BaseModel):
     items: List[ReadAllPost]
     next_cursor: Optional[int]
     has_more: bool
+    approximate_total: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Freshness(BaseModel):
+    # Validators of a post or page representation: a strong ETag and, for posts, its Last-Modified
+    etag: str
+    last_modified: Optional[datetime]
+
+
+#------------------------------
+
+
+class FeedPost(BaseModel):
+    id: int
+    text: str
+    user_id: int
+    timestamp: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FeedPostDisplay(BaseModel):
+    items: List[FeedPost]
+    next_cursor: Optional[str]
+    has_more: bool
+
+
+#------------------------------
+
+
+class SearchPost(BaseModel):
+    id: int
+    text: str
+    user_id: int
+    rank: float
+
+
+class SearchPostDisplay(BaseModel):
+    items: List[SearchPost]
+    next_cursor: Optional[str]
+    has_more: bool
+
+
+#------------------------------
+
+
+class UserPostCount(BaseModel):
+    user_id: int
+    post_count: int
+
+
+class CounterDrift(BaseModel):
+    user_id: int
+    stored: int
+    actual: int
+
+
+#------------------------------
+
+
+class PostEvent(BaseModel):
+    id: int
+    event_type: Literal["created", "updated", "deleted"]
+    post_id: int
+    user_id: int
+    text: Optional[str]
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PostEventPage(BaseModel):
+    items: List[PostEvent]
+    # Opaque, pass back as `after`; stays on the last seen event when the page is empty
+    next_cursor: str
+
+
+#------------------------------
+
+
+class BulkPostError(BaseModel):
+    index: int
+    errors: Dict[str, str]
+
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+class BulkPostDisplay(BaseModel):
+    items: List[PostDisplay]
+    errors: List[BulkPostError]
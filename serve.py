@@ -0,0 +1,139 @@
+from db.cache import CACHE_BACKEND
+from db.database import env_bool
+from dotenv import load_dotenv
+import importlib.util
+import tempfile
+import logging
+import uvicorn
+import math
+import os
+
+# ------------------------------------------------------------------------------------
+
+load_dotenv()
+HOST: str = os.getenv("UVICORN_HOST", "0.0.0.0")
+PORT: int = int(os.getenv("UVICORN_PORT", "8000"))
+# Same variable Uvicorn and Gunicorn read; one worker per CPU available to the process when unset
+WORKERS: int = int(os.getenv("WEB_CONCURRENCY") or 0)
+# Postgres `max_connections`, and what to leave of it to migrations, the outbox relay, the purge, psql...
+DB_MAX_CONNECTIONS: int = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+DB_RESERVED_CONNECTIONS: int = int(os.getenv("DB_RESERVED_CONNECTIONS", "10"))
+# Upper bounds per worker, lowered when the workers would not fit in the budget (see db/database.py)
+DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Fewer pooled connections than this per worker would serialize its requests, refuse to start instead
+DB_MIN_POOL_SIZE: int = int(os.getenv("DB_MIN_POOL_SIZE", "2"))
+# On SIGTERM, in-flight requests get this long to finish before the workers exit
+GRACEFUL_SHUTDOWN_SECONDS: float = float(os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", "20"))
+KEEP_ALIVE_SECONDS: int = int(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "5"))
+ACCESS_LOG: bool = env_bool("SERVER_ACCESS_LOG")
+
+CGROUP_CPU_MAX: str = "/sys/fs/cgroup/cpu.max"
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# ------------------------------------------------------------------------------------
+
+
+def pool_per_worker(
+    workers: int,
+    max_connections: int = DB_MAX_CONNECTIONS,
+    reserved: int = DB_RESERVED_CONNECTIONS,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    min_pool_size: int = DB_MIN_POOL_SIZE,
+) -> tuple[int, int]:
+    """
+    Pool size and overflow for each worker, so that all workers together,
+    overflow and the health probe's own connection (db/health.py) included,
+    never open more than `max_connections - reserved`.
+    """
+    budget = (max_connections - reserved) // workers - 1
+    if budget < max(min_pool_size, 1):
+        raise ValueError(
+            f"CRITICAL: {workers} workers cannot share {max_connections - reserved} database connections "
+            f"with at least {min_pool_size} each, lower WEB_CONCURRENCY or raise DB_MAX_CONNECTIONS."
+        )
+    pool_size = min(pool_size, budget)
+    return pool_size, min(max_overflow, budget - pool_size)
+
+
+def available_cpus(cpu_max: str = CGROUP_CPU_MAX) -> int:
+    """
+    CPUs this process may run on, capped by the cgroup v2 CPU quota.
+
+    `os.cpu_count` reports the host's CPUs inside a container; the affinity
+    mask honours cpusets and `cpu.max` holds the `docker run --cpus` limit.
+    """
+    if hasattr(os, "process_cpu_count"):
+        count = os.process_cpu_count() or 1
+    elif hasattr(os, "sched_getaffinity"):
+        count = len(os.sched_getaffinity(0)) or 1
+    else:
+        count = os.cpu_count() or 1
+    try:
+        with open(cpu_max) as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def event_loop() -> str:
+    return "uvloop" if _installed("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if _installed("httptools") else "h11"
+
+
+# ------------------------------------------------------------------------------------
+
+
+def main(workers: int = WORKERS) -> None:
+    workers = max(1, workers or available_cpus())
+    if workers > 1 and CACHE_BACKEND == "memory":
+        # Each worker would keep its own copy, and never hear of the writes made by the others
+        raise ValueError(
+            "CRITICAL: POST_CACHE_BACKEND=memory only works with one worker, "
+            "use POST_CACHE_BACKEND=redis or WEB_CONCURRENCY=1."
+        )
+    pool_size, max_overflow = pool_per_worker(
+        workers, DB_MAX_CONNECTIONS, DB_RESERVED_CONNECTIONS, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_MIN_POOL_SIZE
+    )
+    # Read by db/database.py when each worker imports the app, so set before uvicorn spawns them
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    if workers > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        # Without it every scrape of /metrics would only see the worker that answered
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="post-api-metrics-")
+
+    loop, http = event_loop(), http_protocol()
+    logger.info(
+        f"Starting {workers} worker(s) on {HOST}:{PORT} ({loop}, {http}), "
+        f"DB pool {pool_size} + {max_overflow} overflow per worker."
+    )
+    uvicorn.run(
+        "main:app",
+        host=HOST,
+        port=PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
+        proxy_headers=True,
+        access_log=ACCESS_LOG,
+        timeout_keep_alive=KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS,
+    )
+
+# ------------------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,78 @@
+from auth.oauth2 import VerifiedTokenCache, get_current_user, token_cache
+from fastapi import HTTPException
+from auth import oauth2
+from jose import jwt
+import inspect
+import pytest
+import time
+
+SECRET = "test-secret"
+
+
+@pytest.fixture(autouse=True)
+def jwt_settings(monkeypatch):
+    monkeypatch.setattr(oauth2, "SECRET_KEY", SECRET)
+    monkeypatch.setattr(oauth2, "ALGORITHM", "HS256")
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+def make_token(sub: str = "42", exp: float | None = None) -> str:
+    claims: dict = {"sub": sub}
+    if exp is not None:
+        claims["exp"] = int(exp)
+    return jwt.encode(claims, SECRET, algorithm="HS256")
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_repeated_token_skips_verification(monkeypatch):
+    token = make_token(exp=time.time() + 60)
+    assert await get_current_user(token) == 42
+
+    def fail(*args, **kwargs):
+        raise AssertionError("jwt.decode should not run for a cached token")
+
+    monkeypatch.setattr(oauth2.jwt, "decode", fail)
+    assert await get_current_user(token) == 42
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_not_cached():
+    token = make_token() + "tampered"
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(token)
+    assert exc.value.status_code == 401
+    assert token_cache.get(token) is None
+
+
+@pytest.mark.asyncio
+async def test_expired_token_is_rejected():
+    token = make_token(exp=time.time() - 10)
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(token)
+    assert exc.value.status_code == 401
+
+
+def test_cache_entry_expires_with_exp_claim():
+    cache = VerifiedTokenCache(ttl=300)
+    cache.put("token", 7, exp=time.time() - 1)
+    assert cache.get("token") is None
+
+    cache.put("token", 7, exp=time.time() + 60)
+    assert cache.get("token") == 7
+
+
+def test_cache_is_bounded():
+    cache = VerifiedTokenCache(max_entries=2)
+    for i in range(3):
+        cache.put(f"token-{i}", i, exp=None)
+    assert cache.get("token-0") is None
+    assert cache.get("token-2") == 2
+
+
+def test_get_current_user_does_not_take_a_db_session():
+    assert list(inspect.signature(get_current_user).parameters) == ["token"]
@@ -0,0 +1,34 @@
+from benchmarks.suite import SCENARIOS, check_regressions, run_suite
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_suite_runs_every_scenario(tmp_path):
+    results = await run_suite(
+        requests=4, concurrency=2, db_url=f"sqlite+aiosqlite:///{tmp_path}/bench.db"
+    )
+
+    assert results["meta"]["backend"] == "sqlite"
+    assert set(results["scenarios"]) == set(SCENARIOS)
+    for scenario in results["scenarios"].values():
+        assert scenario["requests"] == 4
+        assert scenario["req_per_s"] > 0
+        assert scenario["p50_ms"] <= scenario["p95_ms"] <= scenario["p99_ms"]
+    assert results["scenarios"]["read_post_by_id"]["db_round_trips_per_request"] == 1
+
+
+def test_check_regressions_flags_slower_scenarios():
+    baseline = {"scenarios": {
+        "create": {"req_per_s": 100, "p95_ms": 10},
+        "patch": {"req_per_s": 100, "p95_ms": 10},
+    }}
+    results = {"scenarios": {
+        "create": {"req_per_s": 95, "p95_ms": 10.5},
+        "patch": {"req_per_s": 70, "p95_ms": 13},
+        "delete": {"req_per_s": 1, "p95_ms": 1000},
+    }}
+
+    failures = check_regressions(results, baseline, threshold=0.1)
+
+    assert len(failures) == 2
+    assert all(failure.startswith("patch:") for failure in failures)
@@ -0,0 +1,69 @@
+from httpx import AsyncClient
+from router import post
+from main import app
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_create_bulk_returns_posts_in_order(client: AsyncClient):
+    texts = [f"bulk post {i}" for i in range(5)]
+    response = await client.post("/create_bulk", json=[{"text": t} for t in texts])
+
+    assert response.status_code == 201
+    body = response.json()
+    assert [item["text"] for item in body["items"]] == texts
+    assert body["errors"] == []
+    ids = [item["id"] for item in body["items"]]
+    assert ids == sorted(ids)
+
+    for item in body["items"]:
+        read = await client.get("/read_post_by_id", params={"post_id": item["id"]})
+        assert read.json() == item
+
+
+@pytest.mark.asyncio
+async def test_create_bulk_rejects_whole_batch_on_invalid_item(client: AsyncClient):
+    response = await client.post(
+        "/create_bulk", json=[{"text": "valid"}, {"text": "x" * 300}]
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_create_bulk_errors_are_located_by_index(client: AsyncClient):
+    response = await client.post("/create_bulk", json=[{"nope": 1}, {"text": "ok"}, {"nope": 2}, "not an object"])
+    assert response.status_code == 422
+    assert response.json()["errors"] == {
+        "0.text": "Field required",
+        "2.text": "Field required",
+        "3": "Input should be a valid dictionary or instance of PostModel",
+    }
+
+
+def test_create_bulk_documents_the_item_schema():
+    body = app.openapi()["paths"]["/create_bulk"]["post"]["requestBody"]
+    items = body["content"]["application/json"]["schema"]["items"]
+    assert items == {"$ref": "#/components/schemas/PostModel"}
+
+
+@pytest.mark.asyncio
+async def test_create_bulk_partial_reports_invalid_items(client: AsyncClient):
+    response = await client.post(
+        "/create_bulk",
+        params={"partial": True},
+        json=[{"text": "first"}, {"nope": 1}, {"text": "third"}, "not an object"],
+    )
+
+    assert response.status_code == 201
+    body = response.json()
+    assert [item["text"] for item in body["items"]] == ["first", "third"]
+    assert [error["index"] for error in body["errors"]] == [1, 3]
+    assert body["errors"][0]["errors"] == {"text": "Field required"}
+    assert list(body["errors"][1]["errors"]) == ["item"]
+
+
+@pytest.mark.asyncio
+async def test_create_bulk_enforces_max_items(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(post, "BULK_MAX_ITEMS", 2)
+    response = await client.post("/create_bulk", json=[{"text": "a"}] * 3)
+    assert response.status_code == 413
@@ -0,0 +1,202 @@
+from db.cache import GENERATION_KEY, MemoryCache, NullCache, PostCache, post_cache
+from schemas.schemas_post import PostDisplay
+from httpx import AsyncClient
+import pytest
+
+
+class FakeCacheBackend:
+    """Dict-backed stand-in for a real cache server, ignores TTLs."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.counters: dict[str, int] = {}
+
+    async def get(self, key: str) -> str | None:
+        if key in self.counters:
+            return str(self.counters[key])
+        return self.data.get(key)
+
+    async def get_many(self, keys: list[str]) -> list[str | None]:
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self.data[key] = value
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self.data if k.startswith(prefix)]:
+            del self.data[key]
+
+    async def incr(self, key: str) -> int:
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+    async def set_if(self, key: str, value: str, ttl: float, counter: str, expected: int) -> None:
+        if self.counters.get(counter, 0) == expected:
+            self.data[key] = value
+
+
+@pytest.fixture
+def fake_cache():
+    previous = post_cache.backend
+    post_cache.backend = FakeCacheBackend()
+    post_cache.reset_stats()
+    yield post_cache.backend
+    post_cache.backend = previous
+    post_cache.reset_stats()
+
+
+async def create_post(client: AsyncClient, text: str) -> dict:
+    response = await client.post("/create", json={"text": text})
+    assert response.status_code == 201
+    return response.json()
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_read_post_by_id_reads_through_cache(client: AsyncClient, fake_cache):
+    post = await create_post(client, "cached post")
+    key = f"post:{post['id']}"
+
+    first = await client.get("/read_post_by_id", params={"post_id": post["id"]})
+    second = await client.get("/read_post_by_id", params={"post_id": post["id"]})
+
+    assert first.json() == second.json() == post
+    stats = post_cache.stats()
+    assert stats["total"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+    assert stats["post"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+    assert stats["page"]["hits"] + stats["page"]["misses"] == 0
+    assert key in fake_cache.data
+
+
+@pytest.mark.asyncio
+async def test_stats_are_broken_down_by_key_kind(client: AsyncClient, fake_cache):
+    post = await create_post(client, "by kind")
+    await client.get("/read_posts_by_ids", params={"ids": [post["id"], 987654]})
+    await client.get("/read_all_posts", params={"limit": 5})
+    await client.get("/read_all_posts", params={"limit": 5})
+
+    stats = post_cache.stats()
+    assert set(stats) == {"post", "etag", "page", "multi_get", "total"}
+    assert stats["multi_get"]["misses"] == 2
+    assert stats["page"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+    assert stats["total"]["hits"] == sum(stats[kind]["hits"] for kind in ("post", "etag", "page", "multi_get"))
+
+
+@pytest.mark.asyncio
+async def test_read_post_by_id_not_found(client: AsyncClient, fake_cache):
+    response = await client.get("/read_post_by_id", params={"post_id": 999999})
+    assert response.status_code == 404
+    assert "post:999999" not in fake_cache.data
+
+
+@pytest.mark.asyncio
+async def test_update_and_patch_invalidate_post(client: AsyncClient, fake_cache):
+    post = await create_post(client, "before")
+    await client.get("/read_post_by_id", params={"post_id": post["id"]})
+
+    await client.put("/update", params={"post_id": post["id"]}, json={"text": "after update"})
+    response = await client.get("/read_post_by_id", params={"post_id": post["id"]})
+    assert response.json()["text"] == "after update"
+
+    await client.patch("/patch", params={"post_id": post["id"]}, json={"text": "after patch"})
+    response = await client.get("/read_post_by_id", params={"post_id": post["id"]})
+    assert response.json()["text"] == "after patch"
+
+
+@pytest.mark.asyncio
+async def test_delete_invalidates_post(client: AsyncClient, fake_cache):
+    post = await create_post(client, "to delete")
+    await client.get("/read_post_by_id", params={"post_id": post["id"]})
+
+    response = await client.delete("/delete", params={"post_id": post["id"]})
+    assert response.status_code == 204
+
+    response = await client.get("/read_post_by_id", params={"post_id": post["id"]})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_first_page_is_cached_and_invalidated_on_create(client: AsyncClient, fake_cache):
+    await create_post(client, "page one")
+    first = await client.get("/read_all_posts", params={"limit": 5})
+    cached = await client.get("/read_all_posts", params={"limit": 5})
+    assert first.json() == cached.json()
+    assert post_cache.stats()["page"]["hits"] == 1
+
+    new_post = await create_post(client, "page two")
+    assert "posts:page:5" not in fake_cache.data
+    response = await client.get("/read_all_posts", params={"limit": 5})
+    assert response.json()["items"][0] == new_post
+
+
+@pytest.mark.asyncio
+async def test_later_pages_are_not_cached(client: AsyncClient, fake_cache):
+    post = await create_post(client, "deep page")
+    await client.get("/read_all_posts", params={"limit": 5, "last_id": post["id"] + 1})
+    assert not any(key.startswith("posts:page:") for key in fake_cache.data)
+
+
+@pytest.mark.asyncio
+async def test_stale_read_is_not_stored_after_concurrent_write(fake_cache):
+    cache = PostCache(fake_cache)
+    generation = await cache.current_generation()
+    # A write in another worker: only the shared counter tells
+    await PostCache(fake_cache).invalidate(1)
+
+    await cache.set_post(PostDisplay(id=1, text="stale", user_id=1), generation)
+    assert "post:1" not in fake_cache.data
+    assert fake_cache.counters[GENERATION_KEY] == 1
+
+    await cache.set_post(PostDisplay(id=1, text="fresh", user_id=1), await cache.current_generation())
+    assert "post:1" in fake_cache.data
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_keeps_no_per_key_stats():
+    cache = PostCache(NullCache())
+    for post_id in range(100):
+        assert await cache.get_post(post_id) is None
+    assert all(kind == {"hits": 0, "misses": 0, "hit_ratio": 0.0} for kind in cache.stats().values())
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    await cache.set("a", "1", ttl=60)
+    await cache.set("b", "2", ttl=60)
+    await cache.get("a")
+    await cache.set("c", "3", ttl=60)
+
+    assert await cache.get("a") == "1"
+    assert await cache.get("b") is None
+    assert await cache.get("c") == "3"
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_never_evicts_counters():
+    cache = MemoryCache(max_entries=1)
+    await cache.incr(GENERATION_KEY)
+    await cache.set("a", "1", ttl=60)
+    await cache.set("b", "2", ttl=60)
+    assert await cache.get(GENERATION_KEY) == "1"
+
+    await cache.set_if("c", "3", 60, GENERATION_KEY, expected=0)
+    assert await cache.get("c") is None
+    await cache.set_if("c", "3", 60, GENERATION_KEY, expected=1)
+    assert await cache.get("c") == "3"
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_expires_entries():
+    cache = MemoryCache()
+    await cache.set("a", "1", ttl=0)
+    assert await cache.get("a") is None
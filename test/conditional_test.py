@@ -0,0 +1,137 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from db.cache import MemoryCache, post_cache
+from httpx import AsyncClient
+import pytest
+
+
+async def create_post(client: AsyncClient, text: str) -> dict:
+    response = await client.post("/create", json={"text": text})
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.fixture
+def counted_queries(db_session: AsyncSession, monkeypatch):
+    queries: list[str] = []
+    execute = db_session.execute
+
+    async def counting_execute(statement, *args, **kwargs):
+        queries.append(str(statement))
+        return await execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db_session, "execute", counting_execute)
+    return queries
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_single_post_revalidates_with_etag(client: AsyncClient, counted_queries: list[str]):
+    post = await create_post(client, "etag me")
+
+    first = await client.get("/read_post_by_id", params={"post_id": post["id"]})
+    etag = first.headers["etag"]
+    assert etag == f'"{post["id"]}.1"'
+    assert "last-modified" in first.headers
+
+    counted_queries.clear()
+    response = await client.get("/read_post_by_id", params={"post_id": post["id"]}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    # At most the version was looked up, never the post's text
+    assert len(counted_queries) <= 1
+    assert all("text" not in query.split("FROM")[0] for query in counted_queries)
+
+    await client.put("/update", params={"post_id": post["id"]}, json={"text": "changed"})
+    response = await client.get("/read_post_by_id", params={"post_id": post["id"]}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["text"] == "changed"
+    assert response.headers["etag"] == f'"{post["id"]}.2"'
+
+
+@pytest.mark.asyncio
+async def test_cached_version_skips_the_database(client: AsyncClient, counted_queries: list[str], monkeypatch):
+    monkeypatch.setattr(post_cache, "backend", MemoryCache())
+    post = await create_post(client, "cached etag")
+    etag = (await client.get("/read_post_by_id", params={"post_id": post["id"]})).headers["etag"]
+
+    counted_queries.clear()
+    response = await client.get("/read_post_by_id", params={"post_id": post["id"]}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert counted_queries == []
+
+
+@pytest.mark.asyncio
+async def test_single_post_revalidates_with_last_modified(client: AsyncClient):
+    post = await create_post(client, "dated")
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(minutes=1), usegmt=True)
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(days=1), usegmt=True)
+
+    response = await client.get("/read_post_by_id", params={"post_id": post["id"]}, headers={"If-Modified-Since": later})
+    assert response.status_code == 304
+    response = await client.get("/read_post_by_id", params={"post_id": post["id"]}, headers={"If-Modified-Since": earlier})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_list_page_etag_follows_its_posts(client: AsyncClient):
+    post = await create_post(client, "listed")
+
+    first = await client.get("/read_all_posts", params={"limit": 5})
+    etag = first.headers["etag"]
+
+    response = await client.get("/read_all_posts", params={"limit": 5}, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+
+    await client.patch("/patch", params={"post_id": post["id"]}, json={"text": "edited"})
+    response = await client.get("/read_all_posts", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    etag = response.headers["etag"]
+    await client.delete("/delete", params={"post_id": post["id"]})
+    response = await client.get("/read_all_posts", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_list_page_ignores_if_modified_since(client: AsyncClient):
+    newest = await create_post(client, "newest")
+    first = await client.get("/read_all_posts", params={"limit": 5})
+    assert "last-modified" not in first.headers
+
+    # Deleting the newest post must not make an old copy of the page look current
+    await client.delete("/delete", params={"post_id": newest["id"]})
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(minutes=1), usegmt=True)
+    response = await client.get("/read_all_posts", params={"limit": 5}, headers={"If-Modified-Since": later})
+    assert response.status_code == 200
+    assert newest["id"] not in [item["id"] for item in response.json()["items"]]
+
+
+@pytest.mark.asyncio
+async def test_if_match_rejects_lost_updates(client: AsyncClient):
+    post = await create_post(client, "shared draft")
+    etag = (await client.get("/read_post_by_id", params={"post_id": post["id"]})).headers["etag"]
+
+    # Two writers read the same version, the first one wins
+    response = await client.put("/update", params={"post_id": post["id"]}, json={"text": "writer A"}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    response = await client.patch("/patch", params={"post_id": post["id"]}, json={"text": "writer B"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+
+    response = await client.get("/read_post_by_id", params={"post_id": post["id"]})
+    assert response.json()["text"] == "writer A"
+
+    fresh = response.headers["etag"]
+    response = await client.patch("/patch", params={"post_id": post["id"]}, json={"text": "writer B"}, headers={"If-Match": fresh})
+    assert response.status_code == 200
+
+    # Weak tags never match, unknown posts stay 404
+    response = await client.put("/update", params={"post_id": post["id"]}, json={"text": "x"}, headers={"If-Match": f"W/{fresh}"})
+    assert response.status_code == 412
+    response = await client.put("/update", params={"post_id": 987654321}, json={"text": "x"}, headers={"If-Match": "*"})
+    assert response.status_code == 404
@@ -1,13 +1,18 @@
+import os
+
+# 1. Use a separate test database URL
+TEST_DB_URL = "sqlite+aiosqlite:///./test/test.db"
+TEST_USER_ID = 1
+os.environ.setdefault("DATABASE_URL", TEST_DB_URL)
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from httpx import AsyncClient, ASGITransport
 from db.database import Base, get_async_db
+from auth.oauth2 import get_current_user
 from main import app
 import asyncio
 import pytest
 
-# 1. Use a separate test database URL
-TEST_DB_URL = "sqlite+aiosqlite:///./test/test.db"
-
 @pytest.fixture(scope="session")
 def event_loop():
     """Create an instance of the default event loop for each test case."""
@@ -41,11 +46,15 @@ async def db_session():
 
 @pytest.fixture
 async def client(db_session: AsyncSession):
-    """Override the get_async_db dependency and return an AsyncClient."""
+    """Override the get_async_db and get_current_user dependencies and return an AsyncClient."""
     async def override_get_async_db():
         yield db_session
 
+    async def override_get_current_user():
+        return TEST_USER_ID
+
     app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = override_get_current_user
     
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
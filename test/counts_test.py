@@ -0,0 +1,73 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import DbPost, DbUserPostCount
+from conftest import TEST_USER_ID
+from httpx import AsyncClient
+from sqlalchemy import insert
+from db import db_counts
+import pytest
+
+DRIFT_USER_ID = 7777
+
+
+async def user_count(client: AsyncClient, user_id: int = TEST_USER_ID) -> int:
+    response = await client.get("/count", params={"user_id": user_id})
+    assert response.status_code == 200
+    return response.json()["post_count"]
+
+
+@pytest.mark.asyncio
+async def test_writes_maintain_the_user_counter(client: AsyncClient):
+    start = await user_count(client)
+
+    created = (await client.post("/create", json={"text": "counted"})).json()
+    assert await user_count(client) == start + 1
+
+    await client.post("/create_bulk", json=[{"text": "a"}, {"text": "b"}, {"text": "c"}])
+    assert await user_count(client) == start + 4
+
+    await client.delete("/delete", params={"post_id": created["id"]})
+    assert await user_count(client) == start + 3
+
+    # Deleting a post that is already gone must not decrement again
+    await client.delete("/delete", params={"post_id": created["id"]})
+    assert await user_count(client) == start + 3
+
+
+@pytest.mark.asyncio
+async def test_unknown_user_has_no_posts(client: AsyncClient):
+    assert await user_count(client, 123456789) == 0
+
+
+@pytest.mark.asyncio
+async def test_list_endpoint_reports_approximate_total_on_request(client: AsyncClient):
+    await client.post("/create", json={"text": "total"})
+
+    response = await client.get("/read_all_posts", params={"limit": 1})
+    assert response.json()["approximate_total"] is None
+
+    response = await client.get("/read_all_posts", params={"limit": 1, "include_total": True})
+    total = response.json()["approximate_total"]
+    assert total is not None and total >= await user_count(client)
+
+
+@pytest.mark.asyncio
+async def test_drift_is_detected_and_repaired(db_session: AsyncSession):
+    await db_session.execute(insert(DbPost), [{"text": "drift", "user_id": DRIFT_USER_ID}] * 2)
+    await db_session.execute(insert(DbUserPostCount).values(user_id=DRIFT_USER_ID, post_count=5))
+
+    drifts = [d for d in await db_counts.find_drift(db_session) if d.user_id == DRIFT_USER_ID]
+    assert [(d.stored, d.actual) for d in drifts] == [(5, 2)]
+
+    assert await db_counts.repair(DRIFT_USER_ID, db_session) == 2
+    assert await db_counts.read_user_count(DRIFT_USER_ID, db_session) == 2
+    assert not [d for d in await db_counts.find_drift(db_session) if d.user_id == DRIFT_USER_ID]
+
+
+@pytest.mark.asyncio
+async def test_repair_creates_a_missing_counter(db_session: AsyncSession):
+    user_id = DRIFT_USER_ID + 1
+    await db_session.execute(insert(DbPost), [{"text": "uncounted", "user_id": user_id}] * 3)
+    assert await db_counts.repair(user_id, db_session) == 3
+    # Increments after the repair add to the recount rather than being overwritten by it
+    await db_counts.increment(user_id, 1, db_session)
+    assert await db_counts.read_user_count(user_id, db_session) == 4
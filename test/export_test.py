@@ -0,0 +1,76 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert
+from db.models import DbPost
+from httpx import AsyncClient
+from db import db_post
+import tracemalloc
+import pytest
+import json
+import csv
+import io
+
+EXPORT_USER_ID = 9001
+
+
+async def seed(db_session: AsyncSession, count: int, user_id: int = EXPORT_USER_ID) -> None:
+    # Left uncommitted: the session fixture rolls these rows back after the test
+    await db_session.execute(
+        insert(DbPost), [{"text": f"export {i}", "user_id": user_id} for i in range(count)]
+    )
+
+
+async def peak_export_memory(db_session: AsyncSession, fetch_size: int) -> tuple[int, int]:
+    rows = 0
+    tracemalloc.start()
+    try:
+        async for chunk in db_post.export_posts("ndjson", EXPORT_USER_ID, None, None, fetch_size, db_session):
+            rows += chunk.count(b"\n")
+        return rows, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_filters_by_user_and_id_range(client: AsyncClient, db_session: AsyncSession):
+    await seed(db_session, 5)
+    await seed(db_session, 2, user_id=EXPORT_USER_ID + 1)
+
+    response = await client.get("/export", params={"user_id": EXPORT_USER_ID})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    posts = [json.loads(line) for line in response.text.splitlines()]
+    assert [p["text"] for p in posts] == [f"export {i}" for i in range(5)]
+    assert {p["user_id"] for p in posts} == {EXPORT_USER_ID}
+
+    ids = [p["id"] for p in posts]
+    response = await client.get(
+        "/export", params={"user_id": EXPORT_USER_ID, "min_id": ids[1], "max_id": ids[3]}
+    )
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ids[1:4]
+
+
+@pytest.mark.asyncio
+async def test_export_csv(client: AsyncClient, db_session: AsyncSession):
+    await seed(db_session, 3)
+
+    response = await client.get("/export", params={"format": "csv", "user_id": EXPORT_USER_ID})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["text"] for row in rows] == ["export 0", "export 1", "export 2"]
+
+
+@pytest.mark.asyncio
+async def test_export_memory_does_not_grow_with_row_count(db_session: AsyncSession):
+    await seed(db_session, 2_000)
+    small_rows, small_peak = await peak_export_memory(db_session, fetch_size=200)
+
+    await seed(db_session, 18_000)
+    large_rows, large_peak = await peak_export_memory(db_session, fetch_size=200)
+
+    assert (small_rows, large_rows) == (2_000, 20_000)
+    # Ten times the rows must not cost anywhere near ten times the memory
+    assert large_peak < small_peak * 2
@@ -0,0 +1,109 @@
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from db.group_commit import GroupCommit, post_writes
+from schemas.schemas_post import PostModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, select
+from db.models import DbPost
+from db import db_post
+from conftest import TEST_DB_URL, TEST_USER_ID
+from httpx import AsyncClient
+import asyncio
+import pytest
+import uuid
+
+
+@pytest.fixture
+async def sessions():
+    engine = create_async_engine(TEST_DB_URL)
+    yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_creates_share_one_commit(client: AsyncClient, sessions, monkeypatch):
+    monkeypatch.setattr(post_writes, "enabled", True)
+    monkeypatch.setattr(post_writes, "sessions", sessions)
+    monkeypatch.setattr(post_writes, "max_delay", 0.05)
+    batches = post_writes.batches
+    before = (await client.get("/count", params={"user_id": TEST_USER_ID})).json()["post_count"]
+
+    texts = [f"grouped post {i}" for i in range(10)]
+    responses = await asyncio.gather(*(client.post("/create", json={"text": text}) for text in texts))
+
+    assert [response.status_code for response in responses] == [201] * 10
+    # Every caller got its own row back
+    assert [response.json()["text"] for response in responses] == texts
+    assert len({response.json()["id"] for response in responses}) == 10
+    assert post_writes.batches == batches + 1
+    assert (await client.get("/count", params={"user_id": TEST_USER_ID})).json()["post_count"] == before + 10
+
+
+@pytest.mark.asyncio
+async def test_keyed_creates_bypass_the_queue(client: AsyncClient, sessions, monkeypatch):
+    monkeypatch.setattr(post_writes, "enabled", True)
+    monkeypatch.setattr(post_writes, "sessions", sessions)
+    rows = post_writes.rows
+
+    response = await client.post("/create", json={"text": "keyed"}, headers={"Idempotency-Key": "group-commit-bypass"})
+    assert response.status_code == 201
+    assert post_writes.rows == rows
+
+
+@pytest.mark.asyncio
+async def test_batch_is_flushed_once_full(sessions):
+    writes = GroupCommit(sessions, enabled=True, max_rows=3, max_delay=60)
+    posts = await asyncio.wait_for(
+        asyncio.gather(*(writes.create(PostModel(text=f"full {i}"), 1) for i in range(3))), timeout=5
+    )
+    assert [post.text for post in posts] == ["full 0", "full 1", "full 2"]
+    assert writes.stats()["batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_row_isolation_only_fails_the_bad_row(sessions):
+    writes = GroupCommit(sessions, enabled=True, max_delay=0.01, isolation="row")
+    # user_id is NOT NULL, so the middle row makes the whole INSERT fail
+    results = await asyncio.gather(
+        writes.create(PostModel(text="good"), 1),
+        writes.create(PostModel(text="bad"), None),
+        writes.create(PostModel(text="also good"), 1),
+        return_exceptions=True,
+    )
+    assert results[0].text == "good"
+    assert isinstance(results[1], IntegrityError)
+    assert results[2].text == "also good"
+    assert writes.stats()["failed_rows"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_isolation_fails_every_row(sessions):
+    writes = GroupCommit(sessions, enabled=True, max_delay=0.01, isolation="batch")
+    results = await asyncio.gather(
+        writes.create(PostModel(text="good"), 1),
+        writes.create(PostModel(text="bad"), None),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, IntegrityError) for result in results)
+    assert writes.stats()["failed_rows"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failing_after_commit_does_not_duplicate_rows(sessions, monkeypatch):
+    async def cache_down(post_id=None):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(db_post, "after_commit", cache_down)
+    writes = GroupCommit(sessions, enabled=True, max_delay=0.01, isolation="row")
+    texts = [f"after commit {uuid.uuid4()}" for _ in range(3)]
+    posts = await asyncio.gather(*(writes.create(PostModel(text=text), 1) for text in texts))
+
+    assert [post.text for post in posts] == texts
+    assert writes.stats()["failed_batches"] == 0
+    async with sessions() as db:
+        count = await db.scalar(select(func.count()).select_from(DbPost).where(DbPost.text.in_(texts)))
+    assert count == 3
+
+
+def test_rejects_unknown_isolation():
+    with pytest.raises(ValueError):
+        GroupCommit(isolation="savepoint")
@@ -0,0 +1,110 @@
+from sqlalchemy.ext.asyncio import AsyncEngine
+from db.database import create_engine_from_env
+from db.health import DatabaseHealth, database_health
+from conftest import TEST_DB_URL
+from httpx import AsyncClient
+from sqlalchemy import text
+import asyncio
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_liveness_does_not_touch_the_database(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(database_health, "ping", None)
+    response = await client.get("/livez")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+@pytest.mark.asyncio
+async def test_readiness_answers_from_the_cached_check(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(database_health, "checked_at", None)
+    response = await client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["reason"]
+
+    try:
+        await database_health.check()
+    finally:
+        # Otherwise the probe's aiosqlite connection thread outlives the test session
+        await database_health.close()
+    pings: list[bool] = []
+    monkeypatch.setattr(database_health, "ping", lambda: pings.append(True))
+    for _ in range(3):
+        response = await client.get("/readyz")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+    assert not pings
+
+
+@pytest.mark.asyncio
+async def test_readiness_fails_when_the_database_is_unreachable():
+    health = DatabaseHealth(create_engine_from_env("sqlite+aiosqlite:////nonexistent/dir/post.db"))
+    await health.check()
+    assert not health.is_ready()
+    assert "database check failed" in health.reason
+    await health.close()
+    await health.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_readiness_fails_when_the_pool_is_saturated():
+    engine: AsyncEngine = create_engine_from_env(TEST_DB_URL, pool_size=1, max_overflow=0)
+    health = DatabaseHealth(engine, max_pool_wait=0.01)
+
+    async def hold_connection() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await asyncio.sleep(0.05)
+
+    try:
+        await asyncio.gather(*(hold_connection() for _ in range(4)))
+        await health.check()
+        assert not health.is_ready()
+        assert "pool saturated" in health.reason
+        # Nothing waited since the last check
+        await health.check()
+        assert health.is_ready()
+    finally:
+        await health.close()
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_ping_does_not_wait_for_a_saturated_pool():
+    engine: AsyncEngine = create_engine_from_env(TEST_DB_URL, pool_size=1, max_overflow=0)
+    health = DatabaseHealth(engine)
+    try:
+        # Every pooled connection is busy: the ping must still get through, and not count as a checkout
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            checkouts = engine.pool.checkouts
+            await asyncio.wait_for(health.check(), timeout=5)
+            assert health.is_ready(), health.reason
+            assert engine.pool.checkouts == checkouts
+    finally:
+        await health.close()
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_readiness_fails_when_too_many_checkouts_error():
+    engine: AsyncEngine = create_engine_from_env(TEST_DB_URL)
+    health = DatabaseHealth(engine, max_error_rate=0.5, min_checkouts=4)
+    try:
+        for _ in range(4):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            health.record_error()
+        await health.check()
+        assert not health.is_ready()
+        assert "database error" in health.reason
+
+        # A stale result does not count as ready either
+        await health.check()
+        assert health.is_ready()
+        health.checked_at -= 3 * health.interval + 1
+        assert not health.is_ready()
+    finally:
+        await health.close()
+        await engine.dispose()
@@ -0,0 +1,170 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from schemas.schemas_post import PostDisplay
+from db.models import DbIdempotencyKey
+from datetime import datetime, timedelta, timezone
+from httpx import AsyncClient
+from db import db_post, idempotency
+import asyncio
+import pytest
+import uuid
+
+
+def key_header() -> dict[str, str]:
+    return {"Idempotency-Key": str(uuid.uuid4())}
+
+
+async def user_count(client: AsyncClient) -> int:
+    return (await client.get("/count", params={"user_id": 1})).json()["post_count"]
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_retried_create_replays_the_first_response(client: AsyncClient):
+    headers = key_header()
+    start = await user_count(client)
+
+    first = await client.post("/create", json={"text": "once"}, headers=headers)
+    retry = await client.post("/create", json={"text": "once"}, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers[idempotency.REPLAY_HEADER] == "true"
+    assert idempotency.REPLAY_HEADER not in first.headers
+    assert await user_count(client) == start + 1
+
+
+@pytest.mark.asyncio
+async def test_without_a_key_every_request_writes(client: AsyncClient):
+    first = await client.post("/create", json={"text": "twice"})
+    second = await client.post("/create", json={"text": "twice"})
+    assert first.json()["id"] != second.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_key_reused_with_another_request_is_rejected(client: AsyncClient):
+    headers = key_header()
+    await client.post("/create", json={"text": "original"}, headers=headers)
+
+    response = await client.post("/create", json={"text": "something else"}, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_and_delete_replay(client: AsyncClient):
+    headers = key_header()
+    first = await client.post("/create_bulk", json=[{"text": "b1"}, {"text": "b2"}], headers=headers)
+    retry = await client.post("/create_bulk", json=[{"text": "b1"}, {"text": "b2"}], headers=headers)
+    assert retry.json() == first.json()
+    post_id = first.json()["items"][0]["id"]
+
+    headers = key_header()
+    first = await client.put("/update", params={"post_id": post_id}, json={"text": "new"}, headers=headers)
+    retry = await client.put("/update", params={"post_id": post_id}, json={"text": "new"}, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+
+    headers = key_header()
+    first = await client.delete("/delete", params={"post_id": post_id}, headers=headers)
+    retry = await client.delete("/delete", params={"post_id": post_id}, headers=headers)
+    assert first.status_code == retry.status_code == 204
+    assert retry.content == b""
+    # A new key is a new request: the post is gone now
+    response = await client.delete("/delete", params={"post_id": post_id}, headers=key_header())
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_not_stored(client: AsyncClient):
+    headers = key_header()
+    response = await client.put("/update", params={"post_id": 987654321}, json={"text": "x"}, headers=headers)
+    assert response.status_code == 404
+
+    post = (await client.post("/create", json={"text": "late"})).json()
+    response = await client.patch("/patch", params={"post_id": post["id"]}, json={"text": "y"}, headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_run_once(client: AsyncClient):
+    headers = key_header()
+    start = await user_count(client)
+
+    responses = await asyncio.gather(*(
+        client.post("/create", json={"text": "stampede"}, headers=headers) for _ in range(50)
+    ))
+
+    assert {r.status_code for r in responses} == {201}
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert sum(idempotency.REPLAY_HEADER in r.headers for r in responses) == 49
+    assert await user_count(client) == start + 1
+    assert len(idempotency.in_flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_in_flight_key_of_another_worker_times_out(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    key = str(uuid.uuid4())
+    db_session.add(DbIdempotencyKey(
+        user_id=1, key=key, fingerprint="pending",
+        expires_at=datetime.now(timezone.utc) + timedelta(minutes=1),
+    ))
+    await db_session.commit()
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+
+    response = await client.post("/create", json={"text": "blocked"}, headers={"Idempotency-Key": key})
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_expired_keys_are_forgotten(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    headers = key_header()
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_TTL_SECONDS", -1)
+
+    first = await client.post("/create", json={"text": "expiring"}, headers=headers)
+    second = await client.post("/create", json={"text": "expiring"}, headers=headers)
+    assert first.json()["id"] != second.json()["id"]
+    assert idempotency.REPLAY_HEADER not in second.headers
+
+    assert await idempotency.purge_expired(db_session, batch_size=1000) >= 1
+    assert await db_session.get(DbIdempotencyKey, (1, headers["Idempotency-Key"])) is None
+
+
+@pytest.mark.asyncio
+async def test_failure_storing_the_response_keeps_neither_post_nor_key(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    headers = key_header()
+    start = await user_count(client)
+
+    to_json = idempotency.to_json
+
+    def fail(value):
+        if isinstance(value, PostDisplay):
+            raise RuntimeError("response could not be stored")
+        return to_json(value)
+
+    # The post, the key and the response are one transaction: nothing of the write survives
+    monkeypatch.setattr(idempotency, "to_json", fail)
+    with pytest.raises(RuntimeError):
+        await client.post("/create", json={"text": "all or nothing"}, headers=headers)
+    assert await user_count(client) == start
+    assert await db_session.get(DbIdempotencyKey, (1, headers["Idempotency-Key"])) is None
+
+    monkeypatch.undo()
+    retry = await client.post("/create", json={"text": "all or nothing"}, headers=headers)
+    assert retry.status_code == 201
+    assert idempotency.REPLAY_HEADER not in retry.headers
+    assert await user_count(client) == start + 1
+
+
+@pytest.mark.asyncio
+async def test_other_constraint_violations_are_not_taken_for_a_duplicate_key(client: AsyncClient, monkeypatch):
+    async def violate(*args, **kwargs):
+        raise IntegrityError("INSERT INTO post ...", {}, Exception("CHECK constraint failed"))
+
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 5)
+    monkeypatch.setattr(db_post, "create", violate)
+    response = await client.post("/create", json={"text": "conflict"}, headers=key_header())
+    # Straight to the IntegrityError handler, not a wait for a response that will never come
+    assert response.status_code == 409
+    assert "in progress" not in response.json()["detail"]
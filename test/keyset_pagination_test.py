@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from db.pagination import encode_cursor
+from db.db_post import feed_query
+from httpx import AsyncClient
+from db import pagination
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cursor_secret(monkeypatch):
+    monkeypatch.setattr(pagination, "CURSOR_SECRET", "test-secret")
+
+
+async def read_feed(client: AsyncClient, **params) -> list[dict]:
+    """Follows next_cursor until the last page and returns every item."""
+    items: list[dict] = []
+    cursor = None
+    while True:
+        response = await client.get("/read_posts", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        items.extend(body["items"])
+        if not body["has_more"]:
+            return items
+        cursor = body["next_cursor"]
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_read_posts_walks_every_post_once_newest_first(client: AsyncClient):
+    since = datetime.now(timezone.utc).isoformat()
+    await client.post("/create_bulk", json=[{"text": f"feed {i}"} for i in range(7)])
+
+    everything = await read_feed(client, limit=100, since=since)
+    paged = await read_feed(client, limit=3, since=since)
+
+    assert len(everything) == 7
+    assert paged == everything
+    keys = [(item["timestamp"], item["id"]) for item in paged]
+    assert keys == sorted(keys, reverse=True)
+    assert len({item["id"] for item in paged}) == len(paged)
+
+
+@pytest.mark.asyncio
+async def test_read_posts_filters_by_user(client: AsyncClient):
+    await client.post("/create", json={"text": "mine"})
+    items = await read_feed(client, limit=2, user_id=1)
+    assert items and all(item["user_id"] == 1 for item in items)
+    assert await read_feed(client, limit=2, user_id=424242) == []
+
+
+@pytest.mark.asyncio
+async def test_read_posts_filters_by_time_window(client: AsyncClient):
+    before = datetime.now(timezone.utc)
+    response = await client.post("/create", json={"text": "in window"})
+    after = datetime.now(timezone.utc) + timedelta(seconds=1)
+
+    items = await read_feed(client, limit=5, since=before.isoformat(), until=after.isoformat())
+    assert [item["id"] for item in items] == [response.json()["id"]]
+
+
+@pytest.mark.asyncio
+async def test_read_posts_rejects_tampered_cursor(client: AsyncClient):
+    cursor = encode_cursor(datetime.now(timezone.utc), 5)
+    payload, signature = cursor.split(".")
+    forged = encode_cursor(datetime.now(timezone.utc), 999).split(".")[0]
+
+    for bad in (f"{forged}.{signature}", "garbage", f"{payload}.x"):
+        response = await client.get("/read_posts", params={"limit": 2, "cursor": bad})
+        assert response.status_code == 400
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"user_id": 1},
+        {"after": True},
+        {"user_id": 1, "after": True},
+        {"since": True, "until": True},
+        {"user_id": 1, "since": True, "until": True, "after": True},
+    ],
+)
+async def test_page_queries_use_an_index_without_sorting(db_session: AsyncSession, params: dict):
+    now = datetime.now(timezone.utc)
+    query = feed_query(
+        20,
+        after=(now, 10) if params.get("after") else None,
+        user_id=params.get("user_id"),
+        since=now - timedelta(days=1) if params.get("since") else None,
+        until=now if params.get("until") else None,
+    )
+    compiled = query.compile(db_session.bind, compile_kwargs={"literal_binds": True})
+    result = await db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+    plan = [row[-1] for row in result.all()]
+
+    assert plan
+    for step in plan:
+        assert "TEMP B-TREE" not in step, plan
+        assert "USING INDEX ix_post_" in step and "timestamp_id" in step, plan
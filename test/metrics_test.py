@@ -0,0 +1,57 @@
+from sqlalchemy.ext.asyncio import create_async_engine
+from monitoring.metrics import PoolCollector, instrument_engine, render_metrics
+from prometheus_client import REGISTRY, values
+from conftest import TEST_DB_URL
+from httpx import AsyncClient
+from sqlalchemy import text
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_requests_by_route_template(client: AsyncClient):
+    await client.get("/read_post_by_id", params={"post_id": 987654})
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'post_api_requests_total{method="GET",route="/read_post_by_id",status="404"}' in body
+    assert 'post_api_request_duration_seconds_bucket{le="0.001",method="GET",route="/read_post_by_id",status="404"}' in body
+    assert "post_api_requests_in_flight" in body
+    assert "post_api_db_pool_checked_out" in body
+    assert "987654" not in body
+
+
+@pytest.mark.asyncio
+async def test_unmatched_routes_share_one_label(client: AsyncClient):
+    await client.get("/no/such/route/123")
+    response = await client.get("/metrics")
+    assert 'route="unmatched",status="404"' in response.text
+    assert "/no/such/route" not in response.text
+
+
+@pytest.mark.asyncio
+async def test_db_queries_are_timed_by_statement_type():
+    engine = create_async_engine(TEST_DB_URL)
+    instrument_engine(engine)
+    sample = ("post_api_db_query_duration_seconds_count", {"statement": "SELECT"})
+    before = REGISTRY.get_sample_value(*sample) or 0
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    finally:
+        await engine.dispose()
+    assert REGISTRY.get_sample_value(*sample) == before + 1
+
+
+def test_pool_stats_reach_multiprocess_scrapes(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    # The value class is picked when prometheus_client is imported, before the variable was set
+    monkeypatch.setattr(values, "ValueClass", values.MultiProcessValue())
+    pool = PoolCollector(lambda: {"checked_out": 3, "checkout_wait_seconds_max": 0.5})
+
+    body, _ = render_metrics(pool)
+
+    assert b"post_api_db_pool_checked_out 3.0" in body
+    assert b"post_api_db_pool_checkout_wait_seconds_max 0.5" in body
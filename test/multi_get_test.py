@@ -0,0 +1,31 @@
+from httpx import AsyncClient
+from router import post
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_read_posts_by_ids_keeps_order_and_marks_missing(client: AsyncClient):
+    response = await client.post("/create_bulk", json=[{"text": f"multi {i}"} for i in range(3)])
+    created = response.json()["items"]
+    missing_id = created[-1]["id"] + 1000
+    ids = [created[2]["id"], missing_id, created[0]["id"], created[2]["id"]]
+
+    response = await client.get("/read_posts_by_ids", params={"ids": ids})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["items"] == [created[2], None, created[0], created[2]]
+    assert body["missing"] == [missing_id]
+
+
+@pytest.mark.asyncio
+async def test_read_posts_by_ids_enforces_max_ids(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(post, "MULTI_GET_MAX_IDS", 2)
+    response = await client.get("/read_posts_by_ids", params={"ids": [1, 2, 3]})
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_read_posts_by_ids_requires_ids(client: AsyncClient):
+    response = await client.get("/read_posts_by_ids")
+    assert response.status_code == 422
@@ -0,0 +1,158 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, literal, select
+from db.models import DbPostEvent
+from prometheus_client import REGISTRY
+from db import outbox, pagination
+from httpx import AsyncClient
+import asyncio
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cursor_secret(monkeypatch):
+    monkeypatch.setattr(pagination, "CURSOR_SECRET", "test-secret")
+
+
+async def latest_cursor(client: AsyncClient) -> str | None:
+    cursor = None
+    while True:
+        page = (await client.get("/events", params={"after": cursor, "limit": 1000})).json()
+        if not page["items"]:
+            return cursor
+        cursor = page["next_cursor"]
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_every_write_appends_an_event(client: AsyncClient):
+    cursor = await latest_cursor(client)
+
+    post = (await client.post("/create", json={"text": "first"})).json()
+    await client.post("/create_bulk", json=[{"text": "b1"}, {"text": "b2"}])
+    await client.put("/update", params={"post_id": post["id"]}, json={"text": "second"})
+    await client.patch("/patch", params={"post_id": post["id"]}, json={"text": "third"})
+    await client.delete("/delete", params={"post_id": post["id"]})
+    # A failed write leaves no event behind
+    await client.delete("/delete", params={"post_id": post["id"]})
+
+    page = (await client.get("/events", params={"after": cursor})).json()
+    assert [(e["event_type"], e["text"]) for e in page["items"]] == [
+        ("created", "first"),
+        ("created", "b1"),
+        ("created", "b2"),
+        ("updated", "second"),
+        ("updated", "third"),
+        ("deleted", None),
+    ]
+
+    cursor = page["next_cursor"]
+    page = (await client.get("/events", params={"after": cursor})).json()
+    assert page == {"items": [], "next_cursor": cursor}
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected(client: AsyncClient):
+    response = await client.get("/events", params={"after": "42"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_event_committed_out_of_id_order_is_not_skipped(client: AsyncClient, db_session: AsyncSession, monkeypatch):
+    # Transaction A takes the lower id, then B inserts and commits while A is still open.
+    # SQLite serializes writers, so the two commits are replayed with the txids and the
+    # in-flight horizon PostgreSQL would have reported at each step.
+    cursor = await latest_cursor(client)
+    last_id = (await db_session.execute(select(func.max(DbPostEvent.id)))).scalar_one() or 0
+    txid_a, txid_b = 10**12, 10**12 + 1
+    id_a, id_b = last_id + 1, last_id + 2
+
+    def event(event_id: int, txid: int, text: str) -> DbPostEvent:
+        return DbPostEvent(id=event_id, txid=txid, event_type="created", post_id=event_id, user_id=1, text=text)
+
+    try:
+        # B committed, A still running: the oldest transaction in flight is A
+        db_session.add(event(id_b, txid_b, "B"))
+        await db_session.commit()
+        monkeypatch.setattr(outbox, "visible_horizon", lambda db: literal(txid_a))
+        page = (await client.get("/events", params={"after": cursor})).json()
+        assert page == {"items": [], "next_cursor": cursor}
+
+        # A commits, nothing is in flight any more
+        db_session.add(event(id_a, txid_a, "A"))
+        await db_session.commit()
+        monkeypatch.setattr(outbox, "visible_horizon", lambda db: literal(txid_b + 1))
+        page = (await client.get("/events", params={"after": cursor})).json()
+        assert [(e["id"], e["text"]) for e in page["items"]] == [(id_a, "A"), (id_b, "B")]
+    finally:
+        await db_session.execute(delete(DbPostEvent).where(DbPostEvent.id.in_([id_a, id_b])))
+        await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_long_poll_returns_when_a_change_arrives(client: AsyncClient):
+    cursor = await latest_cursor(client)
+
+    poll = asyncio.create_task(client.get("/events", params={"after": cursor, "wait": 5}))
+    await asyncio.sleep(0.1)
+    assert not poll.done()
+
+    await client.post("/create", json={"text": "wake up"})
+    response = await asyncio.wait_for(poll, timeout=2)
+    assert [e["text"] for e in response.json()["items"]] == ["wake up"]
+
+
+@pytest.mark.asyncio
+async def test_long_poll_times_out_with_an_empty_page(client: AsyncClient):
+    cursor = await latest_cursor(client)
+    response = await client.get("/events", params={"after": cursor, "wait": 0.2})
+    assert response.json() == {"items": [], "next_cursor": cursor}
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_batches_once(client: AsyncClient, db_session: AsyncSession):
+    sink = outbox.QueueSink()
+    # Flush whatever earlier tests left in the outbox
+    await outbox.relay(sink, db_session)
+    sink = outbox.QueueSink()
+
+    await client.post("/create_bulk", json=[{"text": f"relay {i}"} for i in range(5)])
+
+    assert await outbox.relay(sink, db_session, batch_size=2) == 5
+    batches = [sink.queue.get_nowait() for _ in range(sink.queue.qsize())]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [e.text for batch in batches for e in batch] == [f"relay {i}" for i in range(5)]
+
+    assert await outbox.relay(sink, db_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_publish_keeps_events_for_retry(client: AsyncClient, db_session: AsyncSession):
+    await outbox.relay(outbox.QueueSink(), db_session)
+    await client.post("/create", json={"text": "retry me"})
+
+    class BrokenSink:
+        async def publish(self, events):
+            raise ConnectionError("sink down")
+
+    with pytest.raises(ConnectionError):
+        await outbox.relay_batch(BrokenSink(), db_session)
+
+    sink = outbox.QueueSink()
+    assert await outbox.relay(sink, db_session) == 1
+    assert sink.queue.get_nowait()[0].text == "retry me"
+
+
+@pytest.mark.asyncio
+async def test_old_open_transaction_is_reported(client: AsyncClient, monkeypatch, caplog):
+    async def lagging(db):
+        return 600.0
+
+    monkeypatch.setattr(outbox, "horizon_lag", lagging)
+    cursor = await latest_cursor(client)
+    with caplog.at_level("WARNING", logger="db.outbox"):
+        response = await client.get("/events", params={"after": cursor})
+    assert response.json()["items"] == []
+    assert "open for 600s" in caplog.text
+    assert REGISTRY.get_sample_value("post_api_outbox_horizon_lag_seconds") == 600.0
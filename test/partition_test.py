@@ -0,0 +1,27 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from db.models import DbPost, DbPostEvent, partition_ddl
+from sqlalchemy.schema import CreateTable
+
+
+def create_table(table, dialect) -> str:
+    return " ".join(str(CreateTable(table).compile(dialect=dialect)).split())
+
+
+def test_postgresql_post_table_is_hash_partitioned_by_user():
+    ddl = create_table(DbPost.__table__, postgresql.dialect())
+    assert "CONSTRAINT pk_post PRIMARY KEY (id, user_id)" in ddl
+    assert ddl.endswith("PARTITION BY HASH (user_id)")
+    assert "id SERIAL NOT NULL" in ddl
+
+
+def test_other_tables_and_sqlite_keep_their_primary_key():
+    assert "PRIMARY KEY (id)" in create_table(DbPostEvent.__table__, postgresql.dialect())
+    # SQLite has no partitioning: `id` stays its auto-incrementing rowid
+    assert "CONSTRAINT pk_post PRIMARY KEY (id)" in create_table(DbPost.__table__, sqlite.dialect())
+    assert DbPost.__mapper__.primary_key == (DbPost.__table__.c.id,)
+
+
+def test_partition_ddl_covers_every_remainder():
+    statements = partition_ddl("post", 4)
+    assert statements[0] == "CREATE TABLE post_p00 PARTITION OF post FOR VALUES WITH (MODULUS 4, REMAINDER 0)"
+    assert [s.split("REMAINDER ")[1] for s in statements] == ["0)", "1)", "2)", "3)"]
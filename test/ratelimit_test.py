@@ -0,0 +1,77 @@
+from auth.ratelimit import MemoryBuckets, RateLimit, parse_limits, rate_limit
+from db.database import get_async_db
+from httpx import AsyncClient
+from main import app
+import pytest
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(rate_limit, "backend", MemoryBuckets())
+    monkeypatch.setattr(rate_limit, "limits", parse_limits("create:3/60,delete:1/60"))
+    return rate_limit.limits
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_create_is_limited_per_user(client: AsyncClient, limits):
+    for i in range(3):
+        response = await client.post("/create", json={"text": f"burst {i}"})
+        assert response.status_code == 201
+
+    response = await client.post("/create", json={"text": "one too many"})
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["retry-after"]) <= 20
+
+    # Unlisted routes and other limits are independent
+    response = await client.post("/create_bulk", json=[{"text": "bulk"}])
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_rejected_request_never_opens_a_session(client: AsyncClient, limits):
+    sessions = 0
+    override = app.dependency_overrides[get_async_db]
+
+    async def counting_get_async_db():
+        nonlocal sessions
+        sessions += 1
+        async for db in override():
+            yield db
+
+    app.dependency_overrides[get_async_db] = counting_get_async_db
+    await client.delete("/delete", params={"post_id": 987654321})
+    assert sessions == 1
+
+    response = await client.delete("/delete", params={"post_id": 987654321})
+    assert response.status_code == 429
+    assert sessions == 1
+
+
+@pytest.mark.asyncio
+async def test_bucket_refills_over_time(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("auth.ratelimit.time.monotonic", lambda: clock[0])
+    buckets, limit = MemoryBuckets(), RateLimit(requests=2, seconds=1)
+
+    assert await buckets.acquire("k", limit) == 0
+    assert await buckets.acquire("k", limit) == 0
+    assert await buckets.acquire("k", limit) == pytest.approx(0.5)
+
+    clock[0] += 0.5
+    assert await buckets.acquire("k", limit) == 0
+    assert await buckets.acquire("other", limit) == 0
+
+
+def test_parse_limits_rejects_garbage():
+    assert parse_limits(" create:20/1 , patch:5/0.5 ") == {
+        "create": RateLimit(20, 1.0),
+        "patch": RateLimit(5, 0.5),
+    }
+    with pytest.raises(ValueError):
+        parse_limits("create=20")
+    for spec in ("create:0/1", "create:5/0", "create:-1/1", "create:5/-2", "create:5/nan"):
+        with pytest.raises(ValueError, match="must be positive"):
+            parse_limits(spec)
@@ -0,0 +1,26 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from httpx import AsyncClient
+from db import db_post
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_core_and_orm_read_paths_return_the_same_page(client: AsyncClient, db_session: AsyncSession):
+    await client.post("/create_bulk", json=[{"text": f"read path {i}"} for i in range(5)])
+
+    orm = await db_post.read_all_posts(3, None, db_session, "orm")
+    core = await db_post.read_all_posts(3, None, db_session, "core")
+    assert core.model_dump() == orm.model_dump()
+
+    orm = await db_post.read_all_posts(3, orm.next_cursor, db_session, "orm")
+    core = await db_post.read_all_posts(3, core.next_cursor, db_session, "core")
+    assert core.model_dump_json() == orm.model_dump_json()
+
+
+@pytest.mark.asyncio
+async def test_core_and_orm_read_post_by_id_match(client: AsyncClient, db_session: AsyncSession):
+    created = (await client.post("/create", json={"text": "single read path"})).json()
+
+    orm = await db_post.read_post_by_id(created["id"], db_session, "orm")
+    core = await db_post.read_post_by_id(created["id"], db_session, "core")
+    assert core.model_dump() == orm.model_dump() == created
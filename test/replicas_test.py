@@ -0,0 +1,161 @@
+from db.replicas import RecentWriters, Replica, ReplicaSet
+from auth.oauth2 import get_optional_user
+from db.cache import MemoryCache, post_cache
+from db.database import Base
+from db.models import DbPost
+from conftest import TEST_USER_ID
+from httpx import AsyncClient
+from sqlalchemy import insert
+from db import replicas as replica_module
+from db.singleflight import post_reads
+from main import app
+import asyncio
+import pytest
+
+REPLICA_POST_ID = 900001
+
+
+@pytest.fixture
+async def replica_set(tmp_path, monkeypatch):
+    """Two SQLite files standing in for replicas, each holding its own copy of one post."""
+    replica_set = replica_module.replicas
+    monkeypatch.setattr(replica_set, "replicas", [Replica(f"sqlite+aiosqlite:///{tmp_path}/replica_{name}.db") for name in ("a", "b")])
+    monkeypatch.setattr(replica_set, "selection", "round_robin")
+    for replica, name in zip(replica_set.replicas, ("a", "b")):
+        async with replica.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(DbPost).values(id=REPLICA_POST_ID, text=f"from {name}", user_id=TEST_USER_ID))
+
+    monkeypatch.setattr(replica_module, "recent_writers", RecentWriters(MemoryCache()))
+    yield replica_set
+    await replica_set.dispose()
+
+
+async def read_replica_post(client: AsyncClient) -> str:
+    response = await client.get("/read_post_by_id", params={"post_id": REPLICA_POST_ID})
+    assert response.status_code == 200
+    return response.json()["text"]
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_reads_alternate_between_replicas(client: AsyncClient, replica_set: ReplicaSet):
+    assert {await read_replica_post(client) for _ in range(4)} == {"from a", "from b"}
+    # The primary does not have the post at all
+    for replica in replica_set.replicas:
+        replica_set.eject(replica, "test")
+    response = await client.get("/read_post_by_id", params={"post_id": REPLICA_POST_ID})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_is_ejected_until_it_catches_up(client: AsyncClient, replica_set: ReplicaSet, monkeypatch):
+    lags = {replica.name: 0.0 for replica in replica_set.replicas}
+    lagging = replica_set.replicas[0]
+
+    async def measure_lag(replica) -> float:
+        return lags[replica.name]
+
+    monkeypatch.setattr(replica_set, "measure_lag", measure_lag)
+    lags[lagging.name] = replica_set.max_lag + 1
+    await replica_set.check()
+    assert not lagging.healthy
+    assert {await read_replica_post(client) for _ in range(4)} == {"from b"}
+
+    lags[lagging.name] = 0.0
+    await replica_set.check()
+    assert lagging.healthy
+    assert {await read_replica_post(client) for _ in range(4)} == {"from a", "from b"}
+
+
+@pytest.mark.asyncio
+async def test_real_lag_check_and_stats(client: AsyncClient, replica_set: ReplicaSet):
+    await replica_set.check()
+    assert all(replica.healthy and replica.lag == 0 for replica in replica_set.replicas)
+
+    response = await client.get("/replicas/stats")
+    assert response.status_code == 200
+    assert [stats["healthy"] for stats in response.json().values()] == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_least_connections_picks_the_idlest_replica(replica_set: ReplicaSet, monkeypatch):
+    monkeypatch.setattr(replica_set, "selection", "least_connections")
+    busy, idle = replica_set.replicas
+    busy.in_use = 3
+    assert all(replica_set.pick() is idle for _ in range(3))
+
+    idle.healthy = False
+    assert replica_set.pick() is busy
+
+
+@pytest.mark.asyncio
+async def test_reads_fall_back_to_the_primary_when_every_replica_is_down(client: AsyncClient, replica_set: ReplicaSet):
+    for replica in replica_set.replicas:
+        replica_set.eject(replica, "test")
+    response = await client.post("/create", json={"text": "written to the primary"})
+    response = await client.get("/read_post_by_id", params={"post_id": response.json()["id"]})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_writer_reads_its_own_writes_from_the_primary(client: AsyncClient, replica_set: ReplicaSet):
+    response = await client.post("/create", json={"text": "not replicated yet"})
+    assert response.status_code == 201
+    post_id = response.json()["id"]
+
+    # Anonymous readers are served by the replicas, which do not have the post yet
+    response = await client.get("/read_post_by_id", params={"post_id": post_id})
+    assert response.status_code == 404
+
+    app.dependency_overrides[get_optional_user] = lambda: TEST_USER_ID
+    response = await client.get("/read_post_by_id", params={"post_id": post_id})
+    assert response.status_code == 200
+    assert response.json()["text"] == "not replicated yet"
+
+    app.dependency_overrides[get_optional_user] = lambda: TEST_USER_ID + 1
+    response = await client.get("/read_post_by_id", params={"post_id": post_id})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_reads_neither_fill_the_cache_nor_serve_the_writer(client: AsyncClient, replica_set: ReplicaSet, monkeypatch):
+    monkeypatch.setattr(post_cache, "backend", MemoryCache())
+    response = await client.post("/create", json={"text": "new"})
+    post_id = response.json()["id"]
+    # Both replicas still have the row as it was before the write
+    for replica in replica_set.replicas:
+        async with replica.engine.begin() as conn:
+            await conn.execute(insert(DbPost).values(id=post_id, text="old", user_id=TEST_USER_ID))
+
+    # Hold the anonymous replica read between its query and its cache store
+    release = asyncio.Event()
+    set_post = post_cache.set_post
+
+    async def slow_set_post(post, generation) -> None:
+        if post.text == "old":
+            await release.wait()
+        await set_post(post, generation)
+
+    monkeypatch.setattr(post_cache, "set_post", slow_set_post)
+    app.dependency_overrides[get_optional_user] = lambda: None
+    anonymous = asyncio.create_task(client.get("/read_post_by_id", params={"post_id": post_id}))
+    while not post_reads._calls:
+        await asyncio.sleep(0.01)
+
+    # The writer does not join the in-flight replica read
+    app.dependency_overrides[get_optional_user] = lambda: TEST_USER_ID
+    response = await client.get("/read_post_by_id", params={"post_id": post_id})
+    assert response.json()["text"] == "new"
+
+    release.set()
+    assert (await anonymous).json()["text"] == "old"
+    # Only the writer's primary read was cached
+    assert (await post_cache.get_post(post_id)).text == "new"
+
+
+def test_unknown_selection_is_rejected():
+    with pytest.raises(ValueError):
+        ReplicaSet([], selection="random")
@@ -0,0 +1,50 @@
+from router.responses import PydanticJSONResponse, Responder
+from schemas.schemas_post import PostDisplay
+from httpx import AsyncClient
+from router import post
+import pytest
+
+
+@pytest.fixture
+def fast_responses(monkeypatch):
+    monkeypatch.setattr(post.respond, "fast", True)
+
+
+@pytest.mark.asyncio
+async def test_fast_path_matches_default_responses(client: AsyncClient, monkeypatch):
+    created = await client.post("/create", json={"text": "fast json"})
+    post_id = created.json()["id"]
+    requests = [
+        ("GET", "/read_post_by_id", {"post_id": post_id}),
+        ("GET", "/read_all_posts", {"limit": 5}),
+        ("GET", "/read_posts_by_ids", {"ids": [post_id, post_id + 10_000]}),
+    ]
+
+    default = [await client.request(method, url, params=params) for method, url, params in requests]
+    monkeypatch.setattr(post.respond, "fast", True)
+    fast = [await client.request(method, url, params=params) for method, url, params in requests]
+
+    for slow_response, fast_response in zip(default, fast):
+        assert fast_response.status_code == slow_response.status_code == 200
+        assert fast_response.json() == slow_response.json()
+
+
+@pytest.mark.asyncio
+async def test_fast_path_keeps_status_codes(client: AsyncClient, fast_responses):
+    response = await client.post("/create", json={"text": "fast create"})
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/json"
+
+    response = await client.post("/create_bulk", json=[{"text": "fast bulk"}])
+    assert response.status_code == 201
+    assert response.json()["items"][0]["text"] == "fast bulk"
+
+
+def test_responder_is_configured_per_router(monkeypatch):
+    monkeypatch.setenv("FEED_RESPONSE_CLASS", "fast")
+    assert Responder("feed").response_class is PydanticJSONResponse
+    assert Responder("other").fast is False
+
+    model = PostDisplay(id=1, text="a", user_id=2)
+    assert Responder("other")(model) is model
+    assert Responder("feed")(model).body == b'{"id":1,"text":"a","user_id":2}'
@@ -0,0 +1,84 @@
+from sqlalchemy.dialects import postgresql
+from db.search import fts5_query, search_query
+from httpx import AsyncClient
+from db import pagination
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cursor_secret(monkeypatch):
+    monkeypatch.setattr(pagination, "CURSOR_SECRET", "test-secret")
+
+
+async def search_all(client: AsyncClient, q: str, limit: int) -> list[dict]:
+    items: list[dict] = []
+    params: dict = {"q": q, "limit": limit}
+    while True:
+        response = await client.get("/search", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        items.extend(body["items"])
+        if not body["has_more"]:
+            return items
+        params["cursor"] = body["next_cursor"]
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_better_matches_first(client: AsyncClient):
+    await client.post("/create_bulk", json=[
+        {"text": "zebraquartz"},
+        {"text": "a long post that mentions zebraquartz once among many other words"},
+        {"text": "nothing relevant here"},
+        {"text": "zebraquartz zebraquartz zebraquartz"},
+    ])
+
+    items = await search_all(client, "zebraquartz", limit=10)
+
+    assert len(items) == 3
+    assert items[0]["text"] == "zebraquartz zebraquartz zebraquartz"
+    assert items[-1]["text"].startswith("a long post")
+    ranks = [item["rank"] for item in items]
+    assert ranks == sorted(ranks, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_search_keyset_pages_cover_every_match_once(client: AsyncClient):
+    await client.post("/create_bulk", json=[{"text": f"marmotflux number {i}"} for i in range(7)])
+
+    everything = await search_all(client, "marmotflux", limit=100)
+    paged = await search_all(client, "marmotflux", limit=2)
+
+    assert len(everything) == 7
+    assert paged == everything
+
+
+@pytest.mark.asyncio
+async def test_search_follows_updates_and_deletes(client: AsyncClient):
+    created = (await client.post("/create", json={"text": "before okapiwhirl"})).json()
+    await client.put("/update", params={"post_id": created["id"]}, json={"text": "after lynxdrift"})
+
+    assert await search_all(client, "okapiwhirl", limit=5) == []
+    assert [p["id"] for p in await search_all(client, "lynxdrift", limit=5)] == [created["id"]]
+
+    await client.delete("/delete", params={"post_id": created["id"]})
+    assert await search_all(client, "lynxdrift", limit=5) == []
+
+
+@pytest.mark.asyncio
+async def test_search_ignores_query_syntax(client: AsyncClient):
+    response = await client.get("/search", params={"q": '" OR * NEAR( -'})
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+
+def test_fts5_query_quotes_every_word():
+    assert fts5_query('cool "video" OR -x*') == '"cool" "video" "OR" "x"'
+
+
+def test_postgres_query_uses_the_generated_column():
+    sql = str(search_query("postgresql", "cool video", 10).compile(dialect=postgresql.dialect()))
+    assert "post.search_vector @@ websearch_to_tsquery" in sql
+    assert "ts_rank_cd(post.search_vector" in sql
@@ -0,0 +1,81 @@
+from main import app
+import serve
+import pytest
+
+
+def test_pool_per_worker_keeps_all_workers_under_max_connections():
+    for workers in (1, 2, 3, 8, 16, 30):
+        pool_size, max_overflow = serve.pool_per_worker(workers, max_connections=100, reserved=10, pool_size=10, max_overflow=10)
+        assert pool_size >= 2
+        # One more connection per worker for the health probe
+        assert workers * (pool_size + max_overflow + 1) <= 90
+
+    # Small worker counts keep the configured sizes, large ones shrink overflow first
+    assert serve.pool_per_worker(2, 100, 10, 10, 10) == (10, 10)
+    assert serve.pool_per_worker(6, 100, 10, 10, 10) == (10, 4)
+    assert serve.pool_per_worker(16, 100, 10, 10, 10) == (4, 0)
+
+
+def test_pool_per_worker_rejects_more_workers_than_connections():
+    with pytest.raises(ValueError):
+        serve.pool_per_worker(20, max_connections=20, reserved=5)
+    # One connection each would fit, but is below the minimum pool size
+    with pytest.raises(ValueError):
+        serve.pool_per_worker(45, max_connections=100, reserved=10, min_pool_size=2)
+    assert serve.pool_per_worker(45, max_connections=100, reserved=10, min_pool_size=1) == (1, 0)
+
+
+def test_available_cpus_honours_the_cgroup_quota(tmp_path):
+    cpu_max = tmp_path / "cpu.max"
+    unlimited = serve.available_cpus(str(tmp_path / "missing"))
+    assert unlimited >= 1
+
+    cpu_max.write_text("150000 100000\n")
+    assert serve.available_cpus(str(cpu_max)) == min(unlimited, 2)
+    cpu_max.write_text("max 100000\n")
+    assert serve.available_cpus(str(cpu_max)) == unlimited
+
+
+def test_main_sizes_the_pool_before_starting_uvicorn(monkeypatch):
+    started: dict = {}
+    monkeypatch.setattr(serve, "DB_MAX_CONNECTIONS", 50)
+    monkeypatch.setattr(serve, "DB_RESERVED_CONNECTIONS", 10)
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **options: started.update(options, app=app))
+    for name in ("DB_POOL_SIZE", "DB_MAX_OVERFLOW", "PROMETHEUS_MULTIPROC_DIR"):
+        monkeypatch.delenv(name, raising=False)
+
+    serve.main(workers=4)
+
+    assert started["app"] == "main:app"
+    assert started["workers"] == 4
+    assert started["loop"] in ("uvloop", "asyncio")
+    assert started["http"] in ("httptools", "h11")
+    assert serve.os.environ["DB_POOL_SIZE"] == "9"
+    assert serve.os.environ["DB_MAX_OVERFLOW"] == "0"
+    assert "PROMETHEUS_MULTIPROC_DIR" in serve.os.environ
+
+
+@pytest.mark.asyncio
+async def test_shutdown_disposes_the_engine(monkeypatch):
+    disposed: list[bool] = []
+
+    class Engine:
+        async def dispose(self) -> None:
+            disposed.append(True)
+
+    async def ready(target, *args) -> int:
+        return 1
+
+    monkeypatch.setattr("main.engine", Engine())
+    monkeypatch.setattr("main.warmup.wait_for_database", ready)
+    monkeypatch.setattr("main.warmup.warm_up", ready)
+    async with app.router.lifespan_context(app):
+        assert not disposed
+    assert disposed == [True]
+
+
+def test_main_refuses_a_per_worker_cache_with_several_workers(monkeypatch):
+    monkeypatch.setattr(serve, "CACHE_BACKEND", "memory")
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **options: pytest.fail("started"))
+    with pytest.raises(ValueError):
+        serve.main(workers=2)
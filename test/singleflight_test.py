@@ -0,0 +1,98 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.singleflight import SingleFlight, post_reads
+from db.cache import post_cache
+from httpx import AsyncClient
+import asyncio
+import pytest
+
+
+@pytest.fixture
+def counted_queries(db_session: AsyncSession, monkeypatch):
+    """Counts the session's queries, each one held open briefly like a slow database would."""
+    queries: list[str] = []
+    execute = db_session.execute
+
+    async def slow_execute(statement, *args, **kwargs):
+        queries.append(str(statement))
+        await asyncio.sleep(0.05)
+        return await execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db_session, "execute", slow_execute)
+    post_reads.reset_stats()
+    yield queries
+    post_reads.reset_stats()
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_reads_share_one_query(client: AsyncClient, counted_queries: list[str]):
+    post = (await client.post("/create", json={"text": "viral"})).json()
+    counted_queries.clear()
+
+    responses = await asyncio.gather(*(
+        client.get("/read_post_by_id", params={"post_id": post["id"]}) for _ in range(1000)
+    ))
+
+    assert all(r.status_code == 200 and r.json() == post for r in responses)
+    assert len(counted_queries) == 1
+    assert post_reads.stats()["read_post_by_id"] == {"leaders": 1, "followers": 999, "coalescing_ratio": 0.999}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_pages_share_one_query(client: AsyncClient, counted_queries: list[str]):
+    await client.post("/create", json={"text": "page"})
+    counted_queries.clear()
+
+    responses = await asyncio.gather(*(client.get("/read_all_posts", params={"limit": 10}) for _ in range(200)))
+
+    assert len({r.text for r in responses}) == 1
+    assert len(counted_queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_not_found_is_shared_too(client: AsyncClient, counted_queries: list[str]):
+    responses = await asyncio.gather(*(
+        client.get("/read_post_by_id", params={"post_id": 987654321}) for _ in range(50)
+    ))
+    assert {r.status_code for r in responses} == {404}
+    assert len(counted_queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_a_write_starts_a_new_flight(client: AsyncClient, counted_queries: list[str]):
+    post = (await client.post("/create", json={"text": "before"})).json()
+
+    stale = asyncio.create_task(client.get("/read_post_by_id", params={"post_id": post["id"]}))
+    await asyncio.sleep(0.01)
+    # What every write does after its commit
+    await post_cache.invalidate()
+    fresh = await client.get("/read_post_by_id", params={"post_id": post["id"]})
+
+    await stale
+    assert post_reads.stats()["read_post_by_id"]["leaders"] == 2
+    assert fresh.json() == post
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_hands_over_to_a_follower():
+    flights = SingleFlight(enabled=True)
+    started = asyncio.Event()
+    calls = 0
+
+    async def call() -> str:
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.create_task(flights.do("read", 1, call))
+    await started.wait()
+    follower = asyncio.create_task(flights.do("read", 1, call))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "done"
+    assert calls == 2
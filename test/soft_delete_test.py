@@ -0,0 +1,128 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import DbPost
+from httpx import AsyncClient
+from sqlalchemy import select
+from db import db_post, purge
+import pytest
+import json
+
+
+async def create_post(client: AsyncClient, text: str) -> dict:
+    response = await client.post("/create", json={"text": text})
+    assert response.status_code == 201
+    return response.json()
+
+
+async def all_ids(client: AsyncClient, **params) -> list[int]:
+    response = await client.get("/read_all_posts", params={"limit": 1000, **params})
+    return [p["id"] for p in response.json()["items"]]
+
+
+# --------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_tombstoned_post_never_comes_back(client: AsyncClient, db_session: AsyncSession):
+    kept = await create_post(client, "kept quokkahaze")
+    gone = await create_post(client, "gone quokkahaze")
+    user_id = gone["user_id"]
+
+    response = await client.delete("/delete", params={"post_id": gone["id"]})
+    assert response.status_code == 204
+    # The row is still there, only stamped
+    row = await db_session.get(DbPost, gone["id"])
+    assert row is not None and row.deleted_at is not None
+
+    response = await client.get("/read_post_by_id", params={"post_id": gone["id"]})
+    assert response.status_code == 404
+
+    response = await client.get("/read_posts_by_ids", params={"ids": [kept["id"], gone["id"]]})
+    assert response.json()["missing"] == [gone["id"]]
+
+    ids = await all_ids(client)
+    assert kept["id"] in ids and gone["id"] not in ids
+
+    response = await client.get("/read_posts", params={"user_id": user_id, "limit": 1000})
+    assert gone["id"] not in [p["id"] for p in response.json()["items"]]
+
+    response = await client.get("/search", params={"q": "quokkahaze"})
+    assert [p["id"] for p in response.json()["items"]] == [kept["id"]]
+
+    response = await client.get("/export", params={"user_id": user_id})
+    assert gone["id"] not in [json.loads(line)["id"] for line in response.text.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_tombstoned_post_cannot_be_changed_or_deleted_again(client: AsyncClient):
+    post = await create_post(client, "short lived")
+    await client.delete("/delete", params={"post_id": post["id"]})
+
+    response = await client.put("/update", params={"post_id": post["id"]}, json={"text": "revived"})
+    assert response.status_code == 404
+
+    response = await client.delete("/delete", params={"post_id": post["id"]})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_delete_unknown_post_is_not_found(client: AsyncClient):
+    response = await client.delete("/delete", params={"post_id": 987654321})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_hard_delete_mode_removes_the_row(client: AsyncClient, db_session: AsyncSession):
+    post = await create_post(client, "hard delete")
+
+    await db_post.delete(post["id"], db_session, post["user_id"], delete_mode="hard")
+    assert await db_session.get(DbPost, post["id"]) is None
+
+
+@pytest.mark.asyncio
+async def test_purge_removes_tombstones_in_bounded_batches(client: AsyncClient, db_session: AsyncSession):
+    # Start from an empty backlog, earlier tests leave tombstones behind
+    await purge.purge(db_session, grace_seconds=0)
+    posts = [await create_post(client, f"purge {i}") for i in range(5)]
+    for post in posts[:3]:
+        await client.delete("/delete", params={"post_id": post["id"]})
+    ids = [post["id"] for post in posts]
+
+    async def remaining() -> list[int]:
+        db_session.expire_all()
+        return list((await db_session.scalars(select(DbPost.id).where(DbPost.id.in_(ids)))).all())
+
+    # Tombstones inside the grace period are left alone
+    assert await purge.purge_batch(db_session, batch_size=10, grace_seconds=3600) == 0
+
+    assert await purge.purge_batch(db_session, batch_size=2, grace_seconds=0) == 2
+    assert len(await remaining()) == 3
+
+    await purge.purge(db_session, batch_size=2, max_rows_per_second=1_000_000, grace_seconds=0)
+    assert await remaining() == ids[3:]
+
+
+@pytest.mark.asyncio
+async def test_purge_worker_survives_a_failed_round(monkeypatch):
+    rounds: list[str] = []
+
+    class Stop(BaseException):
+        pass
+
+    async def flaky_purge(db):
+        rounds.append("purge")
+        if len(rounds) == 1:
+            raise ConnectionError("database restarting")
+        if len(rounds) == 3:
+            raise Stop()
+        return 0
+
+    async def no_keys(db, batch_size):
+        return 0
+
+    monkeypatch.setattr(purge, "purge", flaky_purge)
+    monkeypatch.setattr(purge.idempotency, "purge_expired", no_keys)
+    monkeypatch.setattr(purge, "PURGE_IDLE_SECONDS", 0)
+
+    with pytest.raises(Stop):
+        await purge.run(once=False)
+    assert len(rounds) == 3
@@ -0,0 +1,69 @@
+from sqlalchemy.ext.asyncio import AsyncEngine
+from db.database import create_engine_from_env, pool_stats
+from monitoring.metrics import STARTUP_SECONDS
+from conftest import TEST_DB_URL
+from db import warmup
+from main import app
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_every_pooled_connection():
+    engine: AsyncEngine = create_engine_from_env(TEST_DB_URL, pool_size=2, max_overflow=0)
+    try:
+        # Asking for more than the pool holds would only block on checkout
+        assert await warmup.warm_up(engine, connections=5) == 2
+        stats = pool_stats(engine)
+    finally:
+        await engine.dispose()
+
+    assert stats["checked_in"] == 2
+    assert stats["checked_out"] == 0
+
+
+def test_backoff_delay_grows_but_stays_bounded():
+    for attempt in range(20):
+        assert 0 <= warmup.backoff_delay(attempt, initial=0.1, maximum=5) <= min(5, 0.1 * 2 ** attempt)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_database_retries_with_backoff(monkeypatch):
+    attempts: list[int] = []
+    slept: list[float] = []
+
+    class Connection:
+        async def __aenter__(self) -> "Connection":
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionRefusedError("database is starting up")
+            return self
+
+        async def __aexit__(self, *args) -> None:
+            pass
+
+        async def execute(self, statement) -> None:
+            pass
+
+    class Engine:
+        def connect(self) -> Connection:
+            return Connection()
+
+    async def sleep(delay: float) -> None:
+        slept.append(delay)
+
+    monkeypatch.setattr(warmup.asyncio, "sleep", sleep)
+    assert await warmup.wait_for_database(Engine(), timeout=60) == 3
+    assert len(slept) == 2
+
+    attempts.clear()
+    with pytest.raises(ConnectionRefusedError):
+        await warmup.wait_for_database(Engine(), timeout=0)
+
+
+@pytest.mark.asyncio
+async def test_startup_warms_the_pool_and_reports_cold_start_time():
+    async with app.router.lifespan_context(app):
+        total = STARTUP_SECONDS.labels("total")._value.get()
+        warm = STARTUP_SECONDS.labels("warmup")._value.get()
+    assert total > 0
+    assert 0 < warm <= total